@@ -1,19 +1,31 @@
 """AI Agent implementation using Microsoft Agent Framework."""
+import asyncio
+import contextlib
 import logging
-from typing import Optional, AsyncIterator, Any
-
-from azure.identity import DefaultAzureCredential
-from agent_framework import RawAgent
-from agent_framework.azure import AzureOpenAIChatClient
+import time
+from typing import TYPE_CHECKING, Optional, AsyncIterator, Any
 
 from config import config
+from credentials import PrefetchingTokenProvider
+from model_router import ModelRouter
+from skill_catalog import skill_catalog
+from skill_index import skill_index
+from tool_tracking import ToolTracker, as_tool
 from tools import (
     find_experts_by_skills,
     get_team_skill_gaps,
     get_skill_summary,
     list_all_skills,
+    build_team,
+    find_similar_colleagues,
+    recommend_next_skills,
+    get_skill_trends,
 )
 
+if TYPE_CHECKING:
+    from agent_framework import RawAgent
+    from agent_framework.azure import AzureOpenAIChatClient
+
 logger = logging.getLogger(__name__)
 
 AGENT_INSTRUCTIONS = """You are a helpful Team Skills Assistant for the Team Skills Tracker application.
@@ -25,12 +37,17 @@ Your purpose is to help users find the right team members for projects, identify
 2. **Identify skill gaps** - Analyze which skills the team lacks or needs to improve
 3. **Provide summaries** - Give overviews of team capabilities
 4. **List available skills** - Show what skills are tracked in the system
+5. **Build teams** - Suggest the smallest group of people covering a set of required skills
+6. **Compare profiles** - Find colleagues with a similar skill profile and suggest what someone could learn next
+7. **Show trends** - Describe how proficiency in a skill or category has changed over recent weeks
 
 ## How to respond:
 - Be concise and helpful
 - When listing people, highlight their proficiency levels (L100=Beginner, L200=Intermediate, L300=Practitioner, L400=Expert)
 - For skill gap questions, prioritize actionable insights
 - If asked about skills you don't have data for, say so clearly
+- For staffing questions that need several skills, call build_team once rather than find_experts_by_skills per skill
+- When a question is about one team or role ("my team", "the architects"), pass team or role to the tool instead of filtering a company-wide answer
 
 ## Important:
 - Always use the available tools to get accurate, current data
@@ -41,13 +58,40 @@ Your purpose is to help users find the right team members for projects, identify
 AGENT_NAME = "TeamSkillsAssistant"
 
 
+def _load_framework() -> tuple[Any, Any, Any]:
+    """Import the Azure and Agent Framework modules.
+    
+    These imports take most of the process start time, so they are deferred
+    until initialize() and run off the event loop.
+    """
+    from azure.identity import DefaultAzureCredential
+    from agent_framework import RawAgent
+    from agent_framework.azure import AzureOpenAIChatClient
+    
+    return DefaultAzureCredential, RawAgent, AzureOpenAIChatClient
+
+
+def _iter_updates(stream: Any) -> AsyncIterator[Any]:
+    """Updates of a streaming run.
+    
+    Framework versions that expose updates as an async iterator are read
+    through it; otherwise the response stream is itself the iterator.
+    """
+    updates = getattr(stream, "updates", None)
+    return updates if hasattr(updates, "__aiter__") else stream
+
+
 class SkillsAgent:
     """AI agent for team skills queries."""
     
     def __init__(self):
-        self._agent: Optional[RawAgent] = None
-        self._chat_client: Optional[AzureOpenAIChatClient] = None
+        self._agent: Optional["RawAgent"] = None
+        # One agent per deployment; the primary is also kept in _agent
+        self._agents: dict[str, "RawAgent"] = {}
+        self._chat_client: Optional["AzureOpenAIChatClient"] = None
+        self.router = ModelRouter(config.hedge_after_ms, config.deployment_cooldown)
         self._credential = None
+        self._token_provider: Optional[PrefetchingTokenProvider] = None
     
     async def initialize(self) -> bool:
         """Initialize the agent with Azure OpenAI.
@@ -60,35 +104,82 @@ class SkillsAgent:
             return False
         
         try:
-            # Use DefaultAzureCredential for flexibility (supports managed identity, CLI, etc.)
-            self._credential = DefaultAzureCredential()
+            DefaultAzureCredential, RawAgent, AzureOpenAIChatClient = await asyncio.to_thread(_load_framework)
             
-            # Create Azure OpenAI chat client with explicit configuration
-            self._chat_client = AzureOpenAIChatClient(
-                credential=self._credential,
-                endpoint=config.azure_openai_endpoint,
-                deployment_name=config.azure_openai_deployment,
-            )
+            # Pick a working credential now and keep its token warm; fall back to
+            # DefaultAzureCredential's lazy chain if none can get a token yet
+            provider = PrefetchingTokenProvider()
+            if await provider.start():
+                self._token_provider = provider
+                self._credential = provider
+            else:
+                self._credential = DefaultAzureCredential()
             
-            # Create agent with tools
-            self._agent = RawAgent(
-                client=self._chat_client,
-                instructions=AGENT_INSTRUCTIONS,
-                tools=[
-                    find_experts_by_skills,
-                    get_team_skill_gaps,
-                    get_skill_summary,
-                    list_all_skills,
-                ],
-            )
+            # One Azure OpenAI chat client per deployment, primary first
+            self._create_agents(RawAgent, {
+                deployment: AzureOpenAIChatClient(
+                    credential=self._credential,
+                    endpoint=config.azure_openai_endpoint,
+                    deployment_name=deployment,
+                )
+                for deployment in config.deployments
+            })
             
-            logger.info(f"Agent '{AGENT_NAME}' initialized successfully")
+            logger.info(f"Agent '{AGENT_NAME}' initialized with deployments {list(self._agents)}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to initialize agent: {e}")
             return False
     
+    def _create_agents(self, agent_cls: Any, clients: dict[str, Any]) -> None:
+        """Create an agent with the tools for each deployment's chat client.
+        
+        Args:
+            agent_cls: The framework's RawAgent class
+            clients: Chat client per deployment name, primary first
+        """
+        self._agents = {
+            deployment: agent_cls(
+                client=client,
+                instructions=AGENT_INSTRUCTIONS,
+                tools=[
+                    as_tool(tool) for tool in (
+                        find_experts_by_skills,
+                        get_team_skill_gaps,
+                        get_skill_summary,
+                        list_all_skills,
+                        build_team,
+                        find_similar_colleagues,
+                        recommend_next_skills,
+                        get_skill_trends,
+                    )
+                ],
+            )
+            for deployment, client in clients.items()
+        }
+        primary = next(iter(clients))
+        self._chat_client = clients[primary]
+        self._agent = self._agents[primary]
+    
+    def _deployment_agents(self) -> dict[str, "RawAgent"]:
+        """Agents to route between, in order of preference."""
+        return self._agents or {config.azure_openai_deployment: self._agent}
+    
+    async def _run_options(self) -> Optional[dict]:
+        """Per-run chat options carrying the skills catalog.
+        
+        The framework appends run-level instructions after the agent's own, so
+        the fixed AGENT_INSTRUCTIONS prefix is followed by a catalog whose bytes
+        only change when the skills do.
+        """
+        try:
+            await skill_index.ensure_loaded()
+        except Exception as e:
+            logger.warning(f"Skill catalog refresh failed: {type(e).__name__}: {e}")
+        instructions = skill_catalog.instructions
+        return {"instructions": instructions} if instructions else None
+    
     async def run(self, message: str) -> str:
         """Run the agent with a user message.
         
@@ -102,7 +193,11 @@ class SkillsAgent:
             return "Agent is not available. Please check the service configuration."
         
         try:
-            result = await self._agent.run(message)
+            options = await self._run_options()
+            agents = self._deployment_agents()
+            result = await self.router.call(
+                agents, lambda deployment: agents[deployment].run(message, options=options)
+            )
             logger.info(f"Agent result - text: {bool(result.text)}, value: {bool(result.value)}")
             if result.text:
                 return result.text
@@ -120,40 +215,100 @@ class SkillsAgent:
             message: The user's message/question
             
         Yields:
-            Chunks of the agent's response
+            Events: content (response text chunks), tool_start and tool_end
+            (tool name, duration and rows read) around each tool call, and
+            done with the server-side time to first token and the deployment
+            that answered
         """
         if not self._agent:
             yield {"type": "error", "content": "Agent is not available"}
             return
         
+        start = time.perf_counter()
+        first_token_ms = None
+        tracker = ToolTracker()
+        token = tracker.activate()
+        # call_id -> (tool name, start time) for calls still running
+        running: dict[str, tuple[str, float]] = {}
+        tool_calls = 0
+        deployment = None
         try:
-            # Stream the response using run(stream=True)
-            stream = self._agent.run(message, stream=True)
-            async for update in stream.updates:
+            # Stream from whichever deployment answers first
+            options = await self._run_options()
+            agents = self._deployment_agents()
+            updates = self.router.stream(
+                agents,
+                lambda name: _iter_updates(agents[name].run(message, stream=True, options=options)),
+            )
+            async for deployment, update in updates:
+                for item in update.contents or []:
+                    if item.type == "function_call" and item.name and item.call_id and item.call_id not in running:
+                        running[item.call_id] = (item.name, time.perf_counter())
+                        tool_calls += 1
+                        yield {"type": "tool_start", "name": item.name, "call_id": item.call_id}
+                    elif item.type == "function_result" and item.call_id in running:
+                        name, started = running.pop(item.call_id)
+                        stats = tracker.pop(item.call_id, name) or {
+                            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                            "rows": None,
+                            "error": item.exception,
+                        }
+                        yield {"type": "tool_end", "name": name, "call_id": item.call_id, **stats}
                 if update.text:
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - start) * 1000, 1)
                     yield {
                         "type": "content",
                         "content": update.text,
                     }
             
-            yield {"type": "done"}
+            yield {
+                "type": "done",
+                "time_to_first_token_ms": first_token_ms,
+                "total_ms": round((time.perf_counter() - start) * 1000, 1),
+                "tool_calls": tool_calls,
+                "deployment": deployment,
+            }
             
         except Exception as e:
             logger.error(f"Agent stream failed: {e}")
             yield {"type": "error", "content": str(e)}
+        finally:
+            # A generator closed from another context cannot reset the variable
+            with contextlib.suppress(ValueError):
+                tracker.deactivate(token)
     
     async def cleanup(self) -> None:
         """Clean up agent resources."""
         if self._chat_client:
             self._chat_client = None
+        if self._token_provider:
+            await self._token_provider.close()
+            self._token_provider = None
         self._credential = None
         self._agent = None
+        self._agents = {}
         logger.info("Agent cleaned up")
     
     @property
     def is_available(self) -> bool:
         """Check if the agent is initialized and available."""
         return self._agent is not None
+    
+    @property
+    def catalog_version(self) -> Optional[str]:
+        """Version of the skills catalog currently in the prompt."""
+        return skill_catalog.version
+    
+    @property
+    def deployment_stats(self) -> dict[str, dict]:
+        """First-token latency, failures and hedges per model deployment."""
+        return self.router.snapshot()
+    
+    @property
+    def token_metrics(self) -> Optional[dict]:
+        """Azure AD token acquisition metrics, if the prefetching provider is in use."""
+        return self._token_provider.metrics if self._token_provider else None
 
 
 # Global agent instance
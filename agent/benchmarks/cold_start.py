@@ -0,0 +1,105 @@
+"""Measure agent service cold start: process launch to first successful request.
+
+Starts `uvicorn main:app` in a fresh process, polls an endpoint until it
+answers with a 2xx status, then stops the server. Repeat with --runs to get
+a distribution.
+
+Usage (from the agent/ directory):
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --path /chat --message "Who knows Python?"
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(url: str, message: str | None) -> tuple[int, bytes]:
+    data = None
+    headers = {}
+    if message is not None:
+        data = json.dumps({"message": message}).encode()
+        headers["Content-Type"] = "application/json"
+    req = urllib.request.Request(url, data=data, headers=headers)
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return resp.status, resp.read()
+
+
+def measure_once(path: str, message: str | None, timeout: float) -> dict:
+    """Launch the server and time it until path first returns 2xx."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=AGENT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            elapsed = time.perf_counter() - start
+            if elapsed > timeout:
+                raise TimeoutError(f"No successful response from {path} within {timeout}s")
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {proc.returncode}")
+            try:
+                status, _ = _request(base + path, message)
+                if 200 <= status < 300:
+                    break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            time.sleep(0.02)
+        first_success_ms = (time.perf_counter() - start) * 1000
+        
+        startup = {}
+        try:
+            _, body = _request(base + "/health", None)
+            startup = json.loads(body).get("startup_ms", {})
+        except (urllib.error.URLError, OSError, ValueError):
+            pass
+        return {"first_success_ms": round(first_success_ms, 1), "startup_ms": startup}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Number of cold starts to measure")
+    parser.add_argument("--path", default="/health", help="Endpoint that must succeed")
+    parser.add_argument("--message", default=None, help="POST this chat message instead of GET")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait per run")
+    args = parser.parse_args()
+    
+    samples = []
+    for run in range(1, args.runs + 1):
+        result = measure_once(args.path, args.message, args.timeout)
+        samples.append(result["first_success_ms"])
+        print(f"run {run}: {result['first_success_ms']} ms to first success; phases (ms): {result['startup_ms']}")
+    
+    print(
+        f"time-to-first-success over {len(samples)} run(s): "
+        f"min={min(samples):.1f} ms median={statistics.median(samples):.1f} ms max={max(samples):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
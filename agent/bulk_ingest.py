@@ -0,0 +1,417 @@
+"""Bulk-load users, skills and proficiency levels from CSV or JSONL.
+
+Input is one row per user and skill, with these columns (CSV header or JSON
+keys; only email is required, rows without a skill just upsert the user):
+
+    email, name, role, team, skill, category, proficiency_level, notes
+
+Rows are streamed in batches into a temporary staging table with COPY
+(asyncpg copy_records_to_table), so memory stays bounded by the batch size
+however large the file is. Staging happens before the merge transaction
+opens, so however long the input takes to read, the transaction only lasts
+as long as the merge. Everything is then merged in one transaction with
+set-based statements:
+
+- missing categories and skills are created; skills also match existing
+  names case-insensitively and through skill_aliases
+- users are matched on email (case-insensitively), updated where a provided
+  field differs, and inserted otherwise
+- user_skills are upserted; when the same user and skill appear twice, the
+  later row wins
+
+The per-row history and team coverage triggers on user_skills are suspended
+for the merge. History rows are written by the upsert statement itself,
+following the same rule as the trigger (a new assignment or a changed
+level), and team_skill_coverage is rebuilt once at the end. Firing a
+PL/pgSQL trigger per assignment, each adjusting the same few coverage rows,
+is what made a row-at-a-time load slow. Disabling the triggers locks users
+and user_skills against other writers (not readers) until the transaction
+ends, so nothing slips past them.
+
+last_updated and changed_at are stamped with clock_timestamp() when the
+upsert runs, not with the transaction start as the column defaults and the
+modtime trigger would. Both incremental readers trail their high-water
+mark by one minute: the trend rollups (migration 007) and the skill index
+that feeds the proficiency matrix (skill_index.CHANGE_MARGIN). A merge that
+ran longer than that with transaction-start stamps would commit rows below
+both marks, and neither would ever see them.
+
+Usage (from the agent/ directory):
+    python bulk_ingest.py export.csv
+    python bulk_ingest.py part1.jsonl part2.jsonl --batch-size 20000
+    cat export.csv | python bulk_ingest.py - --format csv --dry-run
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import sys
+import time
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from config import config
+from db import db
+
+logger = logging.getLogger(__name__)
+
+STAGE_COLUMNS = ["email", "name", "role", "team", "skill", "category", "proficiency_level", "notes"]
+
+# Other spellings accepted in input headers/keys
+FIELD_ALIASES = {
+    "level": "proficiency_level",
+    "proficiency": "proficiency_level",
+    "skill_name": "skill",
+    "skill_category": "category",
+    "user_name": "name",
+}
+
+DEFAULT_BATCH_SIZE = 10_000
+
+# Rejected rows beyond this many are counted but not described
+MAX_REPORTED_ERRORS = 20
+
+
+class RowError(ValueError):
+    """An input row that cannot be loaded."""
+
+
+class RowErrors:
+    """Number of rejected rows, keeping only the first few messages."""
+
+    def __init__(self, keep: int = MAX_REPORTED_ERRORS):
+        self.keep = keep
+        self.count = 0
+        self.messages: list[str] = []
+
+    def add(self, message: str) -> None:
+        self.count += 1
+        if len(self.messages) < self.keep:
+            self.messages.append(message)
+
+
+def normalize_level(value: Optional[str]) -> Optional[str]:
+    """'L300', 'l300', '300' or '3' -> 'L300'."""
+    if value is None or not str(value).strip():
+        return None
+    text = str(value).strip().upper().removeprefix("L")
+    if text in ("1", "2", "3", "4"):
+        text = f"{text}00"
+    if text not in ("100", "200", "300", "400"):
+        raise RowError(f"Unknown proficiency level {value!r}")
+    return f"L{text}"
+
+
+def to_record(row: dict[str, Any]) -> tuple:
+    """Staging record (in STAGE_COLUMNS order) for one input row."""
+    fields: dict[str, Optional[str]] = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        name = key.strip().lower()
+        name = FIELD_ALIASES.get(name, name)
+        if name in STAGE_COLUMNS:
+            text = str(value).strip() if value is not None else ""
+            fields[name] = text or None
+    if not fields.get("email"):
+        raise RowError("Missing email")
+    if fields.get("proficiency_level") and not fields.get("skill"):
+        raise RowError("Proficiency level without a skill")
+    fields["proficiency_level"] = normalize_level(fields.get("proficiency_level"))
+    if fields.get("skill") and not fields["proficiency_level"]:
+        raise RowError(f"Missing proficiency level for skill {fields['skill']!r}")
+    return tuple(fields.get(column) for column in STAGE_COLUMNS)
+
+
+def read_rows(stream: io.TextIOBase, fmt: str) -> Iterator[Union[dict[str, Any], str]]:
+    """Input rows from a CSV (with header) or JSONL stream, one at a time.
+
+    JSONL rows are yielded as raw lines and parsed by batches(), so a bad
+    line is reported like any other bad row.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def batches(rows: Iterable[Union[dict[str, Any], str]], size: int, errors: RowErrors) -> Iterator[list[tuple]]:
+    """Staging records in lists of at most size, collecting row errors."""
+    batch: list[tuple] = []
+    for number, row in enumerate(rows, 1):
+        try:
+            batch.append(to_record(json.loads(row) if isinstance(row, str) else row))
+        except (ValueError, AttributeError) as e:
+            errors.add(f"row {number}: {e}")
+            continue
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+CREATE_STAGE = """
+    CREATE TEMP TABLE ingest_stage (
+        seq BIGINT GENERATED ALWAYS AS IDENTITY,
+        email TEXT NOT NULL,
+        name TEXT,
+        role TEXT,
+        team TEXT,
+        skill TEXT,
+        category TEXT,
+        proficiency_level TEXT,
+        notes TEXT
+    )
+"""
+
+MERGE_CATEGORIES = """
+    INSERT INTO skill_categories (name)
+    SELECT DISTINCT ON (LOWER(s.category)) s.category
+    FROM ingest_stage s
+    WHERE s.category IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM skill_categories c WHERE LOWER(c.name) = LOWER(s.category))
+    ORDER BY LOWER(s.category), s.seq
+"""
+
+MERGE_SKILLS = """
+    INSERT INTO skills (name, category_id)
+    SELECT DISTINCT ON (LOWER(s.skill)) s.skill, c.id
+    FROM ingest_stage s
+    LEFT JOIN (
+        SELECT LOWER(name) AS key, MIN(id) AS id FROM skill_categories GROUP BY LOWER(name)
+    ) c ON c.key = LOWER(s.category)
+    WHERE s.skill IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM skills k WHERE LOWER(k.name) = LOWER(s.skill))
+      AND NOT EXISTS (SELECT 1 FROM skill_aliases a WHERE LOWER(a.alias) = LOWER(s.skill))
+    ORDER BY LOWER(s.skill), s.seq
+"""
+
+# Name or alias (lowercased) -> skill id, names taking precedence
+SKILL_MAP = """
+    CREATE TEMP TABLE ingest_skill_map ON COMMIT DROP AS
+    SELECT LOWER(name) AS key, MIN(id) AS skill_id FROM skills GROUP BY LOWER(name)
+    UNION ALL
+    SELECT LOWER(a.alias), MIN(a.skill_id)
+    FROM skill_aliases a
+    WHERE NOT EXISTS (SELECT 1 FROM skills k WHERE LOWER(k.name) = LOWER(a.alias))
+    GROUP BY LOWER(a.alias)
+"""
+
+# One row per user with the latest non-empty value of each field; fields
+# left empty everywhere keep their current values
+LATEST_USERS = """
+    CREATE TEMP TABLE ingest_users ON COMMIT DROP AS
+    SELECT
+        (ARRAY_AGG(email ORDER BY seq DESC))[1] AS email,
+        (ARRAY_AGG(name ORDER BY seq DESC) FILTER (WHERE name IS NOT NULL))[1] AS name,
+        (ARRAY_AGG(role ORDER BY seq DESC) FILTER (WHERE role IS NOT NULL))[1] AS role,
+        (ARRAY_AGG(team ORDER BY seq DESC) FILTER (WHERE team IS NOT NULL))[1] AS team
+    FROM ingest_stage
+    GROUP BY LOWER(email)
+"""
+
+UPDATE_USERS = """
+    UPDATE users u
+    SET name = COALESCE(i.name, u.name),
+        role = COALESCE(i.role, u.role),
+        team = COALESCE(i.team, u.team)
+    FROM ingest_users i
+    WHERE LOWER(u.email) = LOWER(i.email)
+      AND (u.name, u.role, u.team) IS DISTINCT FROM
+          (COALESCE(i.name, u.name), COALESCE(i.role, u.role), COALESCE(i.team, u.team))
+"""
+
+INSERT_USERS = """
+    INSERT INTO users (email, name, role, team)
+    SELECT i.email, COALESCE(i.name, i.email), i.role, i.team
+    FROM ingest_users i
+    WHERE NOT EXISTS (SELECT 1 FROM users u WHERE LOWER(u.email) = LOWER(i.email))
+"""
+
+# Upsert assignments and record history for new ones and changed levels,
+# as the (suspended) track_skill_changes trigger would; `previous` reads
+# the levels from before this statement. Rows are stamped with the time
+# they are written (see the module docstring).
+UPSERT_USER_SKILLS = """
+    WITH latest AS (
+        SELECT DISTINCT ON (u.id, m.skill_id)
+            u.id AS user_id, m.skill_id, s.proficiency_level, s.notes
+        FROM ingest_stage s
+        JOIN (
+            SELECT LOWER(email) AS key, MIN(id) AS id FROM users GROUP BY LOWER(email)
+        ) u ON u.key = LOWER(s.email)
+        JOIN ingest_skill_map m ON m.key = LOWER(s.skill)
+        WHERE s.proficiency_level IS NOT NULL
+        ORDER BY u.id, m.skill_id, s.seq DESC
+    ),
+    previous AS (
+        SELECT us.user_id, us.skill_id, us.proficiency_level
+        FROM latest l
+        JOIN user_skills us ON us.user_id = l.user_id AND us.skill_id = l.skill_id
+    ),
+    upserted AS (
+        INSERT INTO user_skills (user_id, skill_id, proficiency_level, notes, last_updated)
+        SELECT user_id, skill_id, proficiency_level, notes, clock_timestamp()::timestamp FROM latest
+        ON CONFLICT (user_id, skill_id) DO UPDATE
+        SET proficiency_level = EXCLUDED.proficiency_level,
+            notes = COALESCE(EXCLUDED.notes, user_skills.notes),
+            last_updated = EXCLUDED.last_updated
+        WHERE (user_skills.proficiency_level, user_skills.notes) IS DISTINCT FROM
+              (EXCLUDED.proficiency_level, COALESCE(EXCLUDED.notes, user_skills.notes))
+        RETURNING user_id, skill_id, proficiency_level, last_updated, (xmax = 0) AS inserted
+    ),
+    history AS (
+        INSERT INTO user_skills_history (user_id, skill_id, proficiency_level, changed_at)
+        SELECT n.user_id, n.skill_id, n.proficiency_level, n.last_updated
+        FROM upserted n
+        LEFT JOIN previous p ON p.user_id = n.user_id AND p.skill_id = n.skill_id
+        WHERE p.proficiency_level IS DISTINCT FROM n.proficiency_level
+    )
+    SELECT
+        COUNT(*) FILTER (WHERE inserted) AS inserted,
+        COUNT(*) FILTER (WHERE NOT inserted) AS updated
+    FROM upserted
+"""
+
+
+# Per-row triggers replaced by set-based statements for the merge
+SUSPENDED_TRIGGERS = [
+    ("user_skills", "track_skill_changes"),
+    ("user_skills", "update_user_skills_modtime"),
+    ("user_skills", "track_team_skill_coverage"),
+    ("users", "move_team_member"),
+]
+
+
+def _count(status: str) -> int:
+    """Row count from a command status such as 'INSERT 0 42' or 'UPDATE 7'."""
+    return int(status.rsplit(" ", 1)[-1])
+
+
+async def ingest(
+    sources: Iterable[tuple[io.TextIOBase, str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """Stage and merge rows from each (stream, format) source.
+
+    Args:
+        sources: Open text streams with their format, "csv" or "jsonl"
+        batch_size: Records per COPY batch (bounds memory use)
+        dry_run: Merge, report, then roll back
+
+    Returns:
+        Counts of staged and rejected rows and of rows created or updated
+    """
+    start = time.perf_counter()
+    errors = RowErrors()
+    stats: dict[str, Any] = {"staged": 0}
+    async with db.acquire() as conn:
+        try:
+            await conn.execute(CREATE_STAGE)
+            for stream, fmt in sources:
+                for batch in batches(read_rows(stream, fmt), batch_size, errors):
+                    await conn.copy_records_to_table("ingest_stage", records=batch, columns=STAGE_COLUMNS)
+                    stats["staged"] += len(batch)
+                    logger.info("Staged %d rows", stats["staged"])
+            stats["copy_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            await conn.execute("ANALYZE ingest_stage")
+
+            tx = conn.transaction()
+            await tx.start()
+            try:
+                await _merge(conn, stats)
+            except BaseException:
+                await tx.rollback()
+                raise
+            stats["merge_ms"] = round((time.perf_counter() - start) * 1000 - stats["copy_ms"], 1)
+            if dry_run:
+                await tx.rollback()
+            else:
+                await tx.commit()
+                # Fresh statistics so the tool queries plan for the new table sizes
+                await conn.execute("ANALYZE users, skills, user_skills, team_skill_coverage")
+        finally:
+            if not conn.is_closed():
+                await conn.execute("DROP TABLE IF EXISTS ingest_stage")
+
+    stats["rejected"] = errors.count
+    stats["errors"] = errors.messages
+    stats["dry_run"] = dry_run
+    stats["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return stats
+
+
+async def _merge(conn, stats: dict[str, Any]) -> None:
+    """Merge the staged rows; run inside the ingest transaction."""
+    for table, trigger in SUSPENDED_TRIGGERS:
+        await conn.execute(f"ALTER TABLE {table} DISABLE TRIGGER {trigger}")
+    stats["categories_created"] = _count(await conn.execute(MERGE_CATEGORIES))
+    stats["skills_created"] = _count(await conn.execute(MERGE_SKILLS))
+    await conn.execute(SKILL_MAP)
+    await conn.execute(LATEST_USERS)
+    stats["users_updated"] = _count(await conn.execute(UPDATE_USERS))
+    stats["users_created"] = _count(await conn.execute(INSERT_USERS))
+    # The foreign key checks on every upserted row are planned on first
+    # use; without fresh statistics they scan skills instead of its key
+    await conn.execute("ANALYZE users, skills, ingest_skill_map")
+    result = await conn.fetchrow(UPSERT_USER_SKILLS)
+    stats["user_skills_created"] = result["inserted"]
+    stats["user_skills_updated"] = result["updated"]
+    for table, trigger in SUSPENDED_TRIGGERS:
+        await conn.execute(f"ALTER TABLE {table} ENABLE TRIGGER {trigger}")
+    await conn.execute("SELECT refresh_team_skill_coverage()")
+
+
+def _format_for(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    raise SystemExit(f"Cannot tell the format of {path!r}; pass --format")
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+", help="CSV/JSONL files, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per COPY batch")
+    parser.add_argument("--dry-run", action="store_true", help="Merge and report, then roll back")
+    parser.add_argument("--database-url", default=config.database_url, help="Defaults to DATABASE_URL / PG* settings")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    db.database_url = args.database_url
+    await db.connect()
+    if not db.is_connected:
+        print("Could not connect to the database", file=sys.stderr)
+        return 1
+
+    files = []
+    try:
+        sources = []
+        for path in args.paths:
+            if path == "-":
+                sources.append((sys.stdin, _format_for(path, args.format)))
+            else:
+                f = open(path, newline="", encoding="utf-8-sig")
+                files.append(f)
+                sources.append((f, _format_for(path, args.format)))
+        stats = await ingest(sources, batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        for f in files:
+            f.close()
+        await db.disconnect()
+
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -27,11 +27,59 @@ class Config:
     # Environment
     environment: str = "development"
     
+    # Upper bound on the startup warm-up before /ready reports its outcome
+    warmup_timeout: float = 20.0
+    
+    # Extra deployments to fail over or hedge to, in order of preference
+    azure_openai_fallback_deployments: tuple[str, ...] = ()
+    
+    # Start a second deployment when the first has produced nothing after this long
+    hedge_after_ms: float = 2500.0
+    
+    # How long a deployment that was throttled or failed is passed over
+    deployment_cooldown: float = 30.0
+    
+    # /chat/batch: most questions per request, and how many run at once
+    batch_max_messages: int = 100
+    batch_concurrency: int = 4
+    
+    # File the skill index is persisted to for warm restarts; empty disables it
+    skill_snapshot_path: str = ""
+    
+    # Event-loop delay past which the blocking stack is logged
+    loop_stall_threshold_ms: float = 100.0
+    
+    # Queries slower than this are kept for /admin/slow-queries (0 disables);
+    # the given share of them also get an EXPLAIN (ANALYZE, BUFFERS)
+    slow_query_ms: float = 500.0
+    slow_query_explain_rate: float = 0.1
+    
+    # Optional read replica for the agent's read-only queries, used while its
+    # replication lag (checked every replica_check_interval) is within bound
+    replica_database_url: str = ""
+    replica_max_lag_seconds: float = 5.0
+    replica_check_interval: float = 2.0
+    
+    # Required in the X-Admin-Token header by /admin endpoints when set
+    admin_token: str = ""
+    
+    # Logging: level, "json" or "text", and per-logger sampling of records
+    # below WARNING ("logger=rate,..."; rate is the share kept)
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_sample_rates: str = "tools=0.1"
+    
     @property
     def is_production(self) -> bool:
         """Check if running in production."""
         return self.environment.lower() in ("production", "prod")
     
+    @property
+    def deployments(self) -> list[str]:
+        """Primary deployment followed by the fallbacks, without duplicates."""
+        names = [self.azure_openai_deployment, *self.azure_openai_fallback_deployments]
+        return list(dict.fromkeys(name for name in names if name))
+    
     @classmethod
     def from_env(cls) -> "Config":
         """Load configuration from environment variables."""
@@ -56,6 +104,27 @@ class Config:
             frontend_url=os.environ.get("FRONTEND_URL", ""),
             rate_limit=os.environ.get("RATE_LIMIT", "10/minute"),
             environment=os.environ.get("ENVIRONMENT", "development"),
+            warmup_timeout=float(os.environ.get("WARMUP_TIMEOUT_SECONDS", "20")),
+            azure_openai_fallback_deployments=tuple(
+                name.strip()
+                for name in os.environ.get("AZURE_OPENAI_FALLBACK_DEPLOYMENTS", "").split(",")
+                if name.strip()
+            ),
+            hedge_after_ms=float(os.environ.get("HEDGE_AFTER_MS", "2500")),
+            deployment_cooldown=float(os.environ.get("DEPLOYMENT_COOLDOWN_SECONDS", "30")),
+            batch_max_messages=int(os.environ.get("BATCH_MAX_MESSAGES", "100")),
+            batch_concurrency=int(os.environ.get("BATCH_CONCURRENCY", "4")),
+            skill_snapshot_path=os.environ.get("SKILL_SNAPSHOT_PATH", ""),
+            loop_stall_threshold_ms=float(os.environ.get("LOOP_STALL_THRESHOLD_MS", "100")),
+            slow_query_ms=float(os.environ.get("SLOW_QUERY_MS", "500")),
+            slow_query_explain_rate=float(os.environ.get("SLOW_QUERY_EXPLAIN_RATE", "0.1")),
+            replica_database_url=os.environ.get("DATABASE_REPLICA_URL", ""),
+            replica_max_lag_seconds=float(os.environ.get("REPLICA_MAX_LAG_SECONDS", "5")),
+            replica_check_interval=float(os.environ.get("REPLICA_CHECK_INTERVAL_SECONDS", "2")),
+            admin_token=os.environ.get("AGENT_ADMIN_TOKEN", ""),
+            log_level=os.environ.get("LOG_LEVEL", "INFO"),
+            log_format=os.environ.get("LOG_FORMAT", "json"),
+            log_sample_rates=os.environ.get("LOG_SAMPLE_RATES", "tools=0.1"),
         )
 
 
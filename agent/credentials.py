@@ -0,0 +1,174 @@
+"""Azure AD token management for the chat client.
+
+DefaultAzureCredential walks its credential chain on the first token request,
+which lands on the first chat after a scale-up. PrefetchingTokenProvider picks
+the working credential at startup, holds the token, and refreshes it in the
+background so user requests never wait on Azure AD.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+def _credential_candidates() -> list[tuple[str, Callable[[], Any]]]:
+    """Credential factories in the same order DefaultAzureCredential tries them."""
+    from azure.identity import (
+        AzureCliCredential,
+        AzureDeveloperCliCredential,
+        EnvironmentCredential,
+        ManagedIdentityCredential,
+        WorkloadIdentityCredential,
+    )
+
+    client_id = os.environ.get("AZURE_CLIENT_ID")
+    return [
+        ("environment", EnvironmentCredential),
+        ("workload_identity", WorkloadIdentityCredential),
+        ("managed_identity", lambda: ManagedIdentityCredential(client_id=client_id)),
+        ("azure_cli", AzureCliCredential),
+        ("azure_developer_cli", AzureDeveloperCliCredential),
+    ]
+
+
+class PrefetchingTokenProvider:
+    """Async bearer token provider with eager credential selection and background refresh.
+
+    Instances are callables returning a token string, which is the
+    AzureTokenProvider shape AzureOpenAIChatClient accepts as its credential.
+    """
+
+    def __init__(
+        self,
+        scope: str = COGNITIVE_SERVICES_SCOPE,
+        refresh_margin: float = 300.0,
+        probe_timeout: float = 10.0,
+        retry_interval: float = 30.0,
+        candidates: Optional[list[tuple[str, Callable[[], Any]]]] = None,
+    ):
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.probe_timeout = probe_timeout
+        self.retry_interval = retry_interval
+        self._candidates = candidates
+        self._credential = None
+        self.credential_name: Optional[str] = None
+        self._token: Optional[str] = None
+        self._expires_on: float = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Token acquisition metrics
+        self.acquisitions = 0
+        self.failures = 0
+        self.last_acquire_ms: Optional[float] = None
+        self.total_acquire_ms = 0.0
+
+    async def start(self) -> bool:
+        """Pick the first credential that yields a token and start refreshing it.
+
+        Returns:
+            True if a credential was found, False if every candidate failed
+        """
+        candidates = self._candidates
+        if candidates is None:
+            candidates = await asyncio.to_thread(_credential_candidates)
+
+        for name, factory in candidates:
+            try:
+                credential = factory()
+            except Exception as e:
+                logger.debug(f"Credential '{name}' unavailable: {e}")
+                continue
+            self._credential = credential
+            try:
+                await asyncio.wait_for(self._acquire(), timeout=self.probe_timeout)
+            except Exception as e:
+                logger.debug(f"Credential '{name}' could not get a token: {type(e).__name__}: {e}")
+                self._credential = None
+                self._close(credential)
+                continue
+            self.credential_name = name
+            logger.info(f"Using '{name}' credential; token prefetched in {self.last_acquire_ms} ms")
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+            return True
+
+        logger.warning("No credential in the chain could acquire a token")
+        return False
+
+    async def __call__(self) -> str:
+        """Return a valid bearer token, fetching inline only if the cache is stale."""
+        if self._token and time.time() < self._expires_on - 60:
+            return self._token
+        async with self._lock:
+            if not self._token or time.time() >= self._expires_on - 60:
+                await self._acquire()
+            return self._token
+
+    async def _acquire(self) -> None:
+        """Fetch a fresh token from the chosen credential and record timing."""
+        start = time.perf_counter()
+        try:
+            token = await asyncio.to_thread(self._credential.get_token, self.scope)
+        except Exception:
+            self.failures += 1
+            raise
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.acquisitions += 1
+        self.last_acquire_ms = elapsed_ms
+        self.total_acquire_ms += elapsed_ms
+        self._token = token.token
+        self._expires_on = float(token.expires_on)
+
+    async def _refresh_loop(self) -> None:
+        """Refresh the token refresh_margin seconds before it expires."""
+        while True:
+            delay = max(self._expires_on - self.refresh_margin - time.time(), 0)
+            await asyncio.sleep(delay)
+            try:
+                async with self._lock:
+                    await self._acquire()
+                logger.debug(f"Refreshed Azure AD token in {self.last_acquire_ms} ms")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Background token refresh failed: {type(e).__name__}: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+    @staticmethod
+    def _close(credential: Any) -> None:
+        close = getattr(credential, "close", None)
+        if close:
+            try:
+                close()
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        """Stop background refresh and release the credential."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._credential is not None:
+            self._close(self._credential)
+            self._credential = None
+
+    @property
+    def metrics(self) -> dict:
+        """Token acquisition metrics for status endpoints."""
+        return {
+            "credential": self.credential_name,
+            "acquisitions": self.acquisitions,
+            "failures": self.failures,
+            "last_acquire_ms": self.last_acquire_ms,
+            "avg_acquire_ms": round(self.total_acquire_ms / self.acquisitions, 1) if self.acquisitions else None,
+            "expires_in_s": max(round(self._expires_on - time.time()), 0) if self._token else None,
+        }
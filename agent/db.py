@@ -1,51 +1,472 @@
 """Database connection and query utilities."""
 import os
+import re
+import time
+import random
+import asyncio
 import logging
-from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Optional
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, suppress
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, Hashable, Optional
 
-import asyncpg
+if TYPE_CHECKING:
+    import asyncpg
 
 logger = logging.getLogger(__name__)
 
+# Row counter for the innermost track_rows() block, if any
+_rows_seen: ContextVar[Optional[list[int]]] = ContextVar("rows_seen", default=None)
+
+
+@contextmanager
+def track_rows():
+    """Count rows returned by fetch_all/fetch_one calls made inside the block.
+    
+    The count follows the current context, so it includes queries from any
+    coroutine awaited inside the block and stays separate per task.
+    
+    Yields:
+        A one-element list holding the running row count
+    """
+    counter = [0]
+    token = _rows_seen.set(counter)
+    try:
+        yield counter
+    finally:
+        _rows_seen.reset(token)
+
+
+def _count_rows(n: int) -> None:
+    counter = _rows_seen.get()
+    if counter is not None:
+        counter[0] += n
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight task.
+    
+    The first caller for a key starts the work; callers that arrive while it
+    is still running await the same task instead of repeating it. Nothing is
+    cached once the task finishes, so errors are never remembered.
+    """
+    
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the call already in flight for it."""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shield so one cancelled caller does not cancel the shared work
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct keys currently executing."""
+        return len(self._inflight)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker that lets callers fail fast while the DB is down.
+    
+    closed: calls go through; consecutive connection failures are counted.
+    open: calls are rejected until reset_timeout has passed.
+    half_open: a single trial call is let through; its outcome closes or
+    re-opens the circuit. A trial that reports neither within reset_timeout
+    (at least MIN_TRIAL_SECONDS), because it was cancelled or hangs on a
+    dead socket, is written off and another trial is let through.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    MIN_TRIAL_SECONDS = 1.0
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._half_open_at = 0.0
+        self.transitions: deque[dict] = deque(maxlen=20)
+    
+    def _transition(self, state: str, reason: str) -> None:
+        if state == self.state:
+            return
+        logger.warning(f"DB circuit {self.state} -> {state}: {reason}")
+        self.transitions.append({
+            "from": self.state,
+            "to": state,
+            "reason": reason,
+            "at": time.time(),
+        })
+        self.state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == self.HALF_OPEN:
+            self._half_open_at = time.monotonic()
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now."""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN, "reset timeout elapsed, trying one call")
+            return True
+        if self.state == self.HALF_OPEN and now - self._half_open_at >= max(self.reset_timeout, self.MIN_TRIAL_SECONDS):
+            logger.warning("DB circuit trial call never reported back; trying another")
+            self._half_open_at = now
+            return True
+        return False
+    
+    def retry_in(self) -> float:
+        """Seconds until an open circuit may move to half-open."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+    
+    def record_success(self) -> None:
+        self.failures = 0
+        self._transition(self.CLOSED, "call succeeded")
+    
+    def record_failure(self, reason: str) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._transition(self.OPEN, reason)
+    
+    def trip(self, reason: str) -> None:
+        """Open the circuit immediately."""
+        self._transition(self.OPEN, reason)
+    
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "transitions": list(self.transitions),
+        }
+
+
+def _redact(value: Any) -> str:
+    """Describe a query parameter by type and size without its value."""
+    if value is None:
+        return "null"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    if isinstance(value, (list, tuple)):
+        return f"list({len(value)})"
+    return type(value).__name__
+
+
+def _is_read_only(query: str) -> bool:
+    """Whether query is a plain SELECT or WITH ... SELECT.
+    
+    Such queries may be re-run by EXPLAIN ANALYZE and sent to the read replica.
+    """
+    text = query.lstrip().lower()
+    if not text.startswith(("select", "with")):
+        return False
+    return not re.search(r"\b(insert|update|delete|merge)\b", text)
+
+
+class SlowQueryLog:
+    """Bounded record of queries that ran longer than a threshold.
+    
+    Parameters are stored redacted. For a sample of slow read-only queries
+    an EXPLAIN (ANALYZE, BUFFERS) is captured in the background on a
+    separate connection to the server that ran the query (primary or
+    replica) and attached to the entry, at most once per explain_cooldown
+    for the same query text on that server.
+    """
+    
+    def __init__(
+        self,
+        threshold_ms: float = 500.0,
+        explain_sample_rate: float = 0.1,
+        capacity: int = 100,
+        explain_cooldown: float = 300.0,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_cooldown = explain_cooldown
+        self.entries: deque[dict] = deque(maxlen=capacity)
+        self.recorded = 0
+        # Runs EXPLAIN for (query, args, server); set by the owning Database
+        self.explain: Optional[Callable[[str, tuple, str], Awaitable[str]]] = None
+        self._explained_at: dict[tuple[str, str], float] = {}
+        self._explain_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+    
+    def observe(self, query: str, args: tuple, duration_ms: float, rows: int, server: str = "primary") -> None:
+        """Record the query if it crossed the threshold; server is where it ran."""
+        if self.threshold_ms <= 0 or duration_ms < self.threshold_ms:
+            return
+        text = " ".join(query.split())
+        entry = {
+            "at": time.time(),
+            "duration_ms": round(duration_ms, 1),
+            "rows": rows,
+            "server": server,
+            "query": text,
+            "params": [_redact(arg) for arg in args],
+            "plan": None,
+            "plan_status": "not_sampled",
+        }
+        self.entries.append(entry)
+        self.recorded += 1
+        logger.warning(f"Slow query ({entry['duration_ms']} ms, {rows} rows): {text[:200]}")
+        
+        if self.explain is None or random.random() >= self.explain_sample_rate:
+            return
+        if not _is_read_only(query):
+            entry["plan_status"] = "not_read_only"
+            return
+        last = self._explained_at.get((server, text))
+        if last is not None and time.monotonic() - last < self.explain_cooldown:
+            entry["plan_status"] = "recently_explained"
+            return
+        self._explained_at[(server, text)] = time.monotonic()
+        entry["plan_status"] = "pending"
+        task = asyncio.create_task(self._capture_plan(entry, query, args, server))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _capture_plan(self, entry: dict, query: str, args: tuple, server: str) -> None:
+        # One EXPLAIN at a time, so a burst of slow queries cannot pile up load
+        async with self._explain_lock:
+            try:
+                entry["plan"] = await self.explain(query, args, server)
+                entry["plan_status"] = "captured"
+            except Exception as e:
+                entry["plan_status"] = f"failed: {type(e).__name__}: {e}"
+                logger.warning(f"EXPLAIN of slow query failed: {type(e).__name__}: {e}")
+    
+    def snapshot(self) -> dict:
+        """Settings and entries, newest first."""
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "recorded": self.recorded,
+            "queries": list(reversed(self.entries)),
+        }
+
+
+# Seconds the replica is behind the primary, given the primary's current WAL
+# position ($1, read just before; NULL if the primary could not be asked).
+# A replica that has replayed up to that position is current, however long
+# ago its last transaction was, so an idle primary does not look like lag.
+# Without the primary's position, a replica counts as current only while its
+# WAL receiver is streaming and everything received has been replayed; a
+# standby cut off from the primary has replayed all it received, but is not
+# current. Otherwise lag is the age of the last replayed transaction, NULL if
+# there is none.
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN $1::text IS NOT NULL THEN
+            CASE WHEN pg_last_wal_replay_lsn() >= $1::text::pg_lsn THEN 0 END
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+            AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+    END::float8 AS lag_seconds,
+    EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8 AS replay_age
+"""
+
+class ReplicaMonitor:
+    """Lag and availability of the read replica, deciding where reads go.
+    
+    Reads go to the replica only while its last lag check succeeded, is
+    recent, and showed lag within max_lag; otherwise they go to the primary.
+    """
+    
+    def __init__(self, max_lag: float = 5.0, check_interval: float = 2.0):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self.available = False
+        self.last_error: Optional[str] = None
+        self.reads = 0
+        self.primary_reads = 0
+        self._checked_at = 0.0
+        self._routing = False
+    
+    def usable(self) -> bool:
+        """Whether a read may go to the replica now."""
+        return (
+            self.available
+            and self.lag is not None
+            and self.lag <= self.max_lag
+            and time.monotonic() - self._checked_at <= 3 * self.check_interval
+        )
+    
+    def record_lag(self, lag: float) -> None:
+        self.lag = lag
+        self.available = True
+        self.last_error = None
+        self._checked_at = time.monotonic()
+        self._log_routing()
+    
+    def record_failure(self, reason: str) -> None:
+        self.available = False
+        self.last_error = reason
+        self._log_routing()
+    
+    def _log_routing(self) -> None:
+        routing = self.usable()
+        if routing == self._routing:
+            return
+        self._routing = routing
+        if routing:
+            logger.info(f"Routing reads to the replica (lag {self.lag:.1f}s)")
+        elif not self.available:
+            logger.warning(f"Routing reads to the primary: replica unavailable ({self.last_error})")
+        else:
+            logger.warning(f"Routing reads to the primary: replica lag {self.lag:.1f}s over {self.max_lag}s")
+    
+    def snapshot(self) -> dict:
+        return {
+            "routing": "replica" if self.usable() else "primary",
+            "available": self.available,
+            "lag_seconds": round(self.lag, 3) if self.lag is not None else None,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self.last_error,
+            "replica_reads": self.reads,
+            "primary_reads": self.primary_reads,
+        }
+
+
+class DatabaseUnavailable(Exception):
+    """A strict query could not be answered: the circuit is open or the query failed."""
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """Whether exc means the database is unreachable rather than a bad query."""
+    import asyncpg
+    
+    return isinstance(exc, (
+        OSError,
+        asyncio.TimeoutError,
+        asyncpg.PostgresConnectionError,
+        asyncpg.InterfaceError,
+        asyncpg.CannotConnectNowError,
+    ))
+
+
+# Shortest pause between background reconnect attempts, in seconds
+RECONNECT_MIN_INTERVAL = 1.0
+
 
 class Database:
     """Async database connection pool manager."""
     
-    def __init__(self, database_url: Optional[str] = None):
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        replica_url: Optional[str] = None,
+    ):
         self.database_url = database_url or os.environ.get("DATABASE_URL", "")
-        self._pool: Optional[asyncpg.Pool] = None
+        self.replica_url = replica_url or os.environ.get("DATABASE_REPLICA_URL", "")
+        self._pool: Optional["asyncpg.Pool"] = None
+        self._replica_pool: Optional["asyncpg.Pool"] = None
+        self._replica_task: Optional[asyncio.Task] = None
+        self.replica = ReplicaMonitor()
+        self._flights = SingleFlight()
+        self._breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self.slow_queries = SlowQueryLog()
+        self.slow_queries.explain = self._explain
     
-    async def connect(self) -> None:
-        """Create connection pool using PG* env vars or database_url.
-        
-        Retries up to 3 times with exponential backoff if PG is temporarily unavailable.
-        """
-        import asyncio
-        
+    def _has_config(self) -> bool:
+        return bool(
+            (os.environ.get("PGHOST") and os.environ.get("PGUSER") and os.environ.get("PGDATABASE"))
+            or self.database_url
+        )
+    
+    def _connect_args(self) -> dict:
+        """Connection settings from PG* env vars, else database_url."""
         pg_host = os.environ.get("PGHOST", "")
         pg_user = os.environ.get("PGUSER", "")
         pg_password = os.environ.get("PGPASSWORD", "")
         pg_database = os.environ.get("PGDATABASE", "")
         pg_port = int(os.environ.get("PGPORT", "5432"))
         
-        if not (pg_host and pg_user and pg_database) and not self.database_url:
+        if pg_host and pg_user and pg_database:
+            return {
+                "host": pg_host, "port": pg_port, "user": pg_user,
+                "password": pg_password, "database": pg_database,
+                "ssl": "require", "command_timeout": 30, "timeout": 15,
+            }
+        return {"dsn": self.database_url}
+    
+    async def _create_pool(self) -> "asyncpg.Pool":
+        """Make a single attempt at creating the pool."""
+        # Deferred so importing this module stays cheap at process start
+        import asyncpg
+        
+        args = self._connect_args()
+        if "dsn" in args:
+            return await asyncpg.create_pool(args["dsn"], min_size=1, max_size=10)
+        return await asyncpg.create_pool(**args, min_size=1, max_size=5)
+    
+    async def _create_replica_pool(self) -> "asyncpg.Pool":
+        import asyncpg
+        
+        return await asyncpg.create_pool(self.replica_url, min_size=1, max_size=10, timeout=5)
+    
+    async def _explain(self, query: str, args: tuple, server: str = "primary") -> str:
+        """EXPLAIN (ANALYZE, BUFFERS) a query on its own short-lived connection.
+        
+        Runs on the server that served the query, so the plan and buffer
+        counts are the ones it actually saw. Kept off the pools so plan
+        capture never takes a connection from request traffic; runs
+        read-only with a statement timeout.
+        """
+        import asyncpg
+        
+        settings = {"statement_timeout": "15000"}
+        if server == "replica":
+            conn = await asyncpg.connect(self.replica_url, server_settings=settings)
+        else:
+            conn = await asyncpg.connect(**self._connect_args(), server_settings=settings)
+        try:
+            async with conn.transaction(readonly=True):
+                rows = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {query}", *args)
+            return "\n".join(row[0] for row in rows)
+        finally:
+            await conn.close()
+    
+    async def connect(self) -> None:
+        """Create connection pool using PG* env vars or database_url.
+        
+        Retries up to 3 times with exponential backoff if PG is temporarily unavailable.
+        """
+        if not self._has_config():
             logger.warning("No database configuration found, skipping connection")
             return
         
+        self._start_replica_watch()
         for attempt in range(3):
             try:
-                if pg_host and pg_user and pg_database:
-                    self._pool = await asyncpg.create_pool(
-                        host=pg_host, port=pg_port, user=pg_user,
-                        password=pg_password, database=pg_database,
-                        ssl="require", min_size=1, max_size=5,
-                        command_timeout=30, timeout=15,
-                    )
-                else:
-                    self._pool = await asyncpg.create_pool(
-                        self.database_url, min_size=1, max_size=10
-                    )
+                self._pool = await self._create_pool()
+                self._breaker.record_success()
                 logger.info("Database pool created successfully")
                 return
             except Exception as e:
@@ -56,67 +477,278 @@ class Database:
                 if attempt < 2:
                     await asyncio.sleep(2 ** attempt)
         logger.error("All DB connection attempts failed; pool is None")
+        self._breaker.trip("initial connection failed")
+    
+    def _start_replica_watch(self) -> None:
+        if self.replica_url and (self._replica_task is None or self._replica_task.done()):
+            self._replica_task = asyncio.create_task(self._watch_replica())
+    
+    async def _watch_replica(self) -> None:
+        """Keep the replica pool open and its lag current, once per check_interval."""
+        while True:
+            try:
+                if self._replica_pool is None:
+                    self._replica_pool = await self._create_replica_pool()
+                    logger.info("Replica pool created")
+                await self._check_replica()
+            except Exception as e:
+                self.replica.record_failure(f"{type(e).__name__}: {e}")
+            await asyncio.sleep(self.replica.check_interval)
+    
+    async def _check_replica(self) -> None:
+        """Measure replica lag against the primary's current WAL position."""
+        primary_lsn = None
+        if self._pool is not None:
+            try:
+                primary_lsn = await self._pool.fetchval("SELECT pg_current_wal_lsn()::text", timeout=5)
+            except Exception as e:
+                logger.debug("Primary WAL position unavailable: %s", e)
+        row = await self._replica_pool.fetchrow(REPLICA_LAG_QUERY, primary_lsn, timeout=5)
+        lag = row["lag_seconds"] if row["lag_seconds"] is not None else row["replay_age"]
+        if lag is None:
+            self.replica.record_failure("replica has not replayed any transaction from the primary")
+        else:
+            self.replica.record_lag(lag)
+    
+    async def _reconnect_loop(self) -> None:
+        """Recreate the pool in the background, one attempt per reset_timeout.
+        
+        Attempts are at least RECONNECT_MIN_INTERVAL apart, so a zero
+        reset_timeout does not turn the loop into a busy retry.
+        """
+        delay = self._breaker.retry_in()
+        while self._pool is None:
+            await asyncio.sleep(delay)
+            if self._breaker.allow():
+                try:
+                    self._pool = await self._create_pool()
+                    self._breaker.record_success()
+                    logger.info("Database pool re-created by background reconnect")
+                except Exception as e:
+                    self._breaker.record_failure(f"reconnect failed: {type(e).__name__}: {e}")
+            delay = max(self._breaker.retry_in(), RECONNECT_MIN_INTERVAL)
+    
+    def _start_reconnect(self) -> None:
+        """Start the background reconnect task unless one is already running."""
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop())
     
     async def disconnect(self) -> None:
-        """Close connection pool."""
+        """Close connection pool, stopping the background tasks first."""
+        for task in (self._reconnect_task, self._replica_task):
+            if task:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        self._reconnect_task = None
+        self._replica_task = None
+        if self._replica_pool:
+            await self._replica_pool.close()
+            self._replica_pool = None
+            self.replica.record_failure("disconnected")
         if self._pool:
             await self._pool.close()
             self._pool = None
             logger.info("Database pool closed")
     
     @asynccontextmanager
-    async def acquire(self) -> AsyncGenerator[asyncpg.Connection, None]:
+    async def acquire(self) -> AsyncGenerator["asyncpg.Connection", None]:
         """Acquire a connection from the pool."""
         if not self._pool:
             raise RuntimeError("Database not connected")
         async with self._pool.acquire() as conn:
             yield conn
     
+    async def fill_pool(self) -> int:
+        """Open the pool's minimum connections up front.
+        
+        Holds min_size connections at once so each is distinct and fully
+        established (TLS, auth, type introspection) before traffic arrives.
+        
+        Returns:
+            Number of connections warmed
+        """
+        if not self._pool:
+            return 0
+        size = self._pool.get_min_size()
+        all_held = asyncio.Event()
+        warmed = 0
+        
+        async def touch() -> None:
+            nonlocal warmed
+            try:
+                async with self._pool.acquire() as conn:
+                    await conn.fetchval("SELECT 1")
+                    warmed += 1
+                    if warmed == size:
+                        all_held.set()
+                    # Keep holding until every task has its own connection
+                    await all_held.wait()
+            finally:
+                all_held.set()
+        
+        await asyncio.gather(*(touch() for _ in range(size)))
+        return warmed
+    
     async def ensure_connected(self) -> bool:
-        """Try to connect if not already connected."""
-        if self._pool is not None:
+        """Check whether a query may run now, without blocking on reconnects.
+        
+        While the circuit is open this returns False immediately. A missing
+        pool opens the circuit and hands reconnection to a single background
+        task instead of retrying inline.
+        """
+        if self._pool is None:
+            if self._has_config():
+                if self._breaker.state == CircuitBreaker.CLOSED:
+                    self._breaker.trip("no connection pool")
+                self._start_reconnect()
+            return False
+        return self._breaker.allow()
+    
+    def _record_error(self, e: Exception) -> None:
+        if _is_connection_error(e):
+            self._breaker.record_failure(f"{type(e).__name__}: {e}")
+        else:
+            # The server answered, so the connection itself is healthy
+            self._breaker.record_success()
+
+    def _use_replica(self, query: str, primary: bool) -> bool:
+        """Whether to send query to the replica, counting reads it cannot take."""
+        if primary or self._replica_pool is None or not _is_read_only(query):
+            return False
+        if self.replica.usable():
             return True
+        self.replica.primary_reads += 1
+        return False
+    
+    async def _on_replica(self, method: str, query: str, args: tuple) -> tuple[bool, Any]:
+        """Run conn.<method>(query) on the replica.
+        
+        Returns:
+            (served, result); served is False if the query should be retried
+            on the primary
+        """
         try:
-            await self.connect()
-        except Exception:
-            pass
-        return self._pool is not None
-
-    async def fetch_all(self, query: str, *args: Any) -> list[dict]:
-        """Execute query and return all rows as dicts."""
-        if not self._pool:
-            await self.ensure_connected()
-        if not self._pool:
-            logger.warning("Database pool not available, returning empty list")
-            return []
+            async with self._replica_pool.acquire() as conn:
+                start = time.perf_counter()
+                result = await getattr(conn, method)(query, *args)
+                duration_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            # Also covers recovery conflicts and writes hidden in a SELECT
+            if _is_connection_error(e):
+                self.replica.record_failure(f"{type(e).__name__}: {e}")
+            logger.warning(f"Replica query failed, retrying on the primary: {type(e).__name__}: {e}")
+            self.replica.primary_reads += 1
+            return False, None
+        self.replica.reads += 1
+        rows = len(result) if method == "fetch" else (1 if result else 0)
+        self.slow_queries.observe(query, args, duration_ms, rows, server="replica")
+        return True, result
+    
+    async def fetch_all(self, query: str, *args: Any, primary: bool = False, strict: bool = False) -> list[dict]:
+        """Execute query and return all rows as dicts.
+        
+        Identical concurrent queries share one round trip to the database;
+        each caller still gets its own copy of the rows. Read-only queries go
+        to the read replica while it is within the lag bound, unless primary
+        is set.
+        
+        Failures are logged and return an empty list, so tools degrade to
+        "nothing found"; callers that must not mistake an outage for an empty
+        table pass strict=True to get DatabaseUnavailable instead.
+        """
+        async def run() -> list[dict]:
+            if self._use_replica(query, primary):
+                served, rows = await self._on_replica("fetch", query, args)
+                if served:
+                    return [dict(row) for row in rows]
+            if strict:
+                return [dict(row) for row in await self._run("fetch", query, args)]
+            return await self._fetch_all(query, *args)
+        
+        rows = await self._flights.do(("all", primary, strict, query, repr(args)), run)
+        _count_rows(len(rows))
+        # Coalesced callers share one result; copy it so a caller that
+        # edits its rows cannot change another caller's
+        return [dict(row) for row in rows]
+    
+    async def _run(self, method: str, query: str, args: tuple) -> Any:
+        """Run conn.<method>(query) on the primary.
+        
+        Raises:
+            DatabaseUnavailable: If the circuit is open or the query failed
+        """
+        if not await self.ensure_connected():
+            logger.warning(f"Database unavailable (circuit {self._breaker.state})")
+            raise DatabaseUnavailable(f"database circuit {self._breaker.state}")
         try:
             async with self.acquire() as conn:
-                rows = await conn.fetch(query, *args)
-                logger.debug(f"Query returned {len(rows)} rows")
-                return [dict(row) for row in rows]
+                start = time.perf_counter()
+                result = await getattr(conn, method)(query, *args)
+                duration_ms = (time.perf_counter() - start) * 1000
         except Exception as e:
             logger.error(f"Database query failed: {e}")
-            return []
+            self._record_error(e)
+            raise DatabaseUnavailable(f"{type(e).__name__}: {e}") from e
+        rows = len(result) if method == "fetch" else (1 if result else 0)
+        logger.debug("Query returned %d rows", rows)
+        self._breaker.record_success()
+        self.slow_queries.observe(query, args, duration_ms, rows)
+        return result
     
-    async def fetch_one(self, query: str, *args: Any) -> Optional[dict]:
-        """Execute query and return one row as dict."""
-        if not self._pool:
-            await self.ensure_connected()
-        if not self._pool:
-            logger.warning("Database pool not available, returning None")
-            return None
+    async def _fetch_all(self, query: str, *args: Any) -> list[dict]:
         try:
-            async with self.acquire() as conn:
-                row = await conn.fetchrow(query, *args)
+            rows = await self._run("fetch", query, args)
+        except DatabaseUnavailable:
+            return []
+        return [dict(row) for row in rows]
+    
+    async def fetch_one(self, query: str, *args: Any, primary: bool = False, strict: bool = False) -> Optional[dict]:
+        """Execute query and return one row as dict.
+        
+        Identical concurrent queries share one round trip to the database.
+        Routed to the replica, and failures handled, like fetch_all.
+        """
+        async def run() -> Optional[dict]:
+            if self._use_replica(query, primary):
+                served, row = await self._on_replica("fetchrow", query, args)
+                if served:
+                    return dict(row) if row else None
+            if strict:
+                row = await self._run("fetchrow", query, args)
                 return dict(row) if row else None
-        except Exception as e:
-            logger.error(f"Database query failed: {e}")
+            return await self._fetch_one(query, *args)
+        
+        row = await self._flights.do(("one", primary, strict, query, repr(args)), run)
+        _count_rows(1 if row else 0)
+        return dict(row) if row else None
+    
+    async def _fetch_one(self, query: str, *args: Any) -> Optional[dict]:
+        try:
+            row = await self._run("fetchrow", query, args)
+        except DatabaseUnavailable:
             return None
+        return dict(row) if row else None
     
     @property
     def is_connected(self) -> bool:
         """Check if database pool is available."""
         return self._pool is not None
+    
+    @property
+    def circuit(self) -> dict:
+        """Circuit breaker state and recent transitions."""
+        return self._breaker.snapshot()
+    
+    @property
+    def replica_status(self) -> Optional[dict]:
+        """Replica routing state, or None without a replica configured."""
+        return self.replica.snapshot() if self.replica_url else None
+    
+    @property
+    def coalesced_queries(self) -> int:
+        """Number of queries answered by joining an identical in-flight query."""
+        return self._flights.coalesced
 
 
 # Global database instance
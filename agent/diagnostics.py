@@ -0,0 +1,179 @@
+"""In-process profiling and event-loop lag monitoring.
+
+Everything here runs on demand or in the background of a live replica, so
+a p99 spike can be investigated where it happens:
+
+- sample_stacks() samples one thread's stack from a helper thread and
+  returns collapsed stacks ("outer;inner;leaf count"), ready for a flame
+  graph tool
+- profile_loop() runs cProfile on the event loop thread for a while
+- LoopLagMonitor measures how late the loop runs a timer and, from a
+  watchdog thread, logs the stack of whatever is holding the loop when it
+  stalls
+"""
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the scheduling delay histogram buckets
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _collapse(frame) -> str:
+    """One stack as "outer;...;leaf", each frame as function (file:line)."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float = 0.005) -> Counter:
+    """Sample a thread's stack every interval seconds for the given duration.
+
+    Call from a different thread than the one being sampled.
+
+    Returns:
+        Collapsed stack -> number of samples it was seen in
+    """
+    counts: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            counts[_collapse(frame)] += 1
+        del frame
+        time.sleep(interval)
+    return counts
+
+
+async def profile_loop(seconds: float, limit: int = 60) -> str:
+    """cProfile everything the event loop thread runs for the given duration.
+
+    Returns:
+        pstats report sorted by cumulative time
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+class LoopLagMonitor:
+    """Scheduling delay histogram and stall detection for the running loop."""
+
+    def __init__(self, interval: float = 0.05, stall_threshold_ms: float = 100.0):
+        self.interval = interval
+        self.stall_threshold_ms = stall_threshold_ms
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.stalls = 0
+        self.last_stall: Optional[dict] = None
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start measuring on the running loop, with a watchdog thread for stalls."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    def record(self, lag_ms: float) -> None:
+        """Add one scheduling delay sample."""
+        bucket = next((i for i, bound in enumerate(LAG_BUCKETS_MS) if lag_ms <= bound), len(LAG_BUCKETS_MS))
+        self.histogram[bucket] += 1
+        self.samples += 1
+        self.total_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            self.record(max(now - expected, 0.0) * 1000)
+
+    def _watch(self) -> None:
+        """Watchdog thread: capture the loop's stack once per stall."""
+        limit = self.interval + self.stall_threshold_ms / 1000
+        reported_beat = None
+        while not self._stop.wait(min(limit / 2, 0.05)):
+            beat = self._beat
+            stalled_for = time.monotonic() - beat
+            if stalled_for <= limit or beat == reported_beat:
+                continue
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            del frame
+            self.stalls += 1
+            self.last_stall = {
+                "blocked_ms": round((stalled_for - self.interval) * 1000, 1),
+                "at": time.time(),
+                "stack": stack,
+            }
+            logger.warning(
+                f"Event loop blocked for over {self.last_stall['blocked_ms']} ms; loop thread stack:\n{stack}"
+            )
+
+    def snapshot(self, include_stack: bool = False) -> dict:
+        """Histogram and stall counts; the last stall's stack only if asked for."""
+        labels = [f"<={bound}ms" for bound in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+        last_stall = self.last_stall
+        if last_stall is not None and not include_stack:
+            last_stall = {k: v for k, v in last_stall.items() if k != "stack"}
+        return {
+            "samples": self.samples,
+            "mean_lag_ms": round(self.total_ms / self.samples, 2) if self.samples else None,
+            "max_lag_ms": round(self.max_ms, 1),
+            "histogram": dict(zip(labels, self.histogram)),
+            "stalls": self.stalls,
+            "last_stall": last_stall,
+        }
+
+
+# Global monitor, started with the service
+loop_monitor = LoopLagMonitor(stall_threshold_ms=config.loop_stall_threshold_ms)
@@ -2,15 +2,24 @@
 
 This service provides an AI-powered chat interface for querying team skills.
 """
+import time
+
+_import_start = time.perf_counter()
+
+import asyncio
+import hmac
 import json
 import logging
+import threading
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from limits import parse as parse_limit
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
@@ -19,12 +28,39 @@ from sse_starlette.sse import EventSourceResponse
 from config import config
 from db import db
 from agent import skills_agent
+from diagnostics import loop_monitor, profile_loop, sample_stacks
+from skill_index import skill_index
+from tool_tracking import SharedToolCalls
+from structured_logging import configure_logging, dropped_records, parse_sample_rates
+from warmup import warmup
 
-logging.basicConfig(level=logging.INFO)
+configure_logging(
+    level=config.log_level,
+    json_format=config.log_format.lower() == "json",
+    sample_rates=parse_sample_rates(config.log_sample_rates),
+)
 logger = logging.getLogger(__name__)
 
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
+# /chat/batch charges this per message itself, once it knows the count
+_batch_rate_limit = parse_limit(config.rate_limit)
+
+
+# Startup phase durations in milliseconds, filled in by lifespan()
+startup_timings: dict[str, float] = {
+    "imports": round((time.perf_counter() - _import_start) * 1000, 1),
+}
+
+
+@asynccontextmanager
+async def _timed_phase(name: str):
+    """Record how long a startup phase takes in startup_timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round((time.perf_counter() - start) * 1000, 1)
 
 
 class ChatRequest(BaseModel):
@@ -39,31 +75,69 @@ class ChatResponse(BaseModel):
     conversation_id: Optional[str] = None
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Manage application lifecycle."""
-    logger.info("Starting agent service...")
-    logger.info(f"Azure OpenAI Endpoint: {config.azure_openai_endpoint or 'Not configured'}")
-    
-    # Connect to database
-    if config.database_url:
+class BatchChatRequest(BaseModel):
+    """Request model for batch chat endpoint."""
+    messages: list[str]
+
+
+async def _connect_database() -> None:
+    """Connect the database pool, logging rather than raising on failure."""
+    async with _timed_phase("database"):
         db.database_url = config.database_url
+        db.replica_url = config.replica_database_url
+        db.replica.max_lag = config.replica_max_lag_seconds
+        db.replica.check_interval = config.replica_check_interval
+        db.slow_queries.threshold_ms = config.slow_query_ms
+        db.slow_queries.explain_sample_rate = config.slow_query_explain_rate
         try:
             await db.connect()
             logger.info("Database connected")
         except Exception as e:
             logger.warning(f"Database connection failed: {e}")
+
+
+async def _load_skill_snapshot() -> None:
+    """Serve the skill index from the last snapshot until it catches up with the database."""
+    async with _timed_phase("snapshot"):
+        skill_index.snapshot_path = config.skill_snapshot_path
+        skill_index.load_snapshot(config.skill_snapshot_path)
+
+
+async def _initialize_agent() -> None:
+    """Initialize the AI agent, logging rather than raising on failure."""
+    async with _timed_phase("agent"):
+        try:
+            await skills_agent.initialize()
+            logger.info(f"Agent available: {skills_agent.is_available}")
+        except Exception as e:
+            logger.warning(f"Agent initialization failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage application lifecycle."""
+    logger.info("Starting agent service...")
+    logger.info(f"Azure OpenAI Endpoint: {config.azure_openai_endpoint or 'Not configured'}")
     
-    # Initialize AI agent
-    try:
-        await skills_agent.initialize()
-        logger.info(f"Agent available: {skills_agent.is_available}")
-    except Exception as e:
-        logger.warning(f"Agent initialization failed: {e}")
+    # Database, agent and skill snapshot are independent, so bring them up concurrently
+    async with _timed_phase("total"):
+        startup = [_initialize_agent()]
+        if config.database_url:
+            startup.append(_connect_database())
+        if config.skill_snapshot_path:
+            startup.append(_load_skill_snapshot())
+        await asyncio.gather(*startup)
+    logger.info(f"Startup timings (ms): {startup_timings}")
+    
+    # Warm up in the background; /ready flips once it finishes
+    warmup_task = asyncio.create_task(warmup.run())
+    loop_monitor.start()
     
     yield
     
     # Cleanup
+    warmup_task.cancel()
+    await loop_monitor.stop()
     await skills_agent.cleanup()
     await db.disconnect()
     logger.info("Shutting down agent service...")
@@ -112,7 +186,29 @@ async def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "service": "agent",
         "database_connected": db.is_connected,
+        "database_circuit": db.circuit,
+        "database_replica": db.replica_status,
+        "coalesced_queries": db.coalesced_queries,
+        "startup_ms": startup_timings,
+        "event_loop": loop_monitor.snapshot(),
+        "log_records_dropped": dropped_records(),
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 200 only once warm-up has finished and dependencies are up."""
+    body = {
+        "status": "ready" if warmup.is_ready else "not_ready",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "checks": warmup.checks(),
+        "warmup": {
+            "state": warmup.state,
+            "duration_ms": warmup.duration_ms,
+            "steps": warmup.steps,
+        },
     }
+    return JSONResponse(content=body, status_code=200 if warmup.is_ready else 503)
 
 
 @app.get("/")
@@ -156,8 +252,10 @@ async def chat_stream(chat_request: ChatRequest, request: Request):
     """Streaming chat endpoint using Server-Sent Events.
     
     Send a message and receive streaming response with:
+    - tool_start: A tool call began (name, call_id)
+    - tool_end: A tool call finished (name, call_id, duration_ms, rows, error)
     - content: Response text chunks
-    - done: Stream complete
+    - done: Stream complete (time_to_first_token_ms, total_ms, tool_calls)
     - error: If something went wrong
     """
     if not skills_agent.is_available:
@@ -187,6 +285,79 @@ async def chat_stream(chat_request: ChatRequest, request: Request):
     return EventSourceResponse(event_generator())
 
 
+@app.post("/chat/batch")
+async def chat_batch(batch_request: BatchChatRequest, request: Request):
+    """Batch chat endpoint streaming newline-delimited JSON.
+    
+    Each message counts as one request against config.rate_limit, charged
+    once the batch has been validated, so a batch costs the same as sending
+    its messages to /chat one at a time.
+    Runs up to batch_concurrency questions at a time. Identical tool calls
+    across the batch are made once. One line is written per question as it
+    finishes, in completion order:
+    - result: index (position in messages), message, response, duration_ms
+    - done: count, total_ms, tool_calls, shared_tool_calls
+    """
+    if not skills_agent.is_available:
+        raise HTTPException(
+            status_code=503,
+            detail="Agent service is not available. Check Azure OpenAI configuration."
+        )
+    
+    messages = batch_request.messages
+    if not messages or any(not message.strip() for message in messages):
+        raise HTTPException(status_code=400, detail="Messages cannot be empty")
+    if len(messages) > config.batch_max_messages:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.batch_max_messages} messages per batch",
+        )
+    if limiter.enabled and not limiter.limiter.hit(
+        _batch_rate_limit, "chat_batch", get_remote_address(request), cost=len(messages)
+    ):
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded: {config.rate_limit}, counting each message in the batch",
+        )
+    
+    shared = SharedToolCalls()
+    semaphore = asyncio.Semaphore(max(config.batch_concurrency, 1))
+    
+    async def answer(index: int, message: str) -> dict:
+        shared.install()
+        async with semaphore:
+            start = time.perf_counter()
+            response = await skills_agent.run(message)
+        return {
+            "type": "result",
+            "index": index,
+            "message": message,
+            "response": response,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+    
+    async def results():
+        """Write each answer as soon as it is ready."""
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(answer(i, message)) for i, message in enumerate(messages)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+            yield json.dumps({
+                "type": "done",
+                "count": len(messages),
+                "total_ms": round((time.perf_counter() - start) * 1000, 1),
+                "tool_calls": shared.calls,
+                "shared_tool_calls": shared.shared,
+            }) + "\n"
+        finally:
+            # Client went away: stop the questions still waiting or running
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @app.get("/agent/status")
 async def agent_status():
     """Check agent status and capabilities."""
@@ -198,10 +369,76 @@ async def agent_status():
             "get_team_skill_gaps", 
             "get_skill_summary",
             "list_all_skills",
+            "build_team",
+            "find_similar_colleagues",
+            "recommend_next_skills",
+            "get_skill_trends",
         ] if skills_agent.is_available else [],
+        "token": skills_agent.token_metrics,
+        "catalog_version": skills_agent.catalog_version,
+        "deployments": skills_agent.deployment_stats,
     }
 
 
+# One profile at a time: cProfile cannot nest and samples would overlap
+_profile_lock = asyncio.Lock()
+
+
+def _require_debug() -> None:
+    """Debug endpoints do not exist in production."""
+    if config.is_production:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    mode: str = Query("sample", pattern="^(sample|cprofile)$"),
+):
+    """Profile the event loop thread for the given number of seconds.
+    
+    - sample: collapsed stacks ("frame;frame;frame count"), for flame graphs
+    - cprofile: pstats report sorted by cumulative time
+    """
+    _require_debug()
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        if mode == "cprofile":
+            return await profile_loop(seconds)
+        stacks = await asyncio.to_thread(sample_stacks, threading.get_ident(), seconds)
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+@app.get("/debug/loop")
+async def debug_loop():
+    """Event-loop scheduling delay histogram and the stack of the last stall."""
+    _require_debug()
+    return loop_monitor.snapshot(include_stack=True)
+
+
+def _require_admin(request: Request) -> None:
+    """Admin endpoints need the admin token when one is set, and one must be set in production."""
+    if config.admin_token:
+        token = request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(token.encode(), config.admin_token.encode()):
+            raise HTTPException(status_code=401, detail="Admin token required")
+    elif config.is_production:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/admin/slow-queries")
+async def admin_slow_queries(request: Request):
+    """Recent queries slower than slow_query_ms, newest first.
+    
+    Parameters are shown only by type and size. Sampled entries carry an
+    EXPLAIN (ANALYZE, BUFFERS) plan once it has been captured.
+    """
+    _require_admin(request)
+    return db.slow_queries.snapshot()
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=config.host, port=config.port)
+    # Keep the logging pipeline set up above instead of uvicorn's defaults
+    uvicorn.run(app, host=config.host, port=config.port, log_config=None)
@@ -0,0 +1,246 @@
+"""Routing agent runs across several Azure OpenAI deployments.
+
+Deployments are tried in order of their recent first-token latency. A
+streaming run is hedged: if the chosen deployment has produced nothing after
+hedge_after_ms, the next one is started too, the first to produce output
+wins, and the other is cancelled. Throttling (429), server errors (5xx) and
+connection failures fail over to the next deployment and put the failing
+one on a short cooldown.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Weight of the newest sample in the first-token moving average
+EWMA_ALPHA = 0.2
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status behind an SDK exception, following wrapped causes."""
+    seen = 0
+    while exc is not None and seen < 5:
+        status = getattr(exc, "status_code", None)
+        if status is None:
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status
+        exc = exc.__cause__ or exc.__context__ or getattr(exc, "inner_exception", None)
+        seen += 1
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether another deployment may succeed where this one failed."""
+    status = _status_code(exc)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    names = {type(e).__name__ for e in (exc, exc.__cause__, exc.__context__) if e is not None}
+    return bool(names & {"APIConnectionError", "APITimeoutError"}) or isinstance(
+        exc, (ConnectionError, asyncio.TimeoutError)
+    )
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on the failed response, if any."""
+    while exc is not None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+        if headers and headers.get("retry-after"):
+            try:
+                return float(headers["retry-after"])
+            except ValueError:
+                return None
+        exc = exc.__cause__
+    return None
+
+
+class DeploymentStats:
+    """Latency and failure history for one deployment."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.first_token_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.cooldown_until = 0.0
+
+    def record_first_token(self, ms: float) -> None:
+        if self.first_token_ms is None:
+            self.first_token_ms = ms
+        else:
+            self.first_token_ms = round(EWMA_ALPHA * ms + (1 - EWMA_ALPHA) * self.first_token_ms, 1)
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "first_token_ms": self.first_token_ms,
+            "cooling_down": self.cooling_down,
+            "last_error": self.last_error,
+        }
+
+
+class ModelRouter:
+    """Chooses, hedges and fails over between deployments."""
+
+    def __init__(self, hedge_after_ms: float = 2500.0, cooldown: float = 30.0):
+        self.hedge_after_ms = hedge_after_ms
+        self.cooldown = cooldown
+        self.stats: dict[str, DeploymentStats] = {}
+
+    def _stats(self, name: str) -> DeploymentStats:
+        if name not in self.stats:
+            self.stats[name] = DeploymentStats(name)
+        return self.stats[name]
+
+    def ranked(self, names: Iterable[str]) -> list[str]:
+        """Deployments best first: available before cooling down, then fastest.
+
+        A deployment without samples ranks as fastest so it gets measured;
+        ties keep the configured order.
+        """
+        names = list(dict.fromkeys(names))
+        return sorted(
+            names,
+            key=lambda n: (
+                self._stats(n).cooling_down,
+                self._stats(n).first_token_ms or 0.0,
+                names.index(n),
+            ),
+        )
+
+    def _record_failure(self, name: str, exc: BaseException) -> None:
+        stats = self._stats(name)
+        stats.failures += 1
+        stats.last_error = f"{type(exc).__name__}: {exc}"[:200]
+        if is_retryable(exc):
+            stats.cooldown_until = time.monotonic() + (_retry_after(exc) or self.cooldown)
+            logger.warning(f"Deployment '{name}' failed ({stats.last_error}); failing over")
+
+    async def call(self, names: Iterable[str], run: Callable[[str], Awaitable[T]]) -> T:
+        """Run a non-streaming request, failing over on retryable errors."""
+        last_error: Optional[BaseException] = None
+        for name in self.ranked(names):
+            self._stats(name).requests += 1
+            try:
+                return await run(name)
+            except Exception as e:
+                self._record_failure(name, e)
+                if not is_retryable(e):
+                    raise
+                last_error = e
+        raise last_error or RuntimeError("No model deployment configured")
+
+    async def stream(
+        self,
+        names: Iterable[str],
+        open_stream: Callable[[str], AsyncIterator[Any]],
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Stream from the first deployment to produce output.
+
+        Yields:
+            (deployment name, update) for every update of the winning stream
+        """
+        candidates = deque(self.ranked(names))
+        # first-update task -> (deployment, iterator, start time)
+        racers: dict[asyncio.Task, tuple[str, AsyncIterator[Any], float]] = {}
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            name = candidates.popleft()
+            iterator = open_stream(name).__aiter__()
+            self._stats(name).requests += 1
+            racers[asyncio.ensure_future(iterator.__anext__())] = (name, iterator, time.perf_counter())
+
+        if not candidates:
+            raise RuntimeError("No model deployment configured")
+        launch()
+        try:
+            while racers:
+                can_hedge = not hedged and candidates and len(racers) == 1 and self.hedge_after_ms > 0
+                done, _ = await asyncio.wait(
+                    racers,
+                    timeout=self.hedge_after_ms / 1000 if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    hedged = True
+                    self._stats(candidates[0]).hedges += 1
+                    logger.info(f"No output after {self.hedge_after_ms} ms; hedging to '{candidates[0]}'")
+                    launch()
+                    continue
+
+                for task in done:
+                    name, iterator, started = racers.pop(task)
+                    try:
+                        first = task.result()
+                        finished = False
+                    except StopAsyncIteration:
+                        first, finished = None, True
+                    except Exception as e:
+                        self._record_failure(name, e)
+                        if not is_retryable(e):
+                            raise
+                        last_error = e
+                        if not racers and candidates:
+                            launch()
+                        continue
+
+                    stats = self._stats(name)
+                    stats.record_first_token(round((time.perf_counter() - started) * 1000, 1))
+                    if hedged:
+                        stats.hedge_wins += 1
+                    # A loser took at least this long; counting that keeps a
+                    # deployment that always loses from staying ranked first
+                    for loser, _, loser_started in racers.values():
+                        self._stats(loser).record_first_token(round((time.perf_counter() - loser_started) * 1000, 1))
+                    await self._cancel(racers)
+                    if finished:
+                        return
+                    yield name, first
+                    try:
+                        async for update in iterator:
+                            yield name, update
+                    except Exception as e:
+                        self._record_failure(name, e)
+                        raise
+                    return
+            raise last_error or RuntimeError("No model deployment available")
+        finally:
+            await self._cancel(racers)
+
+    @staticmethod
+    async def _cancel(racers: dict[asyncio.Task, tuple[str, AsyncIterator[Any], float]]) -> None:
+        """Cancel losing streams and close them so their connections are released."""
+        tasks = list(racers)
+        iterators = [iterator for _, iterator, _ in racers.values()]
+        racers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for iterator in iterators:
+            close = getattr(iterator, "aclose", None)
+            if close:
+                try:
+                    await close()
+                except Exception:
+                    pass
+
+    def snapshot(self) -> dict[str, dict]:
+        """Per-deployment stats for status endpoints."""
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
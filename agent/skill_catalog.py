@@ -0,0 +1,74 @@
+"""Skill names by category, rendered once for the agent's system prompt.
+
+With the catalog in the prompt the model already knows the vocabulary and
+does not need a list_all_skills round trip before its first real tool call.
+The text is rebuilt from the skill index, but only replaced when its
+content changes, so the prompt prefix stays byte-identical between catalog
+changes and the provider's prompt cache keeps hitting.
+"""
+import hashlib
+import logging
+from typing import Optional
+
+from skill_index import SkillIndex, skill_index
+
+logger = logging.getLogger(__name__)
+
+# Above this many skills the catalog costs more prompt than the round trip it saves
+MAX_PROMPT_SKILLS = 600
+
+
+def render_catalog(skills: dict[int, dict]) -> str:
+    """Catalog lines for the given skills, in a canonical order.
+
+    Ordering depends only on names and categories, never on IDs or load
+    order, so the same catalog always renders to the same bytes.
+    """
+    by_category: dict[str, set[str]] = {}
+    for skill in skills.values():
+        by_category.setdefault(skill.get("category") or "Uncategorized", set()).add(skill["name"])
+    categories = sorted(by_category, key=lambda c: (c == "Uncategorized", c.casefold(), c))
+    return "\n".join(
+        f"- {category}: " + ", ".join(sorted(by_category[category], key=lambda n: (n.casefold(), n)))
+        for category in categories
+    )
+
+
+class SkillCatalog:
+    """Versioned prompt catalog, kept in step with the skill index."""
+
+    def __init__(self, max_skills: int = MAX_PROMPT_SKILLS):
+        self.max_skills = max_skills
+        self.body = ""
+        self.version: Optional[str] = None
+        self.rebuilds = 0
+
+    def rebuild(self, index: SkillIndex) -> None:
+        """Re-render from the index, keeping the current text if nothing changed."""
+        body = render_catalog(index.skills) if 0 < len(index.skills) <= self.max_skills else ""
+        if body == self.body:
+            return
+        self.body = body
+        self.version = hashlib.sha256(body.encode()).hexdigest()[:12] if body else None
+        self.rebuilds += 1
+        logger.info(f"Skill catalog rebuilt: version {self.version}, {len(index.skills)} skills")
+
+    def apply(self, user_id: int, skill_id: int, level: int) -> None:
+        """Proficiency changes do not affect the catalog."""
+
+    @property
+    def instructions(self) -> Optional[str]:
+        """Prompt section to append to the agent instructions, if there is a catalog."""
+        if not self.body:
+            return None
+        return (
+            f"## Skills catalog (version {self.version})\n"
+            "Every skill tracked in the system, by category. Use these names in tool calls "
+            "directly; call list_all_skills only when per-skill counts are needed.\n"
+            f"{self.body}\n"
+        )
+
+
+# Global catalog, kept in step with the global skill index
+skill_catalog = SkillCatalog()
+skill_index.subscribe(skill_catalog)
@@ -0,0 +1,445 @@
+"""In-memory index of who has which skill at which level.
+
+Loaded from users/skills/user_skills/skill_aliases in flat queries, then kept
+current by pulling only user_skills rows changed since the last high-water
+mark on last_updated, less CHANGE_MARGIN. A fingerprint of the skill catalog triggers a full
+reload when skills or aliases change, and a periodic full reload picks up
+deletions and new users.
+Each user's skills are stored as integer bitsets, one per proficiency
+threshold, so coverage questions become bitwise ANDs instead of
+per-question SQL.
+
+When a snapshot path is set, the index is written to disk after each
+refresh that changed it and read back at startup (see skill_snapshot), so a
+restarted replica only has to catch up on changes since the snapshot.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional, Protocol
+
+from db import DatabaseUnavailable, db
+
+if TYPE_CHECKING:
+    import skill_snapshot
+
+logger = logging.getLogger(__name__)
+
+LEVELS = {"L100": 1, "L200": 2, "L300": 3, "L400": 4}
+
+# Incremental refreshes re-read this far behind the high-water mark. The
+# modtime trigger stamps rows with their transaction's start time, so a
+# transaction that commits after a refresh can still stamp rows before its
+# mark. Re-applying the overlap is harmless.
+CHANGE_MARGIN = timedelta(minutes=1)
+
+# Changes whenever anything the prompt catalog renders does: a skill or alias
+# added, renamed or removed, a category renamed, or a skill moved to another
+# category
+CATALOG_VERSION_QUERY = """
+    SELECT md5(
+        COALESCE((
+            SELECT string_agg(s.id || ':' || s.name || ':' || COALESCE(sc.name, ''), ',' ORDER BY s.id)
+            FROM skills s
+            LEFT JOIN skill_categories sc ON s.category_id = sc.id
+        ), '')
+        || '|' ||
+        COALESCE((SELECT string_agg(alias || ':' || skill_id, ',' ORDER BY alias) FROM skill_aliases), '')
+    ) AS version
+"""
+
+
+class IndexListener(Protocol):
+    """Derived structures kept in step with the index."""
+
+    def rebuild(self, index: "SkillIndex") -> None: ...
+
+    def apply(self, user_id: int, skill_id: int, level: int) -> None: ...
+
+
+class SkillIndex:
+    """Per-user skill bitsets keyed by minimum proficiency level."""
+
+    def __init__(self, ttl: float = 60.0, full_reload_interval: float = 900.0):
+        self.ttl = ttl
+        self.full_reload_interval = full_reload_interval
+        self.users: dict[int, dict] = {}
+        self.skills: dict[int, dict] = {}
+        # skill_id -> bit position, assigned in load order
+        self.skill_bits: dict[int, int] = {}
+        # level (1-4) -> {user_id: bitset of skills held at that level or above}
+        self.level_bits: dict[int, dict[int, int]] = {}
+        # user_id -> {skill_id: level}
+        self.user_levels: dict[int, dict[int, int]] = {}
+        # Alternative name -> skill_id, from skill_aliases
+        self.aliases: dict[str, int] = {}
+        self.loaded_at: Optional[float] = None
+        self.full_loaded_at: Optional[float] = None
+        # Newest user_skills.last_updated seen; incremental refreshes start here
+        self.high_water_mark: Optional[datetime] = None
+        self.catalog_version: Optional[str] = None
+        self._listeners: list[IndexListener] = []
+        self._load_lock = asyncio.Lock()
+        # Where to persist the index; None disables snapshots
+        self.snapshot_path: Optional[str] = None
+        self._save_lock = asyncio.Lock()
+        self._save_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: IndexListener) -> None:
+        """Keep listener in step with full reloads and incremental changes."""
+        self._listeners.append(listener)
+        if self.full_loaded_at is not None:
+            listener.rebuild(self)
+
+    def load_rows(
+        self,
+        users: list[dict],
+        skills: list[dict],
+        user_skills: list[dict],
+        aliases: Optional[list[dict]] = None,
+    ) -> None:
+        """Rebuild the index from raw table rows."""
+        self._reset(users, skills, aliases or [])
+        for row in user_skills:
+            level = LEVELS.get(row["proficiency_level"])
+            if level is None or row["skill_id"] not in self.skill_bits or row["user_id"] not in self.users:
+                continue
+            self._set_level(row["user_id"], row["skill_id"], level)
+            self._advance_mark(row.get("last_updated"))
+        self._loaded()
+
+    def load_snapshot(self, path: str) -> bool:
+        """Load the index from a snapshot file written by an earlier refresh.
+
+        The index serves from the snapshot straight away but is left stale,
+        so the next ensure_loaded() catches up from the snapshot's
+        high-water mark.
+
+        Returns:
+            False if there is no usable snapshot at path
+        """
+        # Deferred like in _schedule_save: snapshots pull in numpy
+        import skill_snapshot
+
+        start = time.perf_counter()
+        try:
+            snapshot = skill_snapshot.read(path)
+        except skill_snapshot.SnapshotError as e:
+            logger.info(f"No skill index snapshot loaded from {path}: {e}")
+            return False
+        self._reset(snapshot.users, snapshot.skills, snapshot.aliases)
+        for user_id, skill_id, level in zip(snapshot.user_ids, snapshot.skill_ids, snapshot.levels):
+            if skill_id in self.skill_bits and user_id in self.users:
+                self._set_level(user_id, skill_id, level)
+        self.high_water_mark = snapshot.high_water_mark
+        self.catalog_version = snapshot.catalog_version
+        self._loaded()
+        self.loaded_at = None
+        logger.info(
+            f"Skill index loaded from snapshot: {len(self.users)} users, {len(self.skills)} skills, "
+            f"{len(snapshot.levels)} assignments in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+        return True
+
+    def _reset(self, users: list[dict], skills: list[dict], aliases: list[dict]) -> None:
+        self.users = {u["id"]: {"name": u["name"], "role": u.get("role"), "team": u.get("team")} for u in users}
+        self.skills = {s["id"]: {"name": s["name"], "category": s.get("category")} for s in skills}
+        self.skill_bits = {skill_id: bit for bit, skill_id in enumerate(self.skills)}
+        self.aliases = {a["alias"]: a["skill_id"] for a in aliases}
+        self.level_bits = {level: {} for level in LEVELS.values()}
+        self.user_levels = {}
+        self.high_water_mark = None
+
+    def _loaded(self) -> None:
+        self.loaded_at = self.full_loaded_at = time.monotonic()
+        for listener in self._listeners:
+            listener.rebuild(self)
+
+    def _advance_mark(self, changed_at: Optional[datetime]) -> None:
+        if changed_at is not None and (self.high_water_mark is None or changed_at > self.high_water_mark):
+            self.high_water_mark = changed_at
+
+    def _set_level(self, user_id: int, skill_id: int, level: int) -> None:
+        bit = 1 << self.skill_bits[skill_id]
+        self.user_levels.setdefault(user_id, {})[skill_id] = level
+        for threshold, bits in self.level_bits.items():
+            if threshold <= level:
+                bits[user_id] = bits.get(user_id, 0) | bit
+            elif user_id in bits:
+                bits[user_id] &= ~bit
+
+    def apply_changes(self, rows: list[dict]) -> bool:
+        """Apply changed user_skills rows in place.
+
+        Returns:
+            False if a row references a user or skill the index has not
+            loaded, meaning a full reload is needed
+        """
+        for row in rows:
+            level = LEVELS.get(row["proficiency_level"])
+            if level is None:
+                continue
+            if row["skill_id"] not in self.skill_bits or row["user_id"] not in self.users:
+                return False
+            if self.user_levels.get(row["user_id"], {}).get(row["skill_id"]) != level:
+                self._set_level(row["user_id"], row["skill_id"], level)
+                for listener in self._listeners:
+                    listener.apply(row["user_id"], row["skill_id"], level)
+            self._advance_mark(row.get("last_updated"))
+        self.loaded_at = time.monotonic()
+        return True
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    async def ensure_loaded(self) -> None:
+        """Bring the index up to date if it is older than the TTL.
+
+        Pulls only rows changed since the high-water mark, falling back to a
+        full reload on first use, every full_reload_interval, when the skill
+        catalog has changed, or when a change references an unknown user or
+        skill.
+
+        If the database cannot answer, the index keeps what it has (stale)
+        and the next call tries again; an outage is never loaded as an empty
+        index.
+
+        Raises:
+            DatabaseUnavailable: If the load failed and the index holds no
+                data to fall back on
+        """
+        if not self.is_stale:
+            return
+        async with self._load_lock:
+            if not self.is_stale:
+                return
+            needs_full = (
+                self.full_loaded_at is None
+                or self.high_water_mark is None
+                or time.monotonic() - self.full_loaded_at > self.full_reload_interval
+            )
+            try:
+                await self._refresh(needs_full)
+            except DatabaseUnavailable as e:
+                if not self.users:
+                    raise
+                logger.warning(f"Skill index refresh failed, serving the previous data: {e}")
+
+    async def _refresh(self, needs_full: bool) -> None:
+        """Incremental catch-up or full reload; raises DatabaseUnavailable on failure."""
+        if not needs_full:
+            changes, catalog = await asyncio.gather(
+                db.fetch_all(
+                    """
+                    SELECT user_id, skill_id, proficiency_level, last_updated
+                    FROM user_skills
+                    WHERE last_updated >= $1
+                    """,
+                    self.high_water_mark - CHANGE_MARGIN,
+                    strict=True,
+                ),
+                db.fetch_one(CATALOG_VERSION_QUERY, strict=True),
+            )
+            catalog_changed = catalog is not None and catalog["version"] != self.catalog_version
+            mark = self.high_water_mark
+            if not catalog_changed and self.apply_changes(changes):
+                logger.debug(f"Skill index applied {len(changes)} incremental change(s)")
+                if self.high_water_mark != mark:
+                    self._schedule_save()
+                return
+        await self._full_load()
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        """Write a snapshot in the background if snapshots are enabled."""
+        if not self.snapshot_path:
+            return
+        # Deferred so numpy is only imported when snapshots are enabled
+        import skill_snapshot
+
+        # Copy the contents now, while the index cannot change under us;
+        # encoding and the file write both leave the event loop
+        state = skill_snapshot.capture(self)
+        self._save_task = asyncio.create_task(self._save(self.snapshot_path, state))
+
+    async def _save(self, path: str, state: "skill_snapshot.IndexState") -> None:
+        import skill_snapshot
+
+        def encode_and_write() -> int:
+            data = skill_snapshot.encode(state)
+            skill_snapshot.write(path, data)
+            return len(data)
+
+        async with self._save_lock:
+            try:
+                size = await asyncio.to_thread(encode_and_write)
+                logger.debug(f"Skill index snapshot written to {path} ({size} bytes)")
+            except Exception as e:
+                logger.warning(f"Skill index snapshot write failed: {type(e).__name__}: {e}")
+
+    async def _full_load(self) -> None:
+        start = time.perf_counter()
+        users, skills, user_skills, aliases, catalog = await asyncio.gather(
+            db.fetch_all("SELECT id, name, role, team FROM users", strict=True),
+            db.fetch_all("""
+                SELECT s.id, s.name, sc.name as category
+                FROM skills s
+                LEFT JOIN skill_categories sc ON s.category_id = sc.id
+                ORDER BY s.id
+            """, strict=True),
+            db.fetch_all("SELECT user_id, skill_id, proficiency_level, last_updated FROM user_skills", strict=True),
+            db.fetch_all("SELECT alias, skill_id FROM skill_aliases", strict=True),
+            db.fetch_one(CATALOG_VERSION_QUERY, strict=True),
+        )
+        # Only reached when every query succeeded
+        self.load_rows(users, skills, user_skills, aliases)
+        self.catalog_version = catalog["version"] if catalog else None
+        logger.info(
+            f"Skill index loaded: {len(self.users)} users, {len(self.skills)} skills, "
+            f"{len(user_skills)} assignments in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+
+    def find_users(self, name: str) -> list[int]:
+        """User IDs matching name: an exact (case-insensitive) match, else substring matches."""
+        name = name.strip().lower()
+        exact = [user_id for user_id, user in self.users.items() if user["name"].lower() == name]
+        if exact:
+            return exact
+        return [user_id for user_id, user in self.users.items() if name in user["name"].lower()]
+
+    def match_skills(self, term: str) -> list[int]:
+        """Skill IDs whose name contains term (case-insensitive)."""
+        term = term.strip().lower()
+        return [skill_id for skill_id, skill in self.skills.items() if term in skill["name"].lower()]
+
+    def mask(self, skill_ids: list[int]) -> int:
+        """Bitset with the bits of the given skills set."""
+        result = 0
+        for skill_id in skill_ids:
+            result |= 1 << self.skill_bits[skill_id]
+        return result
+
+    def coverage(
+        self,
+        requirements: list[tuple[int, int]],
+        team: Optional[str] = None,
+    ) -> dict[int, int]:
+        """Which requirements each user satisfies.
+
+        Args:
+            requirements: (skill mask, minimum level) per requirement
+            team: Only consider users on this team (case-insensitive)
+
+        Returns:
+            user_id -> bitset with bit i set if the user meets requirement i
+        """
+        team = team.strip().lower() if team else None
+        covered: dict[int, int] = {}
+        for i, (skill_mask, level) in enumerate(requirements):
+            for user_id, bits in self.level_bits.get(level, {}).items():
+                if bits & skill_mask:
+                    covered[user_id] = covered.get(user_id, 0) | (1 << i)
+        if team:
+            covered = {
+                user_id: bits for user_id, bits in covered.items()
+                if (self.users[user_id]["team"] or "").lower() == team
+            }
+        return covered
+
+
+def _prune_dominated(candidates: dict[int, int], strength: dict[int, int]) -> dict[int, int]:
+    """Keep one strongest user per coverage pattern and drop dominated patterns."""
+    best_per_mask: dict[int, int] = {}
+    for user_id, bits in candidates.items():
+        current = best_per_mask.get(bits)
+        if current is None or (strength.get(user_id, 0), -user_id) > (strength.get(current, 0), -current):
+            best_per_mask[bits] = user_id
+    kept: dict[int, int] = {}
+    for bits in sorted(best_per_mask, key=lambda b: -b.bit_count()):
+        if not any(bits | other == other for other in kept.values()):
+            kept[best_per_mask[bits]] = bits
+    return kept
+
+
+def greedy_cover(candidates: dict[int, int], full: int, strength: dict[int, int], max_size: Optional[int] = None) -> list[int]:
+    """Repeatedly pick the user covering the most uncovered requirements."""
+    chosen: list[int] = []
+    uncovered = full
+    while uncovered and (max_size is None or len(chosen) < max_size):
+        best = max(
+            candidates,
+            key=lambda u: ((candidates[u] & uncovered).bit_count(), strength.get(u, 0), -u),
+            default=None,
+        )
+        if best is None or not candidates[best] & uncovered:
+            break
+        chosen.append(best)
+        uncovered &= ~candidates[best]
+    return chosen
+
+
+def minimum_cover(
+    candidates: dict[int, int],
+    full: int,
+    strength: Optional[dict[int, int]] = None,
+    max_size: Optional[int] = None,
+    exact_limit: int = 200_000,
+) -> list[int]:
+    """Smallest set of users whose bitsets together cover full.
+
+    Starts from the greedy answer and then searches for a smaller cover,
+    branching on the lowest uncovered requirement so only users who cover it
+    are tried. Gives up on the exact search after exact_limit nodes and keeps
+    the greedy result. If no full cover fits in max_size, returns the greedy
+    partial cover of that size.
+    """
+    strength = strength or {}
+    candidates = _prune_dominated(candidates, strength)
+    best = greedy_cover(candidates, full, strength)
+    covered = 0
+    for user_id in best:
+        covered |= candidates[user_id]
+    if covered != full:
+        return best[:max_size] if max_size is not None else best
+
+    by_bit: dict[int, list[int]] = {}
+    for user_id in sorted(candidates, key=lambda u: (-candidates[u].bit_count(), -strength.get(u, 0), u)):
+        bits = candidates[user_id]
+        for bit in range(full.bit_length()):
+            if bits >> bit & 1:
+                by_bit.setdefault(bit, []).append(user_id)
+
+    nodes = 0
+
+    def search(uncovered: int, chosen: list[int], limit: int) -> Optional[list[int]]:
+        nonlocal nodes
+        nodes += 1
+        if not uncovered:
+            return list(chosen)
+        if len(chosen) >= limit or nodes > exact_limit:
+            return None
+        lowest = (uncovered & -uncovered).bit_length() - 1
+        for user_id in by_bit.get(lowest, []):
+            chosen.append(user_id)
+            found = search(uncovered & ~candidates[user_id], chosen, limit)
+            chosen.pop()
+            if found:
+                return found
+        return None
+
+    for size in range(1, len(best)):
+        found = search(full, [], size)
+        if found:
+            best = found
+            break
+        if nodes > exact_limit:
+            break
+    if max_size is not None and len(best) > max_size:
+        return greedy_cover(candidates, full, strength, max_size)
+    return best
+
+
+# Global index instance
+skill_index = SkillIndex()
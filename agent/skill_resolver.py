@@ -0,0 +1,225 @@
+"""Typo-tolerant mapping from free-text skill terms to skill IDs.
+
+Every skill name, the significant words in it, its acronym and its rows in
+skill_aliases are indexed in a BK-tree under Levenshtein distance, so
+"kubernets", "k8s" or "cosmos" resolve in one lookup instead of the model
+retrying spellings against ILIKE. The resolver listens to the skill index;
+on each reload only the terms that appeared or disappeared are touched.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from skill_index import SkillIndex, skill_index
+
+logger = logging.getLogger(__name__)
+
+# Words too common in skill names to identify a skill on their own
+STOPWORDS = {"azure", "microsoft", "and", "for", "the", "of", "service", "services"}
+
+# How much a hit on each kind of term is worth before distance is applied
+NAME_WEIGHT = 1.0
+ALIAS_WEIGHT = 1.0
+WORD_WEIGHT = 0.9
+ACRONYM_WEIGHT = 0.85
+
+
+@dataclass(frozen=True)
+class SkillCandidate:
+    """A skill a term may refer to."""
+
+    skill_id: int
+    name: str
+    confidence: float
+    matched: str
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse everything except letters, digits, '#', '+' and '.'."""
+    return " ".join(re.sub(r"[^a-z0-9#+.]+", " ", text.lower()).split())
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance between two strings."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def max_distance(term: str) -> int:
+    """Edits tolerated for a term of this length; short terms must match exactly."""
+    if len(term) < 4:
+        return 0
+    if len(term) <= 5:
+        return 1
+    if len(term) <= 9:
+        return 2
+    return 3
+
+
+class BKTree:
+    """Metric tree over strings for bounded edit-distance search."""
+
+    def __init__(self):
+        self.root: Optional[tuple[str, dict]] = None
+        self.size = 0
+
+    def add(self, term: str) -> None:
+        if self.root is None:
+            self.root = (term, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(term, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (term, {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, term: str, limit: int) -> list[tuple[str, int]]:
+        """All stored terms within limit edits of term, as (term, distance)."""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            stored, children = stack.pop()
+            distance = levenshtein(term, stored)
+            if distance <= limit:
+                found.append((stored, distance))
+            # Triangle inequality: only children at distance-limit..distance+limit can match
+            for edge, child in children.items():
+                if distance - limit <= edge <= distance + limit:
+                    stack.append(child)
+        return found
+
+
+def _skill_terms(name: str) -> dict[str, float]:
+    """Indexable terms for one skill name, with their weights."""
+    full = normalize(name)
+    terms = {full: NAME_WEIGHT}
+    # "Azure Kubernetes Service (AKS)" -> "aks"
+    for acronym in re.findall(r"\(([^)]+)\)", name):
+        terms.setdefault(normalize(acronym), ACRONYM_WEIGHT)
+    base = normalize(re.sub(r"\([^)]*\)", " ", name)).split()
+    if len(base) >= 3:
+        terms.setdefault("".join(word[0] for word in base), ACRONYM_WEIGHT)
+    for word in base:
+        if len(word) >= 3 and word not in STOPWORDS:
+            terms.setdefault(word, WORD_WEIGHT)
+    return terms
+
+
+class SkillResolver:
+    """Fuzzy index of skill names and aliases, kept in step with the skill index."""
+
+    def __init__(self):
+        self.names: dict[int, str] = {}
+        # term -> {skill_id: weight}
+        self.terms: dict[str, dict[int, float]] = {}
+        self.tree = BKTree()
+
+    def rebuild(self, index: SkillIndex) -> None:
+        """Sync with the index's skills and aliases, touching only changed terms."""
+        terms: dict[str, dict[int, float]] = {}
+        for skill_id, skill in index.skills.items():
+            for term, weight in _skill_terms(skill["name"]).items():
+                terms.setdefault(term, {})[skill_id] = weight
+        for alias, skill_id in index.aliases.items():
+            if skill_id in index.skills:
+                terms.setdefault(normalize(alias), {})[skill_id] = ALIAS_WEIGHT
+        terms.pop("", None)
+
+        added = terms.keys() - self.terms.keys()
+        removed = self.terms.keys() - terms.keys()
+        self.names = {skill_id: skill["name"] for skill_id, skill in index.skills.items()}
+        self.terms = terms
+        # BK-trees cannot delete; removed terms stay in the tree and are
+        # skipped at search time until they outnumber the live ones
+        if self.tree.size - len(terms) > len(terms):
+            self.tree = BKTree()
+            added = terms.keys()
+        for term in added:
+            self.tree.add(term)
+        logger.debug(f"Skill resolver synced: {len(added)} term(s) added, {len(removed)} removed")
+
+    def apply(self, user_id: int, skill_id: int, level: int) -> None:
+        """Proficiency changes do not affect skill names."""
+
+    def _fuzzy(self, term: str) -> dict[int, tuple[float, str]]:
+        """Best (confidence, matched term) per skill for terms near term."""
+        best: dict[int, tuple[float, str]] = {}
+        for stored, distance in self.tree.search(term, max_distance(term)):
+            similarity = 1 - distance / max(len(term), len(stored))
+            for skill_id, weight in self.terms.get(stored, {}).items():
+                confidence = weight * similarity
+                if confidence > best.get(skill_id, (0.0, ""))[0]:
+                    best[skill_id] = (confidence, stored)
+        return best
+
+    def resolve(self, term: str, limit: int = 5, min_confidence: float = 0.6) -> list[SkillCandidate]:
+        """Skills a free-text term most likely refers to, best first.
+
+        Args:
+            term: What the user typed, e.g. "kubernets" or "k8s"
+            limit: Maximum number of candidates
+            min_confidence: Drop candidates scoring below this (0-1)
+
+        Returns:
+            Candidates with a confidence score and the indexed term they matched
+        """
+        query = normalize(term)
+        if not query:
+            return []
+        scores = self._fuzzy(query)
+
+        def offer(skill_id: int, confidence: float, matched: str) -> None:
+            if confidence > scores.get(skill_id, (0.0, ""))[0]:
+                scores[skill_id] = (confidence, matched)
+
+        # Plain substring of the name, scored by how much of it the term covers
+        for skill_id, name in self.names.items():
+            full = normalize(name)
+            if query in full:
+                offer(skill_id, 0.6 + 0.3 * len(query) / len(full), full)
+
+        # Multi-word terms: average the best match of each significant word
+        words = [word for word in query.split() if word not in STOPWORDS] or query.split()
+        if len(words) > 1:
+            per_word = [self._fuzzy(word) for word in words]
+            for skill_id in set().union(*per_word):
+                confidence = sum(hits.get(skill_id, (0.0, ""))[0] for hits in per_word) / len(words)
+                offer(skill_id, confidence, query)
+        elif words != query.split():
+            for skill_id, (confidence, matched) in self._fuzzy(words[0]).items():
+                offer(skill_id, confidence, matched)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1][0], self.names[item[0]]))
+        return [
+            SkillCandidate(skill_id, self.names[skill_id], round(confidence, 2), matched)
+            for skill_id, (confidence, matched) in ranked
+            if confidence >= min_confidence
+        ][:limit]
+
+    def resolve_ids(self, term: str, limit: int = 3, min_confidence: float = 0.75) -> list[int]:
+        """IDs of the confident candidates for term."""
+        return [c.skill_id for c in self.resolve(term, limit, min_confidence)]
+
+
+# Global resolver, kept in step with the global skill index
+skill_resolver = SkillResolver()
+skill_index.subscribe(skill_resolver)
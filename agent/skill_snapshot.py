@@ -0,0 +1,286 @@
+"""Columnar on-disk snapshot of the skill index.
+
+A new replica reads the snapshot at startup and serves from it at once,
+then catches up from the database with the usual incremental query
+starting at the snapshot's high-water mark instead of scanning user_skills.
+Loading is a full copy: the file is read in one go and every column is
+decoded into the index's Python structures. The columnar layout keeps that
+decode to a few bulk conversions rather than per-row parsing.
+
+Encoding runs off the event loop. capture() copies what the index holds
+(cheap dict copies) so the encoder thread never sees the index change.
+
+Layout (little-endian, sections 8-byte aligned):
+    header       magic, format version, flags, high-water mark (microseconds
+                 since the epoch), catalog version, section sizes, CRC-32 of
+                 everything after the header
+    strings      uint32 offsets[n + 1], then the UTF-8 bytes; every name,
+                 role, team, category and alias is stored once
+    users        int32 id, name, role, team (string indexes, -1 for NULL)
+    skills       int32 id, name, category
+    aliases      int32 alias, skill_id
+    assignments  int32 user_id, int32 skill_id, uint8 level (1-4)
+
+Files are written to a temporary name and renamed into place, so readers
+only ever see a complete snapshot.
+"""
+import os
+import struct
+import tempfile
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from skill_index import SkillIndex
+
+MAGIC = b"TSKS"
+FORMAT_VERSION = 1
+
+# magic, version, flags, high-water mark, catalog version,
+# n_strings, string_bytes, n_users, n_skills, n_aliases, n_assignments, crc32
+HEADER = struct.Struct("<4sHHq32s7I")
+HEADER_SIZE = 80
+
+HAS_MARK = 1
+MARK_IS_UTC = 2
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class SnapshotError(Exception):
+    """Snapshot file is missing, from another format version, or corrupt."""
+
+
+@dataclass
+class Snapshot:
+    """Decoded snapshot contents, as rows the index can load."""
+
+    users: list[dict]
+    skills: list[dict]
+    aliases: list[dict]
+    user_ids: list[int]
+    skill_ids: list[int]
+    levels: list[int]
+    high_water_mark: Optional[datetime]
+    catalog_version: Optional[str]
+
+
+@dataclass
+class IndexState:
+    """Point-in-time copy of the index fields a snapshot is encoded from."""
+
+    users: dict[int, dict]
+    skills: dict[int, dict]
+    aliases: dict[str, int]
+    user_levels: dict[int, dict[int, int]] = field(default_factory=dict)
+    high_water_mark: Optional[datetime] = None
+    catalog_version: Optional[str] = None
+
+
+def capture(index: "SkillIndex") -> IndexState:
+    """Copy the index's contents so encode() can run in another thread.
+
+    users, skills and aliases are replaced wholesale on reload, never
+    changed in place, so references are enough; per-user levels are patched
+    in place by incremental changes and are copied.
+    """
+    return IndexState(
+        users=index.users,
+        skills=index.skills,
+        aliases=index.aliases,
+        user_levels={user_id: dict(levels) for user_id, levels in index.user_levels.items()},
+        high_water_mark=index.high_water_mark,
+        catalog_version=index.catalog_version,
+    )
+
+
+class _StringTable:
+    """Interns strings to indexes into one shared table."""
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.strings: list[bytes] = []
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        sid = self.index.get(value)
+        if sid is None:
+            sid = self.index[value] = len(self.strings)
+            self.strings.append(value.encode())
+        return sid
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+def _encode_mark(mark: Optional[datetime]) -> tuple[int, int]:
+    """(flags, microseconds since the epoch) for a high-water mark."""
+    if mark is None:
+        return 0, 0
+    flags = HAS_MARK
+    if mark.tzinfo is not None:
+        flags |= MARK_IS_UTC
+        mark = mark.astimezone(timezone.utc).replace(tzinfo=None)
+    return flags, (mark - _EPOCH) // timedelta(microseconds=1)
+
+
+def _decode_mark(flags: int, micros: int) -> Optional[datetime]:
+    if not flags & HAS_MARK:
+        return None
+    mark = _EPOCH + timedelta(microseconds=micros)
+    return mark.replace(tzinfo=timezone.utc) if flags & MARK_IS_UTC else mark
+
+
+def encode(index: "SkillIndex | IndexState") -> bytes:
+    """Serialize an index, or a capture() of one, to snapshot bytes."""
+    strings = _StringTable()
+    users = np.array(
+        [
+            (user_id, strings.intern(u["name"]), strings.intern(u["role"]), strings.intern(u["team"]))
+            for user_id, u in index.users.items()
+        ],
+        dtype="<i4",
+    ).reshape(-1, 4)
+    skills = np.array(
+        [
+            (skill_id, strings.intern(s["name"]), strings.intern(s["category"]))
+            for skill_id, s in index.skills.items()
+        ],
+        dtype="<i4",
+    ).reshape(-1, 3)
+    aliases = np.array(
+        [(strings.intern(alias), skill_id) for alias, skill_id in index.aliases.items()],
+        dtype="<i4",
+    ).reshape(-1, 2)
+    assignments = [
+        (user_id, skill_id, level)
+        for user_id, levels in index.user_levels.items()
+        for skill_id, level in levels.items()
+    ]
+    user_ids = np.array([a[0] for a in assignments], dtype="<i4")
+    skill_ids = np.array([a[1] for a in assignments], dtype="<i4")
+    levels = np.array([a[2] for a in assignments], dtype="u1")
+
+    blob = b"".join(strings.strings)
+    offsets = np.zeros(len(strings.strings) + 1, dtype="<u4")
+    np.cumsum([len(s) for s in strings.strings], out=offsets[1:])
+
+    # Columns are stored one after another, not as interleaved rows
+    body = b"".join([
+        _pad(offsets.tobytes()),
+        _pad(blob),
+        *(_pad(np.ascontiguousarray(users[:, i]).tobytes()) for i in range(4)),
+        *(_pad(np.ascontiguousarray(skills[:, i]).tobytes()) for i in range(3)),
+        *(_pad(np.ascontiguousarray(aliases[:, i]).tobytes()) for i in range(2)),
+        _pad(user_ids.tobytes()),
+        _pad(skill_ids.tobytes()),
+        _pad(levels.tobytes()),
+    ])
+    flags, mark = _encode_mark(index.high_water_mark)
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        flags,
+        mark,
+        (index.catalog_version or "").encode()[:32],
+        len(strings.strings),
+        len(blob),
+        len(users),
+        len(skills),
+        len(aliases),
+        len(assignments),
+        zlib.crc32(body),
+    )
+    return header.ljust(HEADER_SIZE, b"\0") + body
+
+
+def write(path: str, data: bytes) -> None:
+    """Atomically replace the snapshot at path with data."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".skill-snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read(path: str) -> Snapshot:
+    """Read and decode the snapshot at path.
+
+    Raises:
+        SnapshotError: If the file is missing, from another format version,
+            truncated or fails its checksum
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise SnapshotError(f"Cannot open snapshot: {e}") from e
+    if len(data) < HEADER_SIZE:
+        raise SnapshotError("Snapshot is truncated")
+    return _decode(data)
+
+
+def _decode(data: bytes) -> Snapshot:
+    (
+        magic, version, flags, mark, catalog,
+        n_strings, string_bytes, n_users, n_skills, n_aliases, n_assignments, crc,
+    ) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format {magic!r} v{version}")
+    if zlib.crc32(memoryview(data)[HEADER_SIZE:]) != crc:
+        raise SnapshotError("Snapshot checksum mismatch")
+
+    offset = HEADER_SIZE
+
+    def column(dtype: str, count: int) -> list:
+        nonlocal offset
+        values = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += values.nbytes + (-values.nbytes % 8)
+        return values.tolist()
+
+    offsets = column("<u4", n_strings + 1)
+    blob = data[offset:offset + string_bytes]
+    offset += string_bytes + (-string_bytes % 8)
+    strings = [blob[offsets[i]:offsets[i + 1]].decode() for i in range(n_strings)]
+
+    def text(sid: int) -> Optional[str]:
+        return strings[sid] if sid >= 0 else None
+
+    user_cols = [column("<i4", n_users) for _ in range(4)]
+    skill_cols = [column("<i4", n_skills) for _ in range(3)]
+    alias_cols = [column("<i4", n_aliases) for _ in range(2)]
+    return Snapshot(
+        users=[
+            {"id": user_id, "name": text(name), "role": text(role), "team": text(team)}
+            for user_id, name, role, team in zip(*user_cols)
+        ],
+        skills=[
+            {"id": skill_id, "name": text(name), "category": text(category)}
+            for skill_id, name, category in zip(*skill_cols)
+        ],
+        aliases=[
+            {"alias": text(alias), "skill_id": skill_id}
+            for alias, skill_id in zip(*alias_cols)
+        ],
+        user_ids=column("<i4", n_assignments),
+        skill_ids=column("<i4", n_assignments),
+        levels=column("u1", n_assignments),
+        high_water_mark=_decode_mark(flags, mark),
+        catalog_version=catalog.rstrip(b"\0").decode() or None,
+    )
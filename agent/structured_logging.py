@@ -0,0 +1,183 @@
+"""Queue-based JSON logging that keeps log I/O off the event loop.
+
+configure_logging() replaces the root handlers with a handler that only
+puts the record on a bounded queue. A QueueListener thread formats each
+record (message interpolation included) as one JSON object per line and
+writes it to stderr, so a log call on the hot path costs a record and a
+queue put. Chatty loggers can be sampled per logger; warnings and errors
+are always kept.
+
+Because messages are rendered later on another thread, a record whose args
+are not all plain immutable values (str, numbers, bytes, None) is rendered
+in the calling thread instead, so a list or dict changed right after the
+call is logged as it was. `extra` fields are always rendered later; pass
+them as immutable values or copies.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Argument types that cannot change between the log call and the writer thread
+_IMMUTABLE_ARGS = (str, int, float, bytes, type(None))
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: timestamp, level, logger, message and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every 1/rate records below WARNING from the configured loggers.
+
+    A rate applies to the named logger and its children. Counting instead of
+    random draws keeps the kept share exact and the filter cheap.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._seen: dict[str, int] = {}
+        self.dropped = 0
+
+    def _rate(self, name: str) -> Optional[float]:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1:
+            return True
+        seen = self._seen.get(record.name, 0)
+        self._seen[record.name] = seen + 1
+        if rate > 0 and seen % round(1 / rate) == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records and drops them when the queue is full.
+
+    The stock QueueHandler formats the message in the calling thread so the
+    record can be pickled; records here never leave the process, so
+    formatting is left to the listener thread unless an argument is
+    mutable.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_ARGS) for arg in args)):
+            # Render now: the caller may change a mutable argument before
+            # the listener thread gets to the record
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def dropped_records() -> dict[str, int]:
+    """Records lost by the root queue handler so far.
+
+    Returns:
+        queue_full: dropped because the writer thread fell behind
+        sampled_out: left out by per-logger sampling
+    """
+    counts = {"queue_full": 0, "sampled_out": 0}
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            counts["queue_full"] += handler.dropped
+            counts["sampled_out"] += sum(
+                f.dropped for f in handler.filters if isinstance(f, SamplingFilter)
+            )
+    return counts
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Rates from "logger=rate,logger=rate", e.g. "tools=0.1"."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def configure_logging(
+    level: str = "INFO",
+    json_format: bool = True,
+    sample_rates: Optional[dict[str, float]] = None,
+    queue_size: int = 10_000,
+) -> QueueListener:
+    """Route all logging through a queue to a background writer thread.
+
+    Uvicorn's loggers are re-pointed at the root logger so access and error
+    lines go through the same pipeline.
+
+    Returns:
+        The running listener; it is stopped (and the queue flushed) at exit
+    """
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    writer = logging.StreamHandler(sys.stderr)
+    writer.setFormatter(
+        JsonFormatter() if json_format else logging.Formatter("%(levelname)s:%(name)s:%(message)s")
+    )
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    listener = QueueListener(log_queue, writer, respect_handler_level=True)
+    listener.start()
+    atexit.register(_flush, listener)
+    return listener
+
+
+def _flush(listener: QueueListener) -> None:
+    """Drain and stop the listener unless it was already stopped."""
+    if listener._thread is not None:
+        listener.stop()
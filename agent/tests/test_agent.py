@@ -91,3 +91,117 @@ async def test_agent_cleanup_handles_uninitialized():
     # Should not raise
     await agent.cleanup()
     assert not agent.is_available
+
+
+@pytest.mark.asyncio
+async def test_agent_run_passes_catalog_instructions():
+    """Test each run appends the current skills catalog to the instructions."""
+    from agent import SkillsAgent
+    
+    agent = SkillsAgent()
+    agent._agent = MagicMock()
+    agent._agent.run = AsyncMock(return_value=MagicMock(text="ok", value=None))
+    
+    with patch("agent.skill_index.ensure_loaded", AsyncMock()), \
+         patch("agent.skill_catalog") as mock_catalog:
+        mock_catalog.instructions = "## Skills catalog (version abc)\n- Dev: Python\n"
+        result = await agent.run("who knows python?")
+    
+    assert result == "ok"
+    options = agent._agent.run.call_args.kwargs["options"]
+    assert options == {"instructions": "## Skills catalog (version abc)\n- Dev: Python\n"}
+
+
+@pytest.mark.asyncio
+async def test_agent_stream_emits_tool_events():
+    """Test tool calls are bracketed by tool_start/tool_end and done reports timings."""
+    from types import SimpleNamespace
+    from agent import SkillsAgent
+    from db import Database
+    from tool_tracking import tracked
+    
+    database = Database()
+    database._fetch_all = AsyncMock(return_value=[{"id": 1}, {"id": 2}])
+    
+    async def list_all_skills():
+        return await database.fetch_all("SELECT 1")
+    
+    tool = tracked(list_all_skills)
+    
+    def call(type_, **fields):
+        return SimpleNamespace(**{"type": type_, "name": None, "call_id": None, "exception": None, **fields})
+    
+    async def updates():
+        yield SimpleNamespace(contents=[call("function_call", name="list_all_skills", call_id="c1")], text="")
+        # Argument chunks of the same call carry no name
+        yield SimpleNamespace(contents=[call("function_call", call_id="c1")], text="")
+        await tool()
+        yield SimpleNamespace(contents=[call("function_result", call_id="c1")], text="")
+        yield SimpleNamespace(contents=[], text="Here are the skills")
+    
+    agent = SkillsAgent()
+    agent._agent = MagicMock()
+    agent._agent.run = MagicMock(return_value=SimpleNamespace(updates=updates()))
+    
+    with patch.object(agent, "_run_options", AsyncMock(return_value=None)):
+        events = [event async for event in agent.run_stream("list skills")]
+    
+    assert [e["type"] for e in events] == ["tool_start", "tool_end", "content", "done"]
+    assert events[0] == {"type": "tool_start", "name": "list_all_skills", "call_id": "c1"}
+    assert events[1]["rows"] == 2
+    assert events[1]["duration_ms"] >= 0
+    assert events[1]["error"] is None
+    assert events[3]["time_to_first_token_ms"] is not None
+    assert events[3]["tool_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_agent_stream_matches_concurrent_calls_by_call_id():
+    """Test two overlapping calls of one tool each get their own stats."""
+    import asyncio
+    from types import SimpleNamespace
+    from agent import SkillsAgent
+    from db import Database
+    from tool_tracking import as_tool
+    
+    database = Database()
+    database._fetch_all = AsyncMock(side_effect=lambda query, rows: [{"id": i} for i in range(rows)])
+    
+    async def find_experts_by_skills(skills: str) -> list:
+        """Find experts."""
+        rows = int(skills)
+        result = await database.fetch_all("SELECT 1", rows)
+        # The call that reads more rows finishes last
+        await asyncio.sleep(rows * 0.01)
+        return result
+    
+    tool = as_tool(find_experts_by_skills)
+    
+    def call(type_, **fields):
+        return SimpleNamespace(**{"type": type_, "name": None, "call_id": None, "exception": None, **fields})
+    
+    async def updates():
+        yield SimpleNamespace(contents=[
+            call("function_call", name="find_experts_by_skills", call_id="c1"),
+            call("function_call", name="find_experts_by_skills", call_id="c2"),
+        ], text="")
+        await asyncio.gather(
+            tool.invoke(arguments={"skills": "3"}, tool_call_id="c1"),
+            tool.invoke(arguments={"skills": "1"}, tool_call_id="c2"),
+        )
+        yield SimpleNamespace(contents=[
+            call("function_result", call_id="c1"),
+            call("function_result", call_id="c2"),
+        ], text="")
+    
+    agent = SkillsAgent()
+    agent._agent = MagicMock()
+    agent._agent.run = MagicMock(return_value=SimpleNamespace(updates=updates()))
+    
+    with patch.object(agent, "_run_options", AsyncMock(return_value=None)):
+        events = [event async for event in agent.run_stream("who knows python?")]
+    
+    ends = {e["call_id"]: e for e in events if e["type"] == "tool_end"}
+    assert ends["c1"]["rows"] == 3
+    assert ends["c2"]["rows"] == 1
+    assert ends["c1"]["duration_ms"] > ends["c2"]["duration_ms"]
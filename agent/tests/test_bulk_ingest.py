@@ -0,0 +1,154 @@
+"""Tests for the bulk ingest CLI."""
+import io
+from contextlib import asynccontextmanager
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import bulk_ingest
+from bulk_ingest import RowError, RowErrors, batches, normalize_level, read_rows, to_record
+
+
+def test_normalize_level_accepts_common_spellings():
+    """L300, l300, 300 and 3 all mean L300; blanks mean no level."""
+    assert [normalize_level(v) for v in ("L300", "l300", " 300 ", "3")] == ["L300"] * 4
+    assert normalize_level("") is None
+    assert normalize_level(None) is None
+    with pytest.raises(RowError):
+        normalize_level("L500")
+
+
+def test_to_record_maps_aliases_and_blanks():
+    """Header spellings are normalized and empty values become NULL."""
+    record = to_record({"Email": " ada@example.com ", "user_name": "Ada", "Skill_Name": "Python", "level": "4", "team": ""})
+
+    assert dict(zip(bulk_ingest.STAGE_COLUMNS, record)) == {
+        "email": "ada@example.com",
+        "name": "Ada",
+        "role": None,
+        "team": None,
+        "skill": "Python",
+        "category": None,
+        "proficiency_level": "L400",
+        "notes": None,
+    }
+
+
+def test_to_record_rejects_incomplete_rows():
+    """A row needs an email, and a skill and its level come together."""
+    with pytest.raises(RowError, match="Missing email"):
+        to_record({"name": "Ada"})
+    with pytest.raises(RowError, match="Missing proficiency level"):
+        to_record({"email": "a@example.com", "skill": "Python"})
+    with pytest.raises(RowError, match="without a skill"):
+        to_record({"email": "a@example.com", "level": "L200"})
+
+
+def test_batches_split_rows_and_collect_errors():
+    """Good rows are batched by size; bad rows and bad JSON are reported by number."""
+    lines = "\n".join([
+        '{"email": "a@example.com", "skill": "Python", "level": "L100"}',
+        '{"email": "b@example.com", "skill": "Python", "level": "L900"}',
+        "{not json",
+        '{"email": "c@example.com"}',
+        '{"email": "d@example.com"}',
+        "",
+    ])
+    errors = RowErrors()
+
+    result = list(batches(read_rows(io.StringIO(lines), "jsonl"), 2, errors))
+
+    assert [len(batch) for batch in result] == [2, 1]
+    assert [batch[0] for batch in result[0]] == ["a@example.com", "c@example.com"]
+    assert errors.count == 2
+    assert errors.messages[0].startswith("row 2: Unknown proficiency level")
+    assert errors.messages[1].startswith("row 3: ")
+
+
+def test_row_errors_keep_a_count_and_the_first_few():
+    """Memory stays bounded however many rows are rejected."""
+    errors = RowErrors()
+    rows = ({"name": "no email"} for _ in range(1000))
+
+    assert list(batches(rows, 10, errors)) == []
+    assert errors.count == 1000
+    assert len(errors.messages) == bulk_ingest.MAX_REPORTED_ERRORS
+
+
+def test_csv_rows_are_read_by_header():
+    """CSV input is keyed by its header row."""
+    stream = io.StringIO("email,skill,proficiency\na@example.com,Python,2\n")
+
+    [batch] = batches(read_rows(stream, "csv"), 10, RowErrors())
+
+    assert batch[0][bulk_ingest.STAGE_COLUMNS.index("proficiency_level")] == "L200"
+
+
+def make_conn():
+    conn = MagicMock()
+    conn.transaction.return_value = MagicMock(start=AsyncMock(), commit=AsyncMock(), rollback=AsyncMock())
+    conn.is_closed.return_value = False
+    conn.execute = AsyncMock(return_value="INSERT 0 3")
+    conn.copy_records_to_table = AsyncMock()
+    conn.fetchrow = AsyncMock(return_value={"inserted": 2, "updated": 1})
+    return conn
+
+
+def patch_acquire(conn):
+    @asynccontextmanager
+    async def acquire():
+        yield conn
+
+    return patch("bulk_ingest.db.acquire", acquire)
+
+
+@pytest.mark.asyncio
+async def test_ingest_copies_batches_and_merges_in_one_transaction():
+    """Rows are COPYed in batches, triggers are restored and coverage rebuilt."""
+    conn = make_conn()
+    data = "email,skill,level\n" + "".join(f"u{i}@example.com,Python,L100\n" for i in range(5))
+
+    with patch_acquire(conn):
+        stats = await bulk_ingest.ingest([(io.StringIO(data), "csv")], batch_size=2)
+
+    assert conn.copy_records_to_table.await_count == 3
+    assert stats["staged"] == 5
+    assert stats["user_skills_created"] == 2
+    assert stats["user_skills_updated"] == 1
+    assert stats["rejected"] == 0
+    conn.transaction.return_value.commit.assert_awaited_once()
+
+    statements = [c.args[0] for c in conn.execute.await_args_list]
+    disabled = [s for s in statements if "DISABLE TRIGGER" in s]
+    enabled = [s for s in statements if "ENABLE TRIGGER" in s and "DISABLE" not in s]
+    assert len(disabled) == len(enabled) == len(bulk_ingest.SUSPENDED_TRIGGERS)
+    assert statements.index(enabled[-1]) < statements.index("SELECT refresh_team_skill_coverage()")
+    assert statements[-1] == "DROP TABLE IF EXISTS ingest_stage"
+
+
+@pytest.mark.asyncio
+async def test_rows_are_staged_before_the_merge_transaction():
+    """COPY runs outside the transaction, so its duration does not age the merged rows."""
+    conn = make_conn()
+    events = []
+    conn.copy_records_to_table.side_effect = lambda *a, **k: events.append("copy")
+    conn.transaction.return_value.start.side_effect = lambda: events.append("begin")
+
+    with patch_acquire(conn):
+        await bulk_ingest.ingest([(io.StringIO("email\na@example.com\n"), "csv")])
+
+    assert events == ["copy", "begin"]
+    assert "clock_timestamp()" in bulk_ingest.UPSERT_USER_SKILLS
+
+
+@pytest.mark.asyncio
+async def test_ingest_dry_run_rolls_back():
+    """A dry run reports the merge counts but commits nothing."""
+    conn = make_conn()
+
+    with patch_acquire(conn):
+        stats = await bulk_ingest.ingest([(io.StringIO("email\na@example.com\n"), "csv")], dry_run=True)
+
+    assert stats["dry_run"] is True
+    conn.transaction.return_value.rollback.assert_awaited_once()
+    conn.transaction.return_value.commit.assert_not_awaited()
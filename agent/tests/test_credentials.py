@@ -0,0 +1,66 @@
+"""Tests for Azure AD token prefetching."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from credentials import PrefetchingTokenProvider
+
+
+class FakeCredential:
+    """Synchronous credential returning numbered tokens."""
+    
+    def __init__(self, lifetime: float = 3600, fail: bool = False):
+        self.lifetime = lifetime
+        self.fail = fail
+        self.calls = 0
+    
+    def get_token(self, scope):
+        if self.fail:
+            raise RuntimeError("no identity")
+        self.calls += 1
+        return SimpleNamespace(token=f"token-{self.calls}", expires_on=time.time() + self.lifetime)
+
+
+@pytest.mark.asyncio
+async def test_start_picks_first_working_credential():
+    """Test failing candidates are skipped and the working one is cached."""
+    working = FakeCredential()
+    provider = PrefetchingTokenProvider(candidates=[
+        ("broken", lambda: FakeCredential(fail=True)),
+        ("unconstructable", lambda: (_ for _ in ()).throw(ValueError("missing env"))),
+        ("working", lambda: working),
+    ])
+    
+    assert await provider.start() is True
+    assert provider.credential_name == "working"
+    # Token is prefetched, so the first call is served from cache
+    assert await provider() == "token-1"
+    assert working.calls == 1
+    assert provider.metrics["acquisitions"] == 1
+    assert provider.metrics["last_acquire_ms"] is not None
+    await provider.close()
+
+
+@pytest.mark.asyncio
+async def test_start_returns_false_when_no_credential_works():
+    """Test start reports failure when every candidate fails."""
+    provider = PrefetchingTokenProvider(candidates=[("broken", lambda: FakeCredential(fail=True))])
+    
+    assert await provider.start() is False
+    assert provider.metrics["credential"] is None
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_before_expiry():
+    """Test the token is refreshed in the background ahead of expiry."""
+    credential = FakeCredential(lifetime=0.05)
+    provider = PrefetchingTokenProvider(refresh_margin=0.0, candidates=[("fake", lambda: credential)])
+    
+    await provider.start()
+    await asyncio.sleep(0.2)
+    await provider.close()
+    
+    assert credential.calls > 1
+    assert provider.metrics["acquisitions"] == credential.calls
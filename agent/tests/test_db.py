@@ -0,0 +1,415 @@
+"""Tests for database utilities."""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from db import CircuitBreaker, Database, ReplicaMonitor, SingleFlight, SlowQueryLog
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    """Test concurrent calls with the same key share one execution."""
+    flight = SingleFlight()
+    calls = 0
+    
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "rows"
+    
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+    
+    assert results == ["rows"] * 5
+    assert calls == 1
+    assert flight.coalesced == 4
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors_without_caching():
+    """Test every waiter sees the error and the next call retries."""
+    flight = SingleFlight()
+    calls = 0
+    
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    results = await asyncio.gather(
+        flight.do("k", failing), flight.do("k", failing), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert calls == 1
+    
+    with pytest.raises(ValueError):
+        await flight.do("k", failing)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancelled_caller_does_not_cancel_others():
+    """Test cancelling one waiter leaves the shared work running."""
+    flight = SingleFlight()
+    
+    async def work():
+        await asyncio.sleep(0.02)
+        return 42
+    
+    first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    
+    assert await second == 42
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_coalesces_identical_queries():
+    """Test identical concurrent fetch_all calls hit the database once."""
+    database = Database("postgresql://unused")
+    calls = 0
+    
+    async def fake_fetch_all(query, *args):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [{"id": 1}]
+    
+    database._fetch_all = fake_fetch_all
+    results = await asyncio.gather(
+        database.fetch_all("SELECT 1", 2),
+        database.fetch_all("SELECT 1", 2),
+        database.fetch_all("SELECT 1", 3),
+    )
+    
+    assert results == [[{"id": 1}]] * 3
+    assert calls == 2
+    assert database.coalesced_queries == 1
+    # Each caller gets its own list and rows
+    assert results[0] is not results[1]
+    results[0][0]["id"] = 99
+    assert results[1] == [{"id": 1}]
+
+
+@pytest.mark.asyncio
+async def test_fetch_one_gives_coalesced_callers_their_own_row():
+    """Test a caller editing a shared fetch_one result does not affect the others."""
+    database = Database("postgresql://unused")
+    
+    async def fake_fetch_one(query, *args):
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+    
+    database._fetch_one = fake_fetch_one
+    first, second = await asyncio.gather(
+        database.fetch_one("SELECT 1"),
+        database.fetch_one("SELECT 1"),
+    )
+    first["extra"] = True
+    
+    assert second == {"id": 1}
+    assert database.coalesced_queries == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_redacts_and_samples_explains():
+    """Test slow queries are kept redacted and a sampled one gets a plan once."""
+    log = SlowQueryLog(threshold_ms=100, explain_sample_rate=1.0, capacity=2)
+    explained = []
+    
+    async def fake_explain(query, args, server):
+        explained.append((server, args))
+        return "Seq Scan on user_skills"
+    
+    log.explain = fake_explain
+    query = """
+        SELECT u.name FROM users u
+        WHERE u.team = $1 AND u.id = ANY($2::int[])
+    """
+    log.observe(query, ("Platform", [1, 2, 3]), 50.0, 3)
+    log.observe(query, ("Platform", [1, 2, 3]), 250.0, 3)
+    log.observe(query, ("Apps", [4]), 300.0, 1)
+    log.observe("UPDATE users SET team = $1", ("Apps",), 400.0, 0)
+    await asyncio.gather(*log._tasks)
+    
+    snapshot = log.snapshot()
+    assert snapshot["recorded"] == 3
+    assert snapshot["queries"][1]["server"] == "primary"
+    # Bounded: only the newest two are kept, newest first
+    newest, older = snapshot["queries"]
+    assert newest["plan_status"] == "not_read_only"
+    assert older["query"] == "SELECT u.name FROM users u WHERE u.team = $1 AND u.id = ANY($2::int[])"
+    assert older["params"] == ["str(4)", "list(1)"]
+    assert "Apps" not in str(snapshot)
+    # Same query text is explained once per cooldown
+    assert older["plan_status"] == "recently_explained"
+    assert explained == [("primary", ("Platform", [1, 2, 3]))]
+    
+    # A query served by the replica is explained there
+    log.observe(query, ("Apps", [4]), 300.0, 1, server="replica")
+    await asyncio.gather(*log._tasks)
+    assert log.snapshot()["queries"][0]["server"] == "replica"
+    assert explained[-1] == ("replica", ("Apps", [4]))
+
+
+def test_circuit_breaker_state_transitions():
+    """Test closed -> open -> half-open -> closed/open transitions."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.0)
+    
+    breaker.record_failure("refused")
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure("refused")
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    # Reset timeout elapsed: exactly one trial call is admitted
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is False
+    
+    breaker.record_failure("still refused")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    states = [(t["from"], t["to"]) for t in breaker.snapshot()["transitions"]]
+    assert states == [
+        ("closed", "open"), ("open", "half_open"), ("half_open", "open"),
+        ("open", "half_open"), ("half_open", "closed"),
+    ]
+
+
+def test_half_open_trial_that_never_reports_is_replaced():
+    """Test a lost trial call does not leave the circuit half-open for good."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5.0)
+    breaker.trip("refused")
+    breaker._opened_at -= 5.0
+    
+    # The trial is admitted, then cancelled before it can report
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    
+    breaker._half_open_at -= 5.0
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_with_single_reconnect():
+    """Test callers return immediately and share one background reconnect."""
+    database = Database("postgresql://unused", reset_timeout=60)
+    attempts = 0
+    
+    async def failing_create_pool():
+        nonlocal attempts
+        attempts += 1
+        raise OSError("connection refused")
+    
+    database._create_pool = failing_create_pool
+    database._breaker.reset_timeout = 0.0
+    
+    start = asyncio.get_running_loop().time()
+    results = await asyncio.gather(*(database.fetch_all(f"SELECT {i}") for i in range(10)))
+    elapsed = asyncio.get_running_loop().time() - start
+    
+    assert results == [[]] * 10
+    assert elapsed < 0.5
+    assert database.circuit["state"] != CircuitBreaker.CLOSED
+    reconnect = database._reconnect_task
+    assert reconnect is not None
+    
+    # Subsequent callers reuse the running task
+    await database.fetch_one("SELECT 1")
+    assert database._reconnect_task is reconnect
+    
+    await asyncio.sleep(0.05)
+    assert attempts >= 1
+    await database.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_with_zero_reset_timeout_does_not_spin():
+    """Test failed reconnects are spaced out and disconnect waits for the task."""
+    database = Database("postgresql://unused", reset_timeout=0.0)
+    attempts = 0
+    
+    async def failing_create_pool():
+        nonlocal attempts
+        attempts += 1
+        raise OSError("connection refused")
+    
+    database._create_pool = failing_create_pool
+    
+    assert await database.ensure_connected() is False
+    reconnect = database._reconnect_task
+    await asyncio.sleep(0.2)
+    
+    assert attempts == 1
+    await database.disconnect()
+    assert reconnect.done()
+    assert database._reconnect_task is None
+
+
+@pytest.mark.asyncio
+async def test_background_reconnect_closes_circuit():
+    """Test a successful background reconnect restores the pool."""
+    database = Database("postgresql://unused", reset_timeout=0.0)
+    pool = object()
+    
+    async def create_pool():
+        return pool
+    
+    database._create_pool = create_pool
+    
+    assert await database.ensure_connected() is False
+    await database._reconnect_task
+    
+    assert database._pool is pool
+    assert database.circuit["state"] == CircuitBreaker.CLOSED
+    database._pool = None
+
+
+def test_replica_monitor_routes_on_fresh_lag_within_bound():
+    """Test the replica is used only while its last check is recent and within the lag bound."""
+    monitor = ReplicaMonitor(max_lag=5.0, check_interval=2.0)
+    assert monitor.usable() is False
+    
+    monitor.record_lag(1.5)
+    assert monitor.usable() is True
+    
+    monitor.record_lag(7.0)
+    assert monitor.usable() is False
+    assert monitor.snapshot()["routing"] == "primary"
+    
+    monitor.record_lag(0.0)
+    monitor._checked_at -= 10
+    assert monitor.usable() is False
+    
+    monitor.record_lag(0.0)
+    monitor.record_failure("OSError: refused")
+    assert monitor.usable() is False
+    assert monitor.snapshot()["last_error"] == "OSError: refused"
+
+
+class FakeReplicaPool:
+    """Pool whose connections answer fetch/fetchrow, or raise error."""
+    
+    def __init__(self, error=None):
+        self.error = error
+        self.queries = []
+    
+    @asynccontextmanager
+    async def acquire(self):
+        pool = self
+        
+        class Conn:
+            async def fetch(self, query, *args):
+                pool.queries.append(query)
+                if pool.error:
+                    raise pool.error
+                return [{"server": "replica"}]
+            
+            async def fetchrow(self, query, *args):
+                return (await self.fetch(query, *args))[0]
+        
+        yield Conn()
+
+
+def make_replicated(pool):
+    database = Database("postgresql://unused", replica_url="postgresql://replica")
+    database._replica_pool = pool
+    database.replica.record_lag(0.5)
+    
+    async def primary_fetch_all(query, *args):
+        return [{"server": "primary"}]
+    
+    async def primary_fetch_one(query, *args):
+        return {"server": "primary"}
+    
+    database._fetch_all = primary_fetch_all
+    database._fetch_one = primary_fetch_one
+    return database
+
+
+@pytest.mark.asyncio
+async def test_read_only_queries_go_to_replica():
+    """Test SELECTs use the replica; writes and primary=True stay on the primary."""
+    pool = FakeReplicaPool()
+    database = make_replicated(pool)
+    
+    assert await database.fetch_all("SELECT name FROM skills") == [{"server": "replica"}]
+    assert await database.fetch_one("WITH x AS (SELECT 1) SELECT * FROM x") == {"server": "replica"}
+    assert await database.fetch_one("SELECT refresh_skill_trend_rollups()", primary=True) == {"server": "primary"}
+    assert await database.fetch_one("UPDATE users SET name = $1 RETURNING id", "x") == {"server": "primary"}
+    
+    assert len(pool.queries) == 2
+    assert database.replica.reads == 2
+    assert database.replica_status["routing"] == "replica"
+
+
+@pytest.mark.asyncio
+async def test_lagging_or_failing_replica_falls_back_to_primary():
+    """Test reads go to the primary past the lag bound and when the replica errors."""
+    database = make_replicated(FakeReplicaPool())
+    database.replica.record_lag(30.0)
+    
+    assert await database.fetch_all("SELECT 1") == [{"server": "primary"}]
+    assert database.replica.primary_reads == 1
+    
+    database = make_replicated(FakeReplicaPool(error=ConnectionRefusedError("refused")))
+    
+    assert await database.fetch_all("SELECT 1") == [{"server": "primary"}]
+    assert database.replica.available is False
+    # Later reads skip the replica until a lag check succeeds again
+    assert await database.fetch_one("SELECT 2") == {"server": "primary"}
+    assert database.replica.primary_reads == 2
+
+
+class LagPool:
+    """Pool answering the WAL position / lag queries with fixed values."""
+    
+    def __init__(self, value=None, row=None):
+        self.value = value
+        self.row = row
+        self.args = None
+    
+    async def fetchval(self, query, *args, timeout=None):
+        return self.value
+    
+    async def fetchrow(self, query, *args, timeout=None):
+        self.args = args
+        return self.row
+
+
+@pytest.mark.asyncio
+async def test_reachable_but_not_streaming_replica_counts_as_lagging():
+    """Test a standby behind the primary's WAL position is judged by its last replay."""
+    database = Database("postgresql://unused", replica_url="postgresql://replica")
+    database._pool = LagPool(value="0/9D0055D8")
+    # Not caught up with the primary, so no zero-lag shortcut: the age of the
+    # last replayed transaction is the lag
+    database._replica_pool = LagPool(row={"lag_seconds": None, "replay_age": 42.0})
+    
+    await database._check_replica()
+    
+    assert database._replica_pool.args == ("0/9D0055D8",)
+    assert database.replica.lag == 42.0
+    assert database.replica_status["routing"] == "primary"
+    
+    # Caught up with the primary, however old its last transaction
+    database._replica_pool.row = {"lag_seconds": 0.0, "replay_age": 600.0}
+    await database._check_replica()
+    assert database.replica_status["routing"] == "replica"
+    
+    # Nothing replayed yet: unusable
+    database._replica_pool.row = {"lag_seconds": None, "replay_age": None}
+    await database._check_replica()
+    assert database.replica.available is False
+    database._pool = None
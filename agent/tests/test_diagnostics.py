@@ -0,0 +1,68 @@
+"""Tests for profiling and event-loop lag monitoring."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from diagnostics import LoopLagMonitor, profile_loop, sample_stacks
+
+
+def _format_huge_result():
+    """Stand-in for synchronous work that holds the event loop."""
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_lag_monitor_logs_blocking_stack():
+    """A blocking call is recorded as a stall with its stack."""
+    monitor = LoopLagMonitor(interval=0.01, stall_threshold_ms=50)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _format_huge_result()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+    
+    snapshot = monitor.snapshot(include_stack=True)
+    assert snapshot["stalls"] == 1
+    assert "_format_huge_result" in snapshot["last_stall"]["stack"]
+    assert snapshot["max_lag_ms"] >= 250
+    assert snapshot["histogram"]["<=500ms"] == 1
+    assert "stack" not in monitor.snapshot()["last_stall"]
+
+
+def test_sample_stacks_collapses_busy_thread():
+    """Samples of another thread come back as collapsed stacks."""
+    stop = threading.Event()
+    
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+    
+    worker = threading.Thread(target=busy_worker)
+    worker.start()
+    try:
+        stacks = sample_stacks(worker.ident, 0.1, interval=0.001)
+    finally:
+        stop.set()
+        worker.join()
+    
+    assert sum(stacks.values()) > 10
+    assert all(";" in stack for stack in stacks)
+    assert any("busy_worker (test_diagnostics.py" in stack.split(";")[-1] for stack in stacks)
+
+
+@pytest.mark.asyncio
+async def test_profile_loop_reports_functions_run_on_the_loop():
+    """cProfile sees work scheduled on the loop while it runs."""
+    async def blocking_task():
+        await asyncio.sleep(0.01)
+        _format_huge_result()
+    
+    task = asyncio.create_task(blocking_task())
+    report = await profile_loop(0.5)
+    await task
+    
+    assert "_format_huge_result" in report
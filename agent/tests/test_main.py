@@ -1,9 +1,15 @@
 """Tests for the agent service."""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
 import pytest
 from unittest.mock import patch, AsyncMock
 from httpx import AsyncClient, ASGITransport
 
-from main import app
+from main import app, lifespan, startup_timings
 
 
 @pytest.fixture
@@ -21,6 +27,16 @@ def mock_agent():
         yield mock
 
 
+def test_startup_does_not_import_numpy():
+    """numpy is only needed by the matrix tools and snapshots, not to start serving."""
+    agent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    check = "import sys, main; sys.exit('numpy' in sys.modules)"
+    
+    result = subprocess.run([sys.executable, "-c", check], cwd=agent_dir, capture_output=True)
+    
+    assert result.returncode == 0
+
+
 @pytest.mark.asyncio
 async def test_health_check():
     """Test that health endpoint returns healthy status."""
@@ -33,6 +49,7 @@ async def test_health_check():
     assert data["status"] == "healthy"
     assert data["service"] == "agent"
     assert "timestamp" in data
+    assert set(data["log_records_dropped"]) == {"queue_full", "sampled_out"}
 
 
 @pytest.mark.asyncio
@@ -103,6 +120,135 @@ async def test_chat_stream_returns_503_when_unavailable(mock_agent):
     assert response.status_code == 503
 
 
+@pytest.mark.asyncio
+async def test_chat_batch_streams_results_in_completion_order(mock_agent):
+    """Batch answers arrive as they finish and identical tool calls run once."""
+    from tool_tracking import tracked
+    
+    lookups = []
+    
+    @tracked
+    async def find_experts(skill: str, min_level: str = "L300") -> str:
+        lookups.append(skill)
+        await asyncio.sleep(0.01)
+        return f"experts in {skill}"
+    
+    async def fake_run(message):
+        delay, skill = message.split()
+        result = await find_experts(skill)
+        await asyncio.sleep(float(delay))
+        return result
+    
+    mock_agent.is_available = True
+    mock_agent.run = AsyncMock(side_effect=fake_run)
+    
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/chat/batch",
+            json={"messages": ["0.2 Python", "0 Python", "0 Go"]},
+        )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = [line for line in lines if line["type"] == "result"]
+    assert [r["index"] for r in results][-1] == 0
+    assert {r["index"]: r["response"] for r in results} == {
+        0: "experts in Python",
+        1: "experts in Python",
+        2: "experts in Go",
+    }
+    assert sorted(lookups) == ["Go", "Python"]
+    assert lines[-1]["type"] == "done"
+    assert lines[-1]["count"] == 3
+    assert lines[-1]["shared_tool_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_charges_the_rate_limit_per_message(mock_agent):
+    """A batch uses one rate limit hit per message, not one per request."""
+    import main
+    from limits import parse
+    
+    allowed = parse(main.config.rate_limit).amount
+    mock_agent.is_available = True
+    main.limiter.reset()
+    
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            full = await client.post("/chat/batch", json={"messages": ["q"] * allowed})
+            over = await client.post("/chat/batch", json={"messages": ["q"]})
+    finally:
+        main.limiter.reset()
+    
+    assert full.status_code == 200
+    assert over.status_code == 429
+    assert mock_agent.run.await_count == allowed
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_rejects_oversized_batch(mock_agent):
+    """Batches above the configured size are refused before any work starts."""
+    import main
+    
+    mock_agent.is_available = True
+    
+    transport = ASGITransport(app=app)
+    with patch.object(main.config, "batch_max_messages", 2):
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/chat/batch", json={"messages": ["a", "b", "c"]})
+    
+    assert response.status_code == 400
+    mock_agent.run.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_debug_profile_returns_collapsed_stacks():
+    """Sampling profile of the loop thread comes back as collapsed stacks."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/debug/profile", params={"seconds": 0.2})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.strip().splitlines()
+    assert lines
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_debug_endpoints_hidden_in_production():
+    """Profiling and loop internals are not exposed in production."""
+    import main
+    
+    transport = ASGITransport(app=app)
+    with patch.object(main.config, "environment", "production"):
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            profile = await client.get("/debug/profile", params={"seconds": 1})
+            loop = await client.get("/debug/loop")
+    
+    assert profile.status_code == 404
+    assert loop.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_admin_slow_queries_requires_token():
+    """Slow-query log is only served with the admin token once one is set."""
+    import main
+    
+    transport = ASGITransport(app=app)
+    with patch.object(main.config, "admin_token", "s3cret"):
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            denied = await client.get("/admin/slow-queries")
+            allowed = await client.get("/admin/slow-queries", headers={"X-Admin-Token": "s3cret"})
+    
+    assert denied.status_code == 401
+    assert allowed.status_code == 200
+    assert "queries" in allowed.json()
+
+
 @pytest.mark.asyncio
 async def test_agent_status_endpoint(mock_agent):
     """Test agent status endpoint."""
@@ -116,3 +262,52 @@ async def test_agent_status_endpoint(mock_agent):
     data = response.json()
     assert "available" in data
     assert "tools" in data
+
+
+@pytest.mark.asyncio
+async def test_lifespan_initializes_database_and_agent_concurrently():
+    """Test startup overlaps DB connect and agent init and records timings."""
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(0.1)
+        return True
+    
+    with patch("main.config") as mock_config, \
+         patch("main.db") as mock_db, \
+         patch("main.skills_agent") as mock_sa:
+        mock_config.database_url = "postgresql://test"
+        mock_config.azure_openai_endpoint = "https://test"
+        mock_db.connect = AsyncMock(side_effect=slow)
+        mock_db.disconnect = AsyncMock()
+        mock_sa.initialize = AsyncMock(side_effect=slow)
+        mock_sa.cleanup = AsyncMock()
+        
+        async with lifespan(app):
+            pass
+    
+    mock_db.connect.assert_awaited_once()
+    mock_sa.initialize.assert_awaited_once()
+    assert {"imports", "database", "agent", "total"} <= set(startup_timings)
+    assert startup_timings["total"] < 180
+
+
+@pytest.mark.asyncio
+async def test_ready_returns_503_until_warm():
+    """Test readiness endpoint stays unavailable until warm-up finishes."""
+    with patch("main.warmup") as mock_warmup:
+        mock_warmup.is_ready = False
+        mock_warmup.checks.return_value = {"warmup_finished": False}
+        mock_warmup.state = "running"
+        mock_warmup.duration_ms = None
+        mock_warmup.steps = {}
+        
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "not_ready"
+        
+        mock_warmup.is_ready = True
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
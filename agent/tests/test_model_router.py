@@ -0,0 +1,182 @@
+"""Tests for routing agent runs across model deployments."""
+import asyncio
+import time
+
+import pytest
+from agent_framework import (
+    BaseChatClient,
+    ChatResponse,
+    ChatResponseUpdate,
+    Content,
+    RawAgent,
+    ResponseStream,
+)
+
+from model_router import ModelRouter, is_retryable
+
+
+class StatusError(Exception):
+    """Stand-in for an SDK error carrying an HTTP status."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeChatClient(BaseChatClient):
+    """Local chat client that answers after a delay, or fails."""
+
+    def __init__(self, text: str = "hello", delay: float = 0.0, error: Exception = None):
+        super().__init__()
+        self.text = text
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    def _inner_get_response(self, *, messages, stream, options, **kwargs):
+        self.calls += 1
+
+        async def updates():
+            try:
+                await asyncio.sleep(self.delay)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+            if self.error:
+                raise self.error
+            for word in self.text.split(" "):
+                yield ChatResponseUpdate(contents=[Content.from_text(word + " ")], role="assistant")
+
+        if stream:
+            return ResponseStream(updates(), finalizer=ChatResponse.from_updates)
+
+        async def respond():
+            return ChatResponse.from_updates([update async for update in updates()])
+
+        return respond()
+
+
+def _make_agent(clients: dict, hedge_after_ms: float = 50.0):
+    """SkillsAgent routed over fake clients, without the catalog lookup."""
+    from agent import SkillsAgent
+
+    agent = SkillsAgent()
+    agent._create_agents(RawAgent, clients)
+    agent.router = ModelRouter(hedge_after_ms=hedge_after_ms, cooldown=30.0)
+
+    async def no_options():
+        return None
+
+    agent._run_options = no_options
+    return agent
+
+
+async def _collect(agent, message: str = "Who knows Python?") -> list[dict]:
+    return [event async for event in agent.run_stream(message)]
+
+
+@pytest.mark.asyncio
+async def test_stream_hedges_to_second_deployment_when_first_is_slow():
+    """A slow first token starts the next deployment; the first to answer wins."""
+    slow = FakeChatClient("slow answer", delay=5.0)
+    fast = FakeChatClient("fast answer")
+    agent = _make_agent({"primary": slow, "backup": fast})
+
+    started = time.perf_counter()
+    events = await _collect(agent)
+
+    assert time.perf_counter() - started < 2.0
+    assert "".join(e["content"] for e in events if e["type"] == "content") == "fast answer "
+    assert events[-1]["type"] == "done"
+    assert events[-1]["deployment"] == "backup"
+    assert slow.cancelled
+
+    stats = agent.deployment_stats
+    assert stats["backup"]["hedges"] == 1
+    assert stats["backup"]["hedge_wins"] == 1
+    # The loser is charged at least the time it was given
+    assert stats["primary"]["first_token_ms"] >= 50
+    assert agent.router.ranked(["primary", "backup"]) == ["backup", "primary"]
+
+
+@pytest.mark.asyncio
+async def test_stream_does_not_hedge_fast_deployment():
+    """A deployment answering within the threshold is used alone."""
+    primary = FakeChatClient("quick")
+    backup = FakeChatClient("unused")
+    agent = _make_agent({"primary": primary, "backup": backup}, hedge_after_ms=1000)
+
+    events = await _collect(agent)
+
+    assert events[-1]["deployment"] == "primary"
+    assert backup.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_on_throttling():
+    """A 429 moves on to the next deployment and cools the failed one down."""
+    throttled = FakeChatClient(error=StatusError(429))
+    backup = FakeChatClient("from backup")
+    agent = _make_agent({"primary": throttled, "backup": backup}, hedge_after_ms=1000)
+
+    events = await _collect(agent)
+
+    assert [e["type"] for e in events] == ["content", "content", "done"]
+    assert events[-1]["deployment"] == "backup"
+    stats = agent.deployment_stats
+    assert stats["primary"]["failures"] == 1
+    assert stats["primary"]["cooling_down"]
+    assert agent.router.ranked(["primary", "backup"]) == ["backup", "primary"]
+
+
+@pytest.mark.asyncio
+async def test_stream_does_not_fail_over_on_client_error():
+    """A 400 would fail the same way elsewhere, so it is reported."""
+    bad_request = FakeChatClient(error=StatusError(400))
+    backup = FakeChatClient("unused")
+    agent = _make_agent({"primary": bad_request, "backup": backup}, hedge_after_ms=1000)
+
+    events = await _collect(agent)
+
+    assert events[-1]["type"] == "error"
+    assert backup.calls == 0
+    assert not agent.deployment_stats["primary"]["cooling_down"]
+
+
+@pytest.mark.asyncio
+async def test_run_fails_over_on_server_error():
+    """Non-streaming runs fail over too."""
+    broken = FakeChatClient(error=StatusError(503))
+    agent = _make_agent({"primary": broken, "backup": FakeChatClient("all good")})
+
+    result = await agent.run("Who knows Python?")
+
+    assert result.strip() == "all good"
+    assert agent.deployment_stats["primary"]["failures"] == 1
+
+
+def test_is_retryable_follows_wrapped_errors():
+    """Status codes are found on the cause of a framework exception."""
+    try:
+        try:
+            raise StatusError(429)
+        except StatusError as e:
+            raise RuntimeError("service failed") from e
+    except RuntimeError as wrapped:
+        assert is_retryable(wrapped)
+
+    assert is_retryable(StatusError(502))
+    assert is_retryable(ConnectionError("reset"))
+    assert not is_retryable(StatusError(401))
+    assert not is_retryable(ValueError("bad input"))
+
+
+def test_ranked_prefers_lower_latency():
+    """Measured first-token latency orders deployments; unmeasured ones go first."""
+    router = ModelRouter()
+    router._stats("a").record_first_token(900)
+    router._stats("b").record_first_token(300)
+
+    assert router.ranked(["a", "b"]) == ["b", "a"]
+    assert router.ranked(["a", "b", "c"]) == ["c", "b", "a"]
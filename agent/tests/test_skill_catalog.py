@@ -0,0 +1,78 @@
+"""Tests for the prompt skills catalog."""
+from skill_catalog import SkillCatalog, render_catalog
+from skill_index import SkillIndex
+
+
+SKILLS = [
+    {"id": 1, "name": "Python", "category": "Dev"},
+    {"id": 2, "name": "Azure SQL Database", "category": "Data"},
+    {"id": 3, "name": "Bicep", "category": "Dev"},
+    {"id": 4, "name": "Whiteboarding", "category": None},
+]
+
+
+def make_index(skills):
+    index = SkillIndex()
+    index.load_rows(users=[], skills=skills, user_skills=[])
+    return index
+
+
+def test_render_catalog_is_canonical():
+    """Test the rendering ignores load order and IDs."""
+    forward = render_catalog(make_index(SKILLS).skills)
+    reordered = [dict(s, id=s["id"] + 100) for s in reversed(SKILLS)]
+    
+    assert render_catalog(make_index(reordered).skills) == forward
+    assert forward == (
+        "- Data: Azure SQL Database\n"
+        "- Dev: Bicep, Python\n"
+        "- Uncategorized: Whiteboarding"
+    )
+
+
+def test_catalog_version_only_changes_with_content():
+    """Test rebuilding with the same skills keeps the exact prompt text."""
+    catalog = SkillCatalog()
+    catalog.rebuild(make_index(SKILLS))
+    first = catalog.instructions
+    version = catalog.version
+    
+    catalog.rebuild(make_index(list(reversed(SKILLS))))
+    assert catalog.instructions == first
+    assert catalog.rebuilds == 1
+    
+    catalog.rebuild(make_index(SKILLS + [{"id": 5, "name": "Go", "category": "Dev"}]))
+    assert catalog.version != version
+    assert "- Dev: Bicep, Go, Python" in catalog.instructions
+
+
+def test_catalog_version_changes_with_categories():
+    """Test renaming a category or moving a skill between categories re-versions the catalog."""
+    catalog = SkillCatalog()
+    catalog.rebuild(make_index(SKILLS))
+    versions = {catalog.version}
+    
+    renamed = [
+        {**skill, "category": "Development" if skill["category"] == "Dev" else skill["category"]}
+        for skill in SKILLS
+    ]
+    catalog.rebuild(make_index(renamed))
+    versions.add(catalog.version)
+    assert "- Development: Bicep, Python" in catalog.instructions
+    
+    moved = [{**skill, "category": "Data" if skill["id"] == 3 else skill["category"]} for skill in SKILLS]
+    catalog.rebuild(make_index(moved))
+    versions.add(catalog.version)
+    assert "- Data: Azure SQL Database, Bicep" in catalog.instructions
+    
+    assert len(versions) == 3
+
+
+def test_catalog_omitted_when_empty_or_too_large():
+    """Test no catalog section is produced without skills or past the size cap."""
+    catalog = SkillCatalog(max_skills=2)
+    catalog.rebuild(make_index([]))
+    assert catalog.instructions is None
+    
+    catalog.rebuild(make_index(SKILLS))
+    assert catalog.instructions is None
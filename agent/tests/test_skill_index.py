@@ -0,0 +1,161 @@
+"""Tests for the in-memory skill index and team cover search."""
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from db import Database, DatabaseUnavailable
+from skill_index import CHANGE_MARGIN, SkillIndex, greedy_cover, minimum_cover
+
+
+def make_index():
+    index = SkillIndex()
+    index.load_rows(
+        users=[
+            {"id": 1, "name": "Alice", "role": "Engineer", "team": "Platform"},
+            {"id": 2, "name": "Bob", "role": "Developer", "team": "Apps"},
+            {"id": 3, "name": "Cara", "role": "Architect", "team": "Platform"},
+        ],
+        skills=[
+            {"id": 10, "name": "Kubernetes", "category": "Apps"},
+            {"id": 11, "name": "Python", "category": "Dev"},
+            {"id": 12, "name": "Azure SQL Database", "category": "Data"},
+        ],
+        user_skills=[
+            {"user_id": 1, "skill_id": 10, "proficiency_level": "L400"},
+            {"user_id": 1, "skill_id": 11, "proficiency_level": "L200"},
+            {"user_id": 2, "skill_id": 11, "proficiency_level": "L300"},
+            {"user_id": 3, "skill_id": 12, "proficiency_level": "L300"},
+            {"user_id": 3, "skill_id": 11, "proficiency_level": "L300"},
+        ],
+    )
+    return index
+
+
+def test_coverage_respects_level_and_team():
+    """Test requirement bitsets honour minimum level and team filter."""
+    index = make_index()
+    reqs = [(index.mask(index.match_skills("kube")), 3), (index.mask(index.match_skills("python")), 3)]
+    
+    assert index.coverage(reqs) == {1: 0b01, 2: 0b10, 3: 0b10}
+    assert index.coverage(reqs, team="platform") == {1: 0b01, 3: 0b10}
+
+
+def test_minimum_cover_beats_greedy():
+    """Test the exact search finds a smaller cover than greedy when one exists."""
+    # Greedy takes the 3-bit user first and then needs two more
+    candidates = {1: 0b000111, 2: 0b011001, 3: 0b100110, 4: 0b011000, 5: 0b100000}
+    full = 0b111111
+    
+    assert len(greedy_cover(candidates, full, {})) == 3
+    cover = minimum_cover(candidates, full)
+    assert sorted(cover) == [2, 3]
+
+
+def test_minimum_cover_respects_max_size():
+    """Test max_size returns the best partial cover when no full cover fits."""
+    candidates = {1: 0b001, 2: 0b010, 3: 0b100}
+    
+    assert len(minimum_cover(candidates, 0b111, max_size=2)) == 2
+
+
+def test_minimum_cover_is_fast_at_thousands_of_users():
+    """Test cover search over thousands of users stays in the millisecond range."""
+    rng = random.Random(7)
+    candidates = {u: rng.getrandbits(8) for u in range(5000)}
+    
+    start = time.perf_counter()
+    cover = minimum_cover(candidates, 0xFF)
+    elapsed = time.perf_counter() - start
+    
+    covered = 0
+    for user_id in cover:
+        covered |= candidates[user_id]
+    assert covered == 0xFF
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_build_team_tool():
+    """Test build_team returns one cover in a single call."""
+    from tools import build_team
+    
+    index = make_index()
+    with patch("tools.skill_index", index):
+        index.ensure_loaded = AsyncMock()
+        result = await build_team(["Kubernetes", "SQL", "Rust"], "L300")
+    
+    assert "Suggested Team (2 person(s)" in result
+    assert "Alice" in result and "Cara" in result
+    assert "Covers 2 of 2 requested skills" in result
+    assert "Unknown skills:** Rust" in result
+
+
+def unreachable_database():
+    """A real Database whose pool can never be created."""
+    database = Database("postgresql://unused", reset_timeout=60)
+    
+    async def refuse():
+        raise OSError("connection refused")
+    
+    database._create_pool = refuse
+    return database
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_previous_index():
+    """Test a reload during an outage keeps the last good data and stays due."""
+    index = make_index()
+    # Due for a full reload
+    index.loaded_at = None
+    index.full_loaded_at = None
+    database = unreachable_database()
+    
+    with patch("skill_index.db", database):
+        await index.ensure_loaded()
+    await database.disconnect()
+    
+    assert len(index.users) == 3
+    assert index.level_bits == make_index().level_bits
+    assert index.full_loaded_at is None
+    assert index.is_stale
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_picks_up_late_commits():
+    """Test a row stamped just before the mark, but committed after the last poll, is applied."""
+    index = make_index()
+    index.full_loaded_at = time.monotonic()
+    index.loaded_at = None
+    index.high_water_mark = datetime(2026, 3, 2, 12, 0)
+    late = {
+        "user_id": 2, "skill_id": 10, "proficiency_level": "L200",
+        "last_updated": index.high_water_mark - timedelta(seconds=20),
+    }
+    
+    with patch("skill_index.db") as mock_db:
+        mock_db.fetch_all = AsyncMock(return_value=[late])
+        mock_db.fetch_one = AsyncMock(return_value={"version": index.catalog_version})
+        await index.ensure_loaded()
+    
+    assert mock_db.fetch_all.await_args.args[1] == datetime(2026, 3, 2, 12, 0) - CHANGE_MARGIN
+    assert index.user_levels[2][10] == 2
+    # The mark never moves backwards
+    assert index.high_water_mark == datetime(2026, 3, 2, 12, 0)
+
+
+@pytest.mark.asyncio
+async def test_cold_start_during_outage_raises():
+    """Test an index with nothing to fall back on reports the outage instead of being empty."""
+    index = SkillIndex()
+    database = unreachable_database()
+    
+    with patch("skill_index.db", database):
+        with pytest.raises(DatabaseUnavailable):
+            await index.ensure_loaded()
+    await database.disconnect()
+    
+    assert index.users == {}
+    assert index.is_stale
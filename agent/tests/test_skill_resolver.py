@@ -0,0 +1,77 @@
+"""Tests for typo-tolerant skill resolution."""
+from skill_index import SkillIndex
+from skill_resolver import BKTree, SkillResolver, levenshtein
+
+
+def make_index(skills, aliases=None):
+    index = SkillIndex()
+    index.load_rows(users=[], skills=skills, user_skills=[], aliases=aliases)
+    return index
+
+
+SKILLS = [
+    {"id": 1, "name": "Azure Kubernetes Service (AKS)", "category": "Apps"},
+    {"id": 2, "name": "Azure Cosmos DB", "category": "Data"},
+    {"id": 3, "name": "Python", "category": "Dev"},
+    {"id": 4, "name": "Azure Data Factory", "category": "Data"},
+]
+
+
+def make_resolver():
+    resolver = SkillResolver()
+    resolver.rebuild(make_index(SKILLS, [{"alias": "k8s", "skill_id": 1}]))
+    return resolver
+
+
+def test_levenshtein():
+    """Test edit distance on small cases."""
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("", "abc") == 3
+    assert levenshtein("same", "same") == 0
+
+
+def test_bk_tree_matches_brute_force():
+    """Test BK-tree search returns exactly the terms within the distance."""
+    words = ["python", "pythons", "typhon", "kubernetes", "cosmos", "cosmo", "postgres", "terraform"]
+    tree = BKTree()
+    for word in words:
+        tree.add(word)
+    for query in ["pythn", "cosmso", "kubernets", "xyz"]:
+        expected = {(w, levenshtein(query, w)) for w in words if levenshtein(query, w) <= 2}
+        assert set(tree.search(query, 2)) == expected
+
+
+def test_resolve_typos_aliases_and_acronyms():
+    """Test misspellings, aliases and acronyms resolve to the right skill."""
+    resolver = make_resolver()
+    
+    assert resolver.resolve("kubernets")[0].skill_id == 1
+    assert resolver.resolve("k8s")[0].confidence == 1.0
+    assert resolver.resolve("aks")[0].skill_id == 1
+    assert resolver.resolve("adf")[0].skill_id == 4
+    assert resolver.resolve("cosmso")[0].skill_id == 2
+    assert resolver.resolve("Azure Kubernets")[0].skill_id == 1
+    assert resolver.resolve("pythn")[0].name == "Python"
+    assert resolver.resolve("zzzz") == []
+
+
+def test_resolve_ranks_exact_above_fuzzy():
+    """Test an exact name outranks a near miss."""
+    resolver = make_resolver()
+    candidates = resolver.resolve("python")
+    
+    assert candidates[0].skill_id == 3
+    assert candidates[0].confidence == 1.0
+
+
+def test_rebuild_only_touches_changed_terms():
+    """Test new skills are added and removed skills stop resolving."""
+    resolver = make_resolver()
+    tree = resolver.tree
+    
+    skills = [s for s in SKILLS if s["id"] != 2] + [{"id": 5, "name": "Terraform", "category": "Infra"}]
+    resolver.rebuild(make_index(skills, [{"alias": "k8s", "skill_id": 1}]))
+    
+    assert resolver.tree is tree
+    assert resolver.resolve("terrafrom")[0].skill_id == 5
+    assert resolver.resolve("cosmos") == []
@@ -0,0 +1,157 @@
+"""Tests for the on-disk skill index snapshot."""
+import os
+import threading
+from datetime import datetime
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+import skill_snapshot
+from skill_index import CHANGE_MARGIN, SkillIndex
+
+
+def make_index():
+    index = SkillIndex()
+    index.load_rows(
+        users=[
+            {"id": 1, "name": "Alice", "role": "Engineer", "team": "Platform"},
+            {"id": 2, "name": "Bob", "role": None, "team": "Platform"},
+            {"id": 5, "name": "Zoë", "role": "Architect", "team": None},
+        ],
+        skills=[
+            {"id": 10, "name": "Kubernetes", "category": "Apps"},
+            {"id": 11, "name": "Python", "category": "Dev"},
+            {"id": 12, "name": "Terraform", "category": None},
+        ],
+        user_skills=[
+            {"user_id": 1, "skill_id": 10, "proficiency_level": "L400", "last_updated": datetime(2026, 3, 1, 9, 30)},
+            {"user_id": 2, "skill_id": 11, "proficiency_level": "L200", "last_updated": datetime(2026, 3, 2, 8, 0, 0, 123456)},
+            {"user_id": 5, "skill_id": 12, "proficiency_level": "L300", "last_updated": datetime(2026, 2, 1)},
+        ],
+        aliases=[{"alias": "k8s", "skill_id": 10}],
+    )
+    index.catalog_version = "0123456789abcdef0123456789abcdef"
+    return index
+
+
+def test_snapshot_round_trip(tmp_path):
+    """A snapshot restores the same index, high-water mark and catalog version."""
+    index = make_index()
+    path = str(tmp_path / "skills.snap")
+    skill_snapshot.write(path, skill_snapshot.encode(index))
+
+    restored = SkillIndex()
+    assert restored.load_snapshot(path)
+
+    assert restored.users == index.users
+    assert restored.skills == index.skills
+    assert restored.skill_bits == index.skill_bits
+    assert restored.aliases == {"k8s": 10}
+    assert restored.user_levels == index.user_levels
+    assert restored.level_bits == index.level_bits
+    assert restored.high_water_mark == datetime(2026, 3, 2, 8, 0, 0, 123456)
+    assert restored.catalog_version == index.catalog_version
+    # Served from the snapshot, but due a catch-up on next use
+    assert restored.is_stale
+    assert os.listdir(tmp_path) == ["skills.snap"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_encoded_off_the_event_loop(tmp_path):
+    """The loop only copies the index; changes made after that are not in the file."""
+    index = make_index()
+    index.snapshot_path = str(tmp_path / "skills.snap")
+    encoded_on = []
+    encode = skill_snapshot.encode
+
+    def recording_encode(state):
+        encoded_on.append(threading.get_ident())
+        return encode(state)
+
+    with patch("skill_snapshot.encode", recording_encode):
+        index._schedule_save()
+        index.apply_changes([{"user_id": 1, "skill_id": 11, "proficiency_level": "L100"}])
+        await index._save_task
+
+    assert encoded_on and encoded_on[0] != threading.get_ident()
+    restored = SkillIndex()
+    restored.load_snapshot(index.snapshot_path)
+    assert restored.user_levels[1] == {10: 4}
+
+
+def test_snapshot_strings_are_interned(tmp_path):
+    """Repeated teams and roles are stored once."""
+    data = skill_snapshot.encode(make_index())
+
+    assert data.count(b"Platform") == 1
+
+
+def test_corrupt_or_missing_snapshot_is_ignored(tmp_path):
+    """A damaged file is rejected by its checksum and the index stays empty."""
+    path = tmp_path / "skills.snap"
+    data = bytearray(skill_snapshot.encode(make_index()))
+    data[-9] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    index = SkillIndex()
+    assert not index.load_snapshot(str(path))
+    assert not index.load_snapshot(str(tmp_path / "missing.snap"))
+    assert index.users == {}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_catches_up_incrementally_and_is_rewritten(tmp_path):
+    """After a snapshot load only changes since its high-water mark are fetched."""
+    path = str(tmp_path / "skills.snap")
+    source = make_index()
+    skill_snapshot.write(path, skill_snapshot.encode(source))
+
+    index = SkillIndex()
+    index.load_snapshot(path)
+    index.snapshot_path = path
+    change = {"user_id": 2, "skill_id": 10, "proficiency_level": "L300", "last_updated": datetime(2026, 3, 3)}
+
+    with patch("skill_index.db") as mock_db:
+        mock_db.fetch_all = AsyncMock(return_value=[change])
+        mock_db.fetch_one = AsyncMock(return_value={"version": source.catalog_version})
+        await index.ensure_loaded()
+        await index._save_task
+
+    # One incremental query from just behind the snapshot's mark, no full scan
+    assert mock_db.fetch_all.await_count == 1
+    assert mock_db.fetch_all.await_args.args[1] == datetime(2026, 3, 2, 8, 0, 0, 123456) - CHANGE_MARGIN
+    assert index.user_levels[2] == {11: 2, 10: 3}
+
+    rewritten = SkillIndex()
+    rewritten.load_snapshot(path)
+    assert rewritten.user_levels == index.user_levels
+    assert rewritten.high_water_mark == datetime(2026, 3, 3)
+
+
+@pytest.mark.asyncio
+async def test_reload_during_outage_keeps_snapshot(tmp_path):
+    """A reload that cannot reach the database keeps both the index and the file."""
+    from db import Database
+
+    path = tmp_path / "skills.snap"
+    skill_snapshot.write(str(path), skill_snapshot.encode(make_index()))
+    before = path.read_bytes()
+
+    index = SkillIndex()
+    index.load_snapshot(str(path))
+    index.snapshot_path = str(path)
+    # Due for the periodic full reload
+    index.full_loaded_at -= index.full_reload_interval + 1
+    database = Database("postgresql://unused", reset_timeout=60)
+
+    async def refuse():
+        raise OSError("connection refused")
+
+    database._create_pool = refuse
+    with patch("skill_index.db", database):
+        await index.ensure_loaded()
+    await database.disconnect()
+
+    assert len(index.users) == 3
+    assert index._save_task is None
+    assert path.read_bytes() == before
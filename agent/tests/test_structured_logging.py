@@ -0,0 +1,108 @@
+"""Tests for the queue-based JSON logging pipeline."""
+import json
+import logging
+import queue
+
+from structured_logging import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    configure_logging,
+    dropped_records,
+    parse_sample_rates,
+)
+
+
+def make_record(name="tools", level=logging.INFO, msg="called with %s", args=(["python"],), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_message_and_extras():
+    """Records become one JSON object with the interpolated message and extra fields."""
+    line = JsonFormatter().format(make_record(request_id="abc"))
+    entry = json.loads(line)
+    
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "tools"
+    assert entry["message"] == "called with ['python']"
+    assert entry["request_id"] == "abc"
+    assert entry["ts"].endswith("+00:00")
+
+
+def test_sampling_filter_keeps_share_of_hot_logger():
+    """One in ten tools records is kept; other loggers and warnings always pass."""
+    sampler = SamplingFilter(parse_sample_rates("tools=0.1"))
+    
+    kept = sum(sampler.filter(make_record()) for _ in range(100))
+    
+    assert kept == 10
+    assert sampler.dropped == 90
+    # Child loggers share the parent's rate with their own count
+    assert sampler.filter(make_record(name="tools.sub"))
+    assert all(sampler.filter(make_record(level=logging.WARNING)) for _ in range(5))
+    assert all(sampler.filter(make_record(name="db")) for _ in range(5))
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    """The caller only enqueues; a full queue drops instead of blocking."""
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+    record = make_record(args=("python", 3))
+    
+    handler.handle(record)
+    handler.handle(make_record())
+    
+    queued = log_queue.get_nowait()
+    assert queued is record
+    assert queued.args == ("python", 3)
+    assert handler.dropped == 1
+
+
+def test_queue_handler_renders_mutable_args_at_call_time():
+    """A list changed after the log call is logged as it was at the call."""
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    skills = ["python"]
+    
+    handler.handle(make_record(args=(skills,)))
+    skills.append("go")
+    
+    queued = log_queue.get_nowait()
+    assert queued.args is None
+    assert queued.getMessage() == "called with ['python']"
+
+
+def test_dropped_records_counts_queue_and_sampling_losses():
+    """Both kinds of dropped record are reported from the root handler."""
+    root = logging.getLogger()
+    previous = list(root.handlers)
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    sampler = SamplingFilter({"tools": 0.5})
+    handler.addFilter(sampler)
+    try:
+        root.handlers[:] = [handler]
+        for _ in range(4):
+            handler.handle(make_record())
+        assert dropped_records() == {"queue_full": 1, "sampled_out": 2}
+    finally:
+        root.handlers[:] = previous
+
+
+def test_configure_logging_writes_json_from_background_thread(capsys):
+    """Log lines reach stderr as JSON once the listener drains the queue."""
+    root = logging.getLogger()
+    previous = (list(root.handlers), root.level)
+    try:
+        listener = configure_logging(level="INFO", sample_rates={"tools": 0.5})
+        for i in range(4):
+            logging.getLogger("tools").info("call %d", i)
+        logging.getLogger("tools").error("failed")
+        listener.stop()
+    finally:
+        root.handlers[:] = previous[0]
+        root.setLevel(previous[1])
+    
+    entries = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [e["message"] for e in entries] == ["call 0", "call 2", "failed"]
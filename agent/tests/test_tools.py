@@ -7,13 +7,14 @@ from tools import (
     get_team_skill_gaps,
     get_skill_summary,
     list_all_skills,
+    get_skill_trends,
 )
 
 
 @pytest.fixture
 def mock_db():
     """Mock database for testing."""
-    with patch("tools.db") as mock:
+    with patch("tools.db") as mock, patch("tools.skill_index.ensure_loaded", AsyncMock()):
         mock.fetch_all = AsyncMock()
         mock.fetch_one = AsyncMock()
         yield mock
@@ -142,3 +143,150 @@ async def test_list_all_skills_empty(mock_db):
     result = await list_all_skills()
     
     assert "No skills found" in result
+
+
+@pytest.mark.asyncio
+async def test_find_experts_normalizes_arguments(mock_db):
+    """Test equivalent skill lists produce identical query arguments."""
+    mock_db.fetch_all.return_value = []
+    
+    await find_experts_by_skills(["Python ", "azure"], "l300")
+    await find_experts_by_skills(["AZURE", "python", "Python"], "L300")
+    
+    first, second = mock_db.fetch_all.call_args_list
+    assert first.args == second.args
+    assert first.args[1:] == (3, True, "%azure%", "%python%", [])
+
+
+@pytest.mark.asyncio
+async def test_find_experts_marks_hierarchy_matches(mock_db):
+    """Test descendant matches are labelled with the skill they came from."""
+    mock_db.fetch_all.return_value = [
+        {
+            "user_name": "Alice",
+            "role": "Engineer",
+            "team": "Platform",
+            "skill_name": "Azure Container Apps",
+            "proficiency_level": "L300",
+            "category": "Apps & AI",
+            "hierarchy_depth": 1,
+            "matched_via": "Azure Kubernetes Service (AKS)",
+        },
+    ]
+    
+    result = await find_experts_by_skills(["AKS"])
+    
+    assert "Azure Container Apps: L300 (Practitioner) [under Azure Kubernetes Service (AKS)]" in result
+
+
+@pytest.mark.asyncio
+async def test_find_experts_can_skip_hierarchy(mock_db):
+    """Test include_related=False is passed through to the query."""
+    mock_db.fetch_all.return_value = []
+    
+    await find_experts_by_skills(["AKS"], include_related=False)
+    
+    assert mock_db.fetch_all.call_args.args[2] is False
+
+
+@pytest.mark.asyncio
+async def test_get_skill_trends_reads_rollups(mock_db):
+    """Test trends refresh the rollups once per interval and tabulate weekly counts."""
+    from datetime import date
+    mock_db.fetch_one.return_value = {"folded": 2}
+    mock_db.fetch_all.side_effect = [
+        [{"bucket": date(2026, 10, 5), "l100": None, "l200": 1, "l300": 2, "l400": None}],
+        [{"name": "Python", "changes": 2}],
+        [{"bucket": date(2026, 10, 5), "l100": None, "l200": 1, "l300": 2, "l400": None}],
+        [{"name": "Python", "changes": 2}],
+    ]
+    
+    with patch("tools._trends_refreshed_at", None):
+        result = await get_skill_trends(skill="Python", weeks=4)
+        await get_skill_trends(skill="Python", weeks=4)
+    
+    assert mock_db.fetch_one.await_count == 1
+    assert "refresh_skill_trend_rollups" in mock_db.fetch_one.call_args.args[0]
+    assert "skill_trend_rollups" in mock_db.fetch_all.call_args_list[0].args[0]
+    assert mock_db.fetch_all.call_args_list[0].args[1:] == (4, "%python%", None)
+    assert "| 2026-10-05 | 0 | 1 | 2 | 0 |" in result
+    assert "- Python: 2 change(s)" in result
+
+
+@pytest.mark.asyncio
+async def test_find_experts_includes_resolved_skills(mock_db):
+    """Test misspelled terms are resolved to skill IDs and reported."""
+    from skill_resolver import SkillCandidate
+    mock_db.fetch_all.return_value = [
+        {
+            "user_name": "Alice",
+            "role": "Engineer",
+            "team": "Platform",
+            "skill_name": "Kubernetes",
+            "proficiency_level": "L300",
+            "category": "Apps",
+            "hierarchy_depth": 0,
+            "matched_via": None,
+        },
+    ]
+    candidate = SkillCandidate(skill_id=10, name="Kubernetes", confidence=0.9, matched="kubernetes")
+    
+    with patch("tools.skill_resolver.resolve", return_value=[candidate]):
+        result = await find_experts_by_skills(["kubernets"])
+    
+    assert mock_db.fetch_all.call_args.args[-1] == [10]
+    assert "Interpreted 'kubernets' as Kubernetes (90% match)" in result
+
+
+@pytest.mark.asyncio
+async def test_find_experts_filters_on_level_rank(mock_db):
+    """Test the level filter uses the indexed level_rank column instead of CASE."""
+    mock_db.fetch_all.return_value = []
+    
+    await find_experts_by_skills(["python"], "L300")
+    
+    query = mock_db.fetch_all.call_args.args[0]
+    assert "us.level_rank >= $1" in query
+    assert "CASE" not in query
+
+
+@pytest.mark.asyncio
+async def test_find_experts_team_scope(mock_db):
+    """Test team and role scope are added to the users join as parameters."""
+    mock_db.fetch_all.return_value = []
+    
+    result = await find_experts_by_skills(["python"], team=" Platform ", role="Architect")
+    
+    args = mock_db.fetch_all.call_args.args
+    assert "LOWER(u.team) = $5" in args[0]
+    assert "LOWER(u.role) ILIKE $6" in args[0]
+    assert args[-2:] == ("platform", "%architect%")
+    assert "(team Platform, role Architect)" in result
+
+
+@pytest.mark.asyncio
+async def test_get_skill_gaps_for_team_reads_coverage(mock_db):
+    """Test team-only gap analysis reads the precomputed team coverage."""
+    mock_db.fetch_one.return_value = {"members": 3}
+    mock_db.fetch_all.return_value = [
+        {"skill_name": "Rust", "category": "Dev", "total_users": 0, "expert_count": 0, "highest_level": None},
+    ]
+    
+    result = await get_team_skill_gaps(team="Platform")
+    
+    query, team = mock_db.fetch_all.call_args.args
+    assert "team_skill_coverage" in query
+    assert team == "platform"
+    assert "Team Skill Gap Analysis (team Platform)" in result
+    assert "**Rust**" in result
+
+
+@pytest.mark.asyncio
+async def test_get_skill_gaps_unknown_team(mock_db):
+    """Test an empty team is reported instead of listing every skill as a gap."""
+    mock_db.fetch_one.return_value = {"members": 0}
+    
+    result = await get_team_skill_gaps(team="Nobody")
+    
+    assert result == "No team members found (team Nobody)."
+    mock_db.fetch_all.assert_not_called()
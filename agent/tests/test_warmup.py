@@ -0,0 +1,71 @@
+"""Tests for startup warm-up and readiness."""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from warmup import WarmUp
+
+
+@pytest.fixture
+def deps():
+    """Patch the warm-up's database, agent, config and tools."""
+    with patch("warmup.db") as mock_db, \
+         patch("warmup.skills_agent") as mock_agent, \
+         patch("warmup.config") as mock_config, \
+         patch("warmup.find_experts_by_skills", AsyncMock()) as experts, \
+         patch("warmup.get_team_skill_gaps", AsyncMock()), \
+         patch("warmup.get_skill_summary", AsyncMock()), \
+         patch("warmup.list_all_skills", AsyncMock()), \
+         patch("warmup.build_team", AsyncMock()):
+        mock_db.is_connected = True
+        mock_db.fill_pool = AsyncMock(return_value=1)
+        mock_agent.is_available = True
+        mock_config.database_url = "postgresql://test"
+        mock_config.azure_openai_endpoint = "https://test"
+        mock_config.warmup_timeout = 5
+        yield {"db": mock_db, "agent": mock_agent, "experts": experts}
+
+
+@pytest.mark.asyncio
+async def test_ready_only_after_warmup(deps):
+    """Test readiness flips once every warm-up step has run."""
+    warm = WarmUp()
+    assert not warm.is_ready
+    
+    await warm.run()
+    
+    assert warm.state == "complete"
+    assert warm.is_ready
+    deps["db"].fill_pool.assert_awaited_once()
+    deps["experts"].assert_awaited_once()
+    assert all(step["ok"] for step in warm.steps.values())
+
+
+@pytest.mark.asyncio
+async def test_warmup_is_bounded_by_timeout(deps):
+    """Test a hung step does not keep warm-up running past its timeout."""
+    async def hang():
+        await asyncio.sleep(10)
+    
+    deps["db"].fill_pool.side_effect = hang
+    warm = WarmUp()
+    
+    await warm.run(timeout=0.05)
+    
+    assert warm.state == "timed_out"
+    assert warm.finished
+    assert warm.duration_ms < 1000
+
+
+@pytest.mark.asyncio
+async def test_not_ready_when_agent_configured_but_unavailable(deps):
+    """Test a configured-but-missing agent client blocks readiness."""
+    deps["agent"].is_available = False
+    warm = WarmUp()
+    
+    await warm.run()
+    
+    assert warm.steps["agent"]["ok"] is False
+    assert warm.checks()["agent"] is False
+    assert not warm.is_ready
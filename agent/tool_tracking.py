@@ -0,0 +1,168 @@
+"""Per-run timing and row counts for agent tool calls.
+
+Tools are registered through as_tool(), which wraps them in tracked() to
+measure each call and count the database rows it read. While a streaming run
+is active its ToolTracker is installed in a context variable, so the stream
+can attach those numbers to the tool_end events it emits, matched by the
+call_id the model gave each call.
+
+Runs that belong together, such as the questions of one /chat/batch request,
+can install a SharedToolCalls so identical tool calls among them execute once.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+from db import track_rows
+
+_active_tracker: ContextVar[Optional["ToolTracker"]] = ContextVar("active_tool_tracker", default=None)
+_shared_calls: ContextVar[Optional["SharedToolCalls"]] = ContextVar("shared_tool_calls", default=None)
+_current_call_id: ContextVar[Optional[str]] = ContextVar("current_tool_call_id", default=None)
+
+
+class ToolTracker:
+    """Finished tool calls of one run, keyed by call_id.
+
+    Calls made without a call_id, such as a tool invoked directly rather than
+    by the framework, are queued per tool name in completion order instead.
+    """
+
+    def __init__(self):
+        self._by_call_id: dict[str, dict] = {}
+        self._finished: dict[str, deque[dict]] = defaultdict(deque)
+
+    def record(
+        self,
+        call_id: Optional[str],
+        name: str,
+        duration_ms: float,
+        rows: int,
+        error: Optional[str] = None,
+    ) -> None:
+        stats = {"duration_ms": duration_ms, "rows": rows, "error": error}
+        if call_id is not None:
+            self._by_call_id[call_id] = stats
+        else:
+            self._finished[name].append(stats)
+
+    def pop(self, call_id: Optional[str], name: str) -> Optional[dict]:
+        """Stats of the given call, else the oldest unreported call of the named tool."""
+        if call_id is not None and call_id in self._by_call_id:
+            return self._by_call_id.pop(call_id)
+        queue = self._finished.get(name)
+        return queue.popleft() if queue else None
+
+    def activate(self):
+        """Install this tracker for the current context; returns a token for deactivate()."""
+        return _active_tracker.set(self)
+
+    @staticmethod
+    def deactivate(token) -> None:
+        _active_tracker.reset(token)
+
+
+class SharedToolCalls:
+    """Tool results shared by a group of runs.
+
+    Unlike db.SingleFlight, finished results are kept for the life of the
+    group, so a question that repeats an earlier lookup reuses its answer.
+    Failed calls are dropped so the next caller retries them.
+    """
+
+    def __init__(self):
+        self._results: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def install(self) -> None:
+        """Share tool calls made from the current task and the tasks it starts."""
+        _shared_calls.set(self)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or reuse the result of the call already made for it."""
+        self.calls += 1
+        task = self._results.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._results[key] = task
+            task.add_done_callback(lambda t: self._drop_failed(key, t))
+        # Shield so one cancelled run does not cancel a call others are waiting on
+        return await asyncio.shield(task)
+
+    def _drop_failed(self, key: str, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            if self._results.get(key) is task:
+                del self._results[key]
+
+
+def _call_key(fn: Callable[..., Any], args: tuple, kwargs: dict) -> str:
+    """Canonical key for a tool call, with defaults filled in."""
+    bound = inspect.signature(fn).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return json.dumps([fn.__name__, bound.arguments], sort_keys=True, default=str)
+
+
+def tracked(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a tool so its duration and rows read are reported to the active tracker.
+
+    functools.wraps keeps the name, docstring and signature the framework
+    builds the tool schema from.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        error = None
+        with track_rows() as rows:
+            try:
+                shared = _shared_calls.get()
+                if shared is not None:
+                    return await shared.do(_call_key(fn, args, kwargs), lambda: fn(*args, **kwargs))
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                tracker = _active_tracker.get()
+                if tracker is not None:
+                    duration_ms = round((time.perf_counter() - start) * 1000, 1)
+                    tracker.record(_current_call_id.get(), fn.__name__, duration_ms, rows[0], error)
+
+    return wrapper
+
+
+@functools.cache
+def _call_id_tool_class() -> type:
+    # Deferred so importing this module does not load the agent framework
+    from agent_framework import FunctionTool
+
+    class CallIdTool(FunctionTool):
+        """FunctionTool that tells tracked() which model call it is serving.
+
+        The framework passes the call_id to invoke() but not on to the
+        function, so it is handed over through a context variable.
+        """
+
+        async def invoke(self, *, tool_call_id: Optional[str] = None, **kwargs: Any) -> Any:
+            token = _current_call_id.set(tool_call_id)
+            try:
+                return await super().invoke(tool_call_id=tool_call_id, **kwargs)
+            finally:
+                _current_call_id.reset(token)
+
+    return CallIdTool
+
+
+def as_tool(fn: Callable[..., Awaitable[Any]]) -> Any:
+    """Register fn with the agent framework, tracked and matched to its call_id."""
+    return _call_id_tool_class()(
+        name=fn.__name__,
+        description=fn.__doc__ or "",
+        func=tracked(fn),
+    )
@@ -3,71 +3,174 @@
 These tools allow the AI agent to query team skills data.
 """
 import logging
+import time
 from typing import Optional
 
 from db import db
+from skill_index import LEVELS, minimum_cover, skill_index
+from skill_resolver import normalize, skill_resolver
 
 logger = logging.getLogger(__name__)
 
+# How often get_skill_trends folds new history rows into the rollups
+TREND_REFRESH_INTERVAL = 60.0
+_trends_refreshed_at: Optional[float] = None
 
-async def find_experts_by_skills(skills: list[str], min_proficiency: str = "L200") -> str:
+
+def _user_scope(team: Optional[str], role: Optional[str], first_param: int, alias: str = "u") -> tuple[str, list]:
+    """SQL conditions restricting users to a team and/or role.
+    
+    Args:
+        team: Team name (case-insensitive exact match, served by idx_users_team)
+        role: Role text (case-insensitive partial match)
+        first_param: Number of the first $n placeholder to use
+        alias: Alias of the users table in the query
+    
+    Returns:
+        (conditions joined with AND, or "" when unscoped; their arguments)
+    """
+    conditions, args = [], []
+    if team and team.strip():
+        args.append(team.strip().lower())
+        conditions.append(f"LOWER({alias}.team) = ${first_param + len(args) - 1}")
+    if role and role.strip():
+        args.append(f"%{role.strip().lower()}%")
+        conditions.append(f"LOWER({alias}.role) ILIKE ${first_param + len(args) - 1}")
+    return " AND ".join(conditions), args
+
+
+def _scope_label(team: Optional[str], role: Optional[str]) -> str:
+    parts = []
+    if team and team.strip():
+        parts.append(f"team {team.strip()}")
+    if role and role.strip():
+        parts.append(f"role {role.strip()}")
+    return f" ({', '.join(parts)})" if parts else ""
+
+
+async def find_experts_by_skills(
+    skills: list[str],
+    min_proficiency: str = "L200",
+    include_related: bool = True,
+    team: Optional[str] = None,
+    role: Optional[str] = None,
+) -> str:
     """Find team members who have expertise in the specified skills.
     
+    Matching also follows the skill hierarchy: asking for a parent skill
+    (e.g. "Azure") finds people who only list its child skills. Exact matches
+    are ranked above hierarchy matches.
+    
     Args:
-        skills: List of skill names to search for (case-insensitive partial match)
+        skills: List of skill names to search for (case-insensitive partial
+            match; misspellings, acronyms and aliases such as "k8s" are also resolved)
         min_proficiency: Minimum proficiency level (L100, L200, L300, L400)
+        include_related: Also match descendants of the named skills
+        team: Only search members of this team
+        role: Only search people whose role contains this text
     
     Returns:
         Formatted string describing team members and their skill levels
     """
-    logger.info(f"find_experts_by_skills called with skills={skills}, min_proficiency={min_proficiency}")
-    logger.info(f"Database connected: {db.is_connected}")
+    # %-style arguments: the message is only built if the record is kept,
+    # and then on the logging thread
+    logger.info("find_experts_by_skills called with skills=%s, min_proficiency=%s", skills, min_proficiency)
+    logger.debug("Database connected: %s", db.is_connected)
+    
+    # Normalize so equivalent requests produce identical queries (and coalesce in db)
+    skills = sorted({skill.strip().lower() for skill in skills if skill and skill.strip()})
+    min_proficiency = min_proficiency.strip().upper()
     
     if not skills:
         return "No skills specified. Please provide at least one skill to search for."
     
     # Build query with skill name patterns
-    skill_patterns = [f"%{skill.lower()}%" for skill in skills]
-    placeholders = ", ".join(f"${i+2}" for i in range(len(skill_patterns)))
-    
-    proficiency_order = {"L100": 1, "L200": 2, "L300": 3, "L400": 4}
-    min_level = proficiency_order.get(min_proficiency, 2)
-    
+    skill_patterns = [f"%{skill}%" for skill in skills]
+    placeholders = ", ".join(f"${i+3}" for i in range(len(skill_patterns)))
+    
+    # The fuzzy resolver adds skills the patterns would miss ("kubernets", "k8s")
+    await skill_index.ensure_loaded()
+    interpreted = {
+        skill: [c for c in skill_resolver.resolve(skill, limit=3, min_confidence=0.75) if skill not in normalize(c.name)]
+        for skill in skills
+    }
+    resolved_ids = sorted({c.skill_id for candidates in interpreted.values() for c in candidates})
+    ids_placeholder = f"${len(skill_patterns) + 3}"
+    scope, scope_args = _user_scope(team, role, len(skill_patterns) + 4)
+    scope_join = f" AND {scope}" if scope else ""
+    
+    min_level = LEVELS.get(min_proficiency, 2)
+    
+    # skill_closure holds the precomputed transitive closure of
+    # skill_relationships, so descendants come from one indexed join
     query = f"""
-        SELECT 
-            u.name as user_name,
-            u.role,
-            u.team,
-            s.name as skill_name,
-            us.proficiency_level,
-            sc.name as category
-        FROM user_skills us
-        JOIN users u ON us.user_id = u.id
-        JOIN skills s ON us.skill_id = s.id
-        LEFT JOIN skill_categories sc ON s.category_id = sc.id
-        WHERE LOWER(s.name) ILIKE ANY(ARRAY[{placeholders}])
-        AND CASE us.proficiency_level 
-            WHEN 'L100' THEN 1 
-            WHEN 'L200' THEN 2 
-            WHEN 'L300' THEN 3 
-            WHEN 'L400' THEN 4 
-        END >= $1
+        WITH matched AS (
+            SELECT id, name FROM skills
+            WHERE LOWER(name) ILIKE ANY(ARRAY[{placeholders}])
+            OR id = ANY({ids_placeholder}::int[])
+        ),
+        expanded AS (
+            SELECT DISTINCT ON (skill_id) skill_id, depth, matched_via
+            FROM (
+                SELECT id AS skill_id, 0 AS depth, NULL::varchar AS matched_via
+                FROM matched
+                UNION ALL
+                SELECT cl.descendant_id, cl.depth, m.name
+                FROM matched m
+                JOIN skill_closure cl ON cl.ancestor_id = m.id
+                WHERE $2
+            ) candidates
+            ORDER BY skill_id, depth
+        ),
+        hits AS (
+            SELECT 
+                u.id as user_id,
+                u.name as user_name,
+                u.role,
+                u.team,
+                s.name as skill_name,
+                us.proficiency_level,
+                sc.name as category,
+                e.depth as hierarchy_depth,
+                e.matched_via,
+                us.level_rank
+            FROM expanded e
+            -- Index-only range scan on idx_user_skills_skill_rank
+            -- (skill_id, level_rank DESC, user_id) INCLUDE (proficiency_level)
+            JOIN user_skills us ON us.skill_id = e.skill_id AND us.level_rank >= $1
+            JOIN users u ON us.user_id = u.id{scope_join}
+            JOIN skills s ON us.skill_id = s.id
+            LEFT JOIN skill_categories sc ON s.category_id = sc.id
+        )
+        SELECT user_name, role, team, skill_name, proficiency_level, category, hierarchy_depth, matched_via
+        FROM hits
         ORDER BY 
-            CASE us.proficiency_level 
-                WHEN 'L400' THEN 1 
-                WHEN 'L300' THEN 2 
-                WHEN 'L200' THEN 3 
-                WHEN 'L100' THEN 4 
-            END,
-            u.name
+            -- People with an exact match first, then by their strongest level
+            MIN(hierarchy_depth) OVER (PARTITION BY user_id),
+            MAX(level_rank) FILTER (WHERE hierarchy_depth = 0) OVER (PARTITION BY user_id) DESC NULLS LAST,
+            MAX(level_rank) OVER (PARTITION BY user_id) DESC,
+            user_name,
+            user_id,
+            hierarchy_depth,
+            level_rank DESC,
+            skill_name
     """
     
-    logger.info(f"Executing query with min_level={min_level}, patterns={skill_patterns}")
-    results = await db.fetch_all(query, min_level, *skill_patterns)
-    logger.info(f"Query returned {len(results)} results")
+    logger.debug("Executing query with min_level=%s, patterns=%s, resolved_ids=%s", min_level, skill_patterns, resolved_ids)
+    results = await db.fetch_all(query, min_level, include_related, *skill_patterns, resolved_ids, *scope_args)
+    logger.info("find_experts_by_skills returned %d results", len(results))
     
     if not results:
-        return f"No team members found with skills matching: {', '.join(skills)} (minimum {min_proficiency})"
+        message = (
+            f"No team members found with skills matching: {', '.join(skills)} "
+            f"(minimum {min_proficiency}){_scope_label(team, role)}"
+        )
+        suggestions = sorted({
+            c.name for skill in skills for c in skill_resolver.resolve(skill, limit=3, min_confidence=0.5)
+        })
+        if suggestions:
+            message += f"\nDid you mean: {', '.join(suggestions)}?"
+        return message
     
     # Group by user
     users: dict[str, list[dict]] = {}
@@ -78,11 +181,16 @@ async def find_experts_by_skills(skills: list[str], min_proficiency: str = "L200
         users[name]["skills"].append({
             "skill": row["skill_name"],
             "level": row["proficiency_level"],
-            "category": row["category"]
+            "category": row["category"],
+            "matched_via": row.get("matched_via") if row.get("hierarchy_depth") else None,
         })
     
     # Format output
     lines = [f"Found {len(users)} team member(s) with matching skills:\n"]
+    for skill, candidates in interpreted.items():
+        if candidates:
+            names = ", ".join(f"{c.name} ({c.confidence:.0%} match)" for c in candidates)
+            lines.append(f"_Interpreted '{skill}' as {names}_\n")
     for name, info in users.items():
         lines.append(f"**{name}** ({info['role'] or 'No role'}, {info['team'] or 'No team'})")
         for skill in info["skills"]:
@@ -92,35 +200,88 @@ async def find_experts_by_skills(skills: list[str], min_proficiency: str = "L200
                 "L300": "Practitioner",
                 "L400": "Expert"
             }.get(skill["level"], skill["level"])
-            lines.append(f"  - {skill['skill']}: {skill['level']} ({level_desc})")
+            via = f" [under {skill['matched_via']}]" if skill["matched_via"] else ""
+            lines.append(f"  - {skill['skill']}: {skill['level']} ({level_desc}){via}")
         lines.append("")
     
     return "\n".join(lines)
 
 
-async def get_team_skill_gaps() -> str:
+async def get_team_skill_gaps(team: Optional[str] = None, role: Optional[str] = None) -> str:
     """Identify skills that have low coverage or no experts on the team.
     
+    Args:
+        team: Only consider members of this team
+        role: Only consider people whose role contains this text
+    
     Returns:
         Formatted string describing skill gaps and recommendations
     """
-    # Find skills with no L300+ experts
-    query = """
-        SELECT 
-            s.name as skill_name,
-            sc.name as category,
-            COUNT(DISTINCT us.user_id) as total_users,
-            COUNT(DISTINCT CASE WHEN us.proficiency_level IN ('L300', 'L400') THEN us.user_id END) as expert_count,
-            MAX(us.proficiency_level) as highest_level
-        FROM skills s
-        LEFT JOIN skill_categories sc ON s.category_id = sc.id
-        LEFT JOIN user_skills us ON s.id = us.skill_id
-        GROUP BY s.id, s.name, sc.name
-        ORDER BY expert_count ASC, total_users ASC
-        LIMIT 20
-    """
-    
-    results = await db.fetch_all(query)
+    scope, scope_args = _user_scope(team, role, 1)
+    if scope:
+        members = await db.fetch_one(f"SELECT COUNT(*) as members FROM users u WHERE {scope}", *scope_args)
+        if members and not members["members"]:
+            return f"No team members found{_scope_label(team, role)}."
+    
+    if scope and not (role and role.strip()):
+        # Team-only questions read the trigger-maintained per-team coverage
+        query = """
+            SELECT 
+                s.name as skill_name,
+                sc.name as category,
+                COALESCE(c.l100 + c.l200 + c.l300 + c.l400, 0) as total_users,
+                COALESCE(c.l300 + c.l400, 0) as expert_count,
+                CASE 
+                    WHEN c.l400 > 0 THEN 'L400' 
+                    WHEN c.l300 > 0 THEN 'L300' 
+                    WHEN c.l200 > 0 THEN 'L200' 
+                    WHEN c.l100 > 0 THEN 'L100' 
+                END as highest_level
+            FROM skills s
+            LEFT JOIN skill_categories sc ON s.category_id = sc.id
+            LEFT JOIN team_skill_coverage c ON c.skill_id = s.id AND c.team_key = $1
+            ORDER BY expert_count ASC, total_users ASC, s.name
+            LIMIT 20
+        """
+    elif scope:
+        query = f"""
+            WITH scoped AS (
+                SELECT us.user_id, us.skill_id, us.proficiency_level, us.level_rank
+                FROM users u
+                JOIN user_skills us ON us.user_id = u.id
+                WHERE {scope}
+            )
+            SELECT 
+                s.name as skill_name,
+                sc.name as category,
+                COUNT(DISTINCT x.user_id) as total_users,
+                COUNT(DISTINCT x.user_id) FILTER (WHERE x.level_rank >= 3) as expert_count,
+                MAX(x.proficiency_level) as highest_level
+            FROM skills s
+            LEFT JOIN skill_categories sc ON s.category_id = sc.id
+            LEFT JOIN scoped x ON x.skill_id = s.id
+            GROUP BY s.id, s.name, sc.name
+            ORDER BY expert_count ASC, total_users ASC, s.name
+            LIMIT 20
+        """
+    else:
+        # Find skills with no L300+ experts
+        query = """
+            SELECT 
+                s.name as skill_name,
+                sc.name as category,
+                COUNT(DISTINCT us.user_id) as total_users,
+                COUNT(DISTINCT us.user_id) FILTER (WHERE us.level_rank >= 3) as expert_count,
+                MAX(us.proficiency_level) as highest_level
+            FROM skills s
+            LEFT JOIN skill_categories sc ON s.category_id = sc.id
+            LEFT JOIN user_skills us ON s.id = us.skill_id
+            GROUP BY s.id, s.name, sc.name
+            ORDER BY expert_count ASC, total_users ASC
+            LIMIT 20
+        """
+    
+    results = await db.fetch_all(query, *scope_args)
     
     if not results:
         return "Unable to analyze skill gaps - no skills data available."
@@ -135,7 +296,7 @@ async def get_team_skill_gaps() -> str:
         elif row["total_users"] < 2:
             low_coverage.append(row)
     
-    lines = ["## Team Skill Gap Analysis\n"]
+    lines = [f"## Team Skill Gap Analysis{_scope_label(team, role)}\n"]
     
     if no_experts:
         lines.append("### Skills with No Experts (L300+)")
@@ -159,24 +320,27 @@ async def get_team_skill_gaps() -> str:
     return "\n".join(lines)
 
 
-async def get_skill_summary() -> str:
+async def get_skill_summary(team: Optional[str] = None, role: Optional[str] = None) -> str:
     """Get a high-level summary of team skills.
     
+    Args:
+        team: Only summarize members of this team
+        role: Only summarize people whose role contains this text
+    
     Returns:
         Formatted string with team skills statistics
     """
+    scope, scope_args = _user_scope(team, role, 1)
+    if scope:
+        return await _get_scoped_skill_summary(team, role, scope, scope_args)
+    
     stats_query = """
         SELECT 
             COUNT(DISTINCT u.id) as total_users,
             COUNT(DISTINCT s.id) as total_skills,
             COUNT(DISTINCT sc.id) as total_categories,
             COUNT(us.id) as total_user_skills,
-            AVG(CASE us.proficiency_level 
-                WHEN 'L100' THEN 1 
-                WHEN 'L200' THEN 2 
-                WHEN 'L300' THEN 3 
-                WHEN 'L400' THEN 4 
-            END) as avg_proficiency
+            AVG(us.level_rank) as avg_proficiency
         FROM users u
         CROSS JOIN skills s
         LEFT JOIN skill_categories sc ON s.category_id = sc.id
@@ -194,7 +358,45 @@ async def get_skill_summary() -> str:
     
     stats = await db.fetch_one(stats_query)
     top_skills = await db.fetch_all(top_skills_query)
-    
+    return _format_skill_summary(stats, top_skills, "")
+
+
+async def _get_scoped_skill_summary(team: Optional[str], role: Optional[str], scope: str, scope_args: list) -> str:
+    """Summary over the users matching scope, touching only their rows."""
+    stats_query = f"""
+        WITH scoped_users AS (
+            SELECT u.id FROM users u WHERE {scope}
+        ),
+        assignments AS (
+            SELECT us.id, us.level_rank
+            FROM scoped_users su
+            JOIN user_skills us ON us.user_id = su.id
+        )
+        SELECT 
+            (SELECT COUNT(*) FROM scoped_users) as total_users,
+            (SELECT COUNT(*) FROM skills) as total_skills,
+            (SELECT COUNT(DISTINCT category_id) FROM skills) as total_categories,
+            (SELECT COUNT(*) FROM assignments) as total_user_skills,
+            (SELECT AVG(level_rank) FROM assignments) as avg_proficiency
+    """
+    top_skills_query = f"""
+        SELECT s.name, COUNT(us.id) as user_count
+        FROM users u
+        JOIN user_skills us ON us.user_id = u.id
+        JOIN skills s ON s.id = us.skill_id
+        WHERE {scope}
+        GROUP BY s.id, s.name
+        ORDER BY user_count DESC, s.name
+        LIMIT 5
+    """
+    stats = await db.fetch_one(stats_query, *scope_args)
+    if stats and not stats["total_users"]:
+        return f"No team members found{_scope_label(team, role)}."
+    top_skills = await db.fetch_all(top_skills_query, *scope_args)
+    return _format_skill_summary(stats, top_skills, _scope_label(team, role))
+
+
+def _format_skill_summary(stats: Optional[dict], top_skills: list[dict], label: str) -> str:
     if not stats:
         return "Unable to retrieve team skill summary."
     
@@ -211,7 +413,7 @@ async def get_skill_summary() -> str:
             avg_desc = "Expert"
     
     lines = [
-        "## Team Skills Summary\n",
+        f"## Team Skills Summary{label}\n",
         f"- **Team Members:** {stats.get('total_users', 0)}",
         f"- **Skills Tracked:** {stats.get('total_skills', 0)}",
         f"- **Skill Categories:** {stats.get('total_categories', 0)}",
@@ -228,25 +430,35 @@ async def get_skill_summary() -> str:
     return "\n".join(lines)
 
 
-async def list_all_skills() -> str:
+async def list_all_skills(team: Optional[str] = None, role: Optional[str] = None) -> str:
     """List all available skills grouped by category.
     
+    Args:
+        team: Count only members of this team
+        role: Count only people whose role contains this text
+    
     Returns:
         Formatted string listing all skills
     """
-    query = """
+    scope, scope_args = _user_scope(team, role, 1)
+    if scope:
+        # Count only the scoped users' assignments
+        assignments = f"(user_skills us JOIN users u ON u.id = us.user_id AND {scope})"
+    else:
+        assignments = "user_skills us"
+    query = f"""
         SELECT 
             s.name as skill_name,
             sc.name as category,
             COUNT(us.id) as user_count
         FROM skills s
         LEFT JOIN skill_categories sc ON s.category_id = sc.id
-        LEFT JOIN user_skills us ON s.id = us.skill_id
+        LEFT JOIN {assignments} ON s.id = us.skill_id
         GROUP BY s.id, s.name, sc.name
         ORDER BY sc.name NULLS LAST, s.name
     """
     
-    results = await db.fetch_all(query)
+    results = await db.fetch_all(query, *scope_args)
     
     if not results:
         return "No skills found in the database."
@@ -259,7 +471,7 @@ async def list_all_skills() -> str:
             categories[cat] = []
         categories[cat].append({"name": row["skill_name"], "users": row["user_count"]})
     
-    lines = ["## Available Skills\n"]
+    lines = [f"## Available Skills{_scope_label(team, role)}\n"]
     for cat, skills in sorted(categories.items()):
         lines.append(f"### {cat}")
         for skill in skills:
@@ -268,3 +480,260 @@ async def list_all_skills() -> str:
     
     return "\n".join(lines)
 
+
+async def build_team(
+    skills: list[str],
+    min_proficiency: str = "L300",
+    team: Optional[str] = None,
+    max_size: Optional[int] = None,
+) -> str:
+    """Suggest the smallest group of people who together cover all requested skills.
+    
+    Use this for staffing questions ("who should I put on a project needing
+    X, Y and Z at L300+?") instead of calling find_experts_by_skills per skill.
+    
+    Args:
+        skills: Skill names the team must cover (case-insensitive partial match,
+            falling back to typo-tolerant resolution)
+        min_proficiency: Minimum proficiency level for every skill (L100-L400)
+        team: Only staff people from this team
+        max_size: Maximum number of people; returns the best partial cover if
+            all skills cannot be covered within it
+    
+    Returns:
+        Formatted string with the suggested people and what each covers
+    """
+    terms = sorted({skill.strip() for skill in skills if skill and skill.strip()}, key=str.lower)
+    if not terms:
+        return "No skills specified. Please provide at least one skill to staff for."
+    level = LEVELS.get(min_proficiency.strip().upper(), 3)
+    
+    await skill_index.ensure_loaded()
+    
+    requirements = []
+    unknown = []
+    for term in terms:
+        matched = skill_index.match_skills(term) or skill_resolver.resolve_ids(term)
+        if matched:
+            requirements.append((term, matched))
+        else:
+            unknown.append(term)
+    if not requirements:
+        return f"No skills found matching: {', '.join(terms)}"
+    
+    coverage = skill_index.coverage(
+        [(skill_index.mask(ids), level) for _, ids in requirements],
+        team=team,
+    )
+    
+    # For each candidate, their best level on each requirement they meet
+    best_levels: dict[int, dict[int, tuple[int, int]]] = {}
+    for user_id, bits in coverage.items():
+        levels = skill_index.user_levels.get(user_id, {})
+        for i, (_, ids) in enumerate(requirements):
+            if bits >> i & 1:
+                best_levels.setdefault(user_id, {})[i] = max((levels[sid], sid) for sid in ids if sid in levels)
+    strength = {user_id: sum(lvl for lvl, _ in reqs.values()) for user_id, reqs in best_levels.items()}
+    
+    full = (1 << len(requirements)) - 1
+    chosen = minimum_cover(coverage, full, strength, max_size)
+    
+    covered = 0
+    for user_id in chosen:
+        covered |= coverage[user_id]
+    
+    level_names = {v: k for k, v in LEVELS.items()}
+    scope = f" from team {team}" if team else ""
+    lines = [
+        f"## Suggested Team ({len(chosen)} person(s){scope}, minimum {level_names[level]})\n",
+        f"Covers {bin(covered).count('1')} of {len(requirements)} requested skills.\n",
+    ]
+    for user_id in chosen:
+        user = skill_index.users[user_id]
+        lines.append(f"**{user['name']}** ({user['role'] or 'No role'}, {user['team'] or 'No team'})")
+        for i, (lvl, skill_id) in sorted(best_levels[user_id].items()):
+            lines.append(f"  - {requirements[i][0]}: {skill_index.skills[skill_id]['name']} {level_names[lvl]}")
+        lines.append("")
+    
+    missing = [requirements[i][0] for i in range(len(requirements)) if not covered >> i & 1]
+    if missing:
+        lines.append(f"**Not covered at {level_names[level]}+:** {', '.join(missing)}")
+    if unknown:
+        lines.append(f"**Unknown skills:** {', '.join(unknown)}")
+    
+    return "\n".join(lines)
+
+
+async def _resolve_user(name: str) -> tuple[Optional[int], Optional[str]]:
+    """Look a person up in the skill index; returns (user_id, error message)."""
+    await skill_index.ensure_loaded()
+    matches = skill_index.find_users(name)
+    if not matches:
+        return None, f"No team member found matching '{name}'."
+    if len(matches) > 1:
+        names = ", ".join(sorted(skill_index.users[u]["name"] for u in matches))
+        return None, f"'{name}' matches several people: {names}. Please be more specific."
+    return matches[0], None
+
+
+async def find_similar_colleagues(name: str, limit: int = 5) -> str:
+    """Find people whose skill profile is most like the given person's.
+    
+    Args:
+        name: The person to compare against (full or partial name)
+        limit: Maximum number of colleagues to return
+    
+    Returns:
+        Formatted string listing similar colleagues and the skills they share
+    """
+    user_id, error = await _resolve_user(name)
+    if error:
+        return error
+    # Deferred so numpy is only imported once a matrix tool is used
+    from proficiency_matrix import proficiency_matrix
+    
+    person = skill_index.users[user_id]["name"]
+    similar = proficiency_matrix.similar_users(user_id, max(1, min(limit, 20)))
+    if not similar:
+        return f"No colleagues with overlapping skills found for {person}."
+    
+    own = skill_index.user_levels.get(user_id, {})
+    lines = [f"## Colleagues with a profile like {person}\n"]
+    for other_id, similarity in similar:
+        other = skill_index.users[other_id]
+        theirs = skill_index.user_levels.get(other_id, {})
+        shared = sorted(set(own) & set(theirs), key=lambda s: -min(own[s], theirs[s]))[:5]
+        shared_names = ", ".join(skill_index.skills[s]["name"] for s in shared)
+        lines.append(
+            f"- **{other['name']}** ({other['role'] or 'No role'}, {other['team'] or 'No team'}): "
+            f"{similarity:.0%} similar; shares {shared_names}"
+        )
+    return "\n".join(lines)
+
+
+async def recommend_next_skills(name: str, limit: int = 5) -> str:
+    """Suggest skills a person could learn next, based on skills that commonly go together.
+    
+    Args:
+        name: The person to recommend skills for (full or partial name)
+        limit: Maximum number of skills to suggest
+    
+    Returns:
+        Formatted string with suggested skills and why each was picked
+    """
+    user_id, error = await _resolve_user(name)
+    if error:
+        return error
+    # Deferred so numpy is only imported once a matrix tool is used
+    from proficiency_matrix import proficiency_matrix
+    
+    person = skill_index.users[user_id]["name"]
+    picks = proficiency_matrix.recommend_skills(user_id, max(1, min(limit, 20)))
+    if not picks:
+        return f"No skill recommendations available for {person}."
+    
+    lines = [f"## Suggested next skills for {person}\n"]
+    for skill_id, _, because_id in picks:
+        skill = skill_index.skills[skill_id]
+        lines.append(
+            f"- **{skill['name']}** ({skill['category'] or 'Uncategorized'}): "
+            f"often paired with {skill_index.skills[because_id]['name']}"
+        )
+    return "\n".join(lines)
+
+
+async def _refresh_trend_rollups() -> None:
+    """Fold new history rows into skill_trend_rollups, at most once per interval."""
+    global _trends_refreshed_at
+    now = time.monotonic()
+    if _trends_refreshed_at is not None and now - _trends_refreshed_at < TREND_REFRESH_INTERVAL:
+        return
+    # Writes the rollup table, so never sent to the read replica
+    result = await db.fetch_one("SELECT refresh_skill_trend_rollups() AS folded", primary=True)
+    if result is not None:
+        _trends_refreshed_at = now
+        logger.debug("Trend rollups refreshed: %s bucket(s) updated", result["folded"])
+
+
+async def get_skill_trends(
+    skill: Optional[str] = None,
+    category: Optional[str] = None,
+    weeks: int = 12,
+) -> str:
+    """Show how proficiency has changed week by week.
+    
+    Reads pre-aggregated weekly rollups of proficiency changes, so it stays
+    fast however long the history grows.
+    
+    Args:
+        skill: Only include skills whose name contains this text
+        category: Only include skills in categories whose name contains this text
+        weeks: How many recent weeks to cover (1-104)
+    
+    Returns:
+        Formatted string with weekly counts of people reaching each level
+    """
+    weeks = max(1, min(weeks, 104))
+    skill_pattern = f"%{skill.strip().lower()}%" if skill and skill.strip() else None
+    category_pattern = f"%{category.strip().lower()}%" if category and category.strip() else None
+    
+    await _refresh_trend_rollups()
+    
+    filters = """
+        r.bucket >= (date_trunc('week', LOCALTIMESTAMP) - make_interval(weeks => $1))::date
+        AND ($2::text IS NULL OR LOWER(s.name) ILIKE $2)
+        AND ($3::text IS NULL OR LOWER(sc.name) ILIKE $3)
+    """
+    weekly_query = f"""
+        SELECT 
+            r.bucket,
+            SUM(r.changes) FILTER (WHERE r.proficiency_level = 'L100') as l100,
+            SUM(r.changes) FILTER (WHERE r.proficiency_level = 'L200') as l200,
+            SUM(r.changes) FILTER (WHERE r.proficiency_level = 'L300') as l300,
+            SUM(r.changes) FILTER (WHERE r.proficiency_level = 'L400') as l400
+        FROM skill_trend_rollups r
+        JOIN skills s ON r.skill_id = s.id
+        LEFT JOIN skill_categories sc ON s.category_id = sc.id
+        WHERE {filters}
+        GROUP BY r.bucket
+        ORDER BY r.bucket
+    """
+    top_query = f"""
+        SELECT s.name, SUM(r.changes) as changes
+        FROM skill_trend_rollups r
+        JOIN skills s ON r.skill_id = s.id
+        LEFT JOIN skill_categories sc ON s.category_id = sc.id
+        WHERE {filters}
+        AND r.proficiency_level IN ('L300', 'L400')
+        GROUP BY s.id, s.name
+        ORDER BY changes DESC, s.name
+        LIMIT 5
+    """
+    
+    weekly = await db.fetch_all(weekly_query, weeks, skill_pattern, category_pattern)
+    if not weekly:
+        scope = " matching " + ", ".join(filter(None, [skill, category])) if skill or category else ""
+        return f"No proficiency changes recorded in the last {weeks} week(s){scope}."
+    top = await db.fetch_all(top_query, weeks, skill_pattern, category_pattern)
+    
+    title = " / ".join(filter(None, [skill, category])) or "All Skills"
+    lines = [
+        f"## Proficiency Trends: {title} (last {weeks} weeks)\n",
+        "People reaching each level, per week:\n",
+        "| Week of | L100 | L200 | L300 | L400 |",
+        "|---|---|---|---|---|",
+    ]
+    totals = [0, 0, 0, 0]
+    for row in weekly:
+        counts = [row[key] or 0 for key in ("l100", "l200", "l300", "l400")]
+        totals = [t + c for t, c in zip(totals, counts)]
+        lines.append(f"| {row['bucket']} | " + " | ".join(str(c) for c in counts) + " |")
+    lines.append(f"| **Total** | " + " | ".join(f"**{t}**" for t in totals) + " |")
+    lines.append("")
+    
+    if top:
+        lines.append("### Most Growth at L300+")
+        for row in top:
+            lines.append(f"- {row['name']}: {row['changes']} change(s)")
+    
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+"""Startup warm-up and readiness tracking.
+
+/health only says the process is up. /ready additionally requires the
+warm-up below to have finished, so traffic is not routed to a replica whose
+pool, prepared statements and agent client are still cold.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from config import config
+from db import db
+from agent import skills_agent
+from tools import (
+    find_experts_by_skills,
+    get_team_skill_gaps,
+    get_skill_summary,
+    list_all_skills,
+    build_team,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Runs the warm-up steps once and reports readiness."""
+
+    def __init__(self):
+        self.state = "pending"  # pending -> running -> complete | timed_out
+        self.steps: dict[str, dict] = {}
+        self.duration_ms: Optional[float] = None
+
+    async def _step(self, name: str, coro) -> None:
+        """Run one step, recording its duration and outcome without raising."""
+        start = time.perf_counter()
+        try:
+            detail = await coro
+            self.steps[name] = {"ok": True, "detail": detail}
+        except Exception as e:
+            logger.warning(f"Warm-up step '{name}' failed: {type(e).__name__}: {e}")
+            self.steps[name] = {"ok": False, "detail": f"{type(e).__name__}: {e}"}
+        self.steps[name]["ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def _run_tools(self) -> int:
+        """Call each tool once to load the skill index and prime the statement cache.
+
+        Each query runs once, so its statement is prepared only on the
+        connection that served it: one primary connection, or one replica
+        connection when reads are routed there. Other connections prepare
+        on first use.
+        """
+        await find_experts_by_skills(["warm-up"])
+        await get_team_skill_gaps()
+        await get_skill_summary()
+        await list_all_skills()
+        # Also loads the in-memory skill index
+        await build_team(["warm-up"])
+        return 5
+
+    async def _check_agent(self) -> bool:
+        if config.azure_openai_endpoint and not skills_agent.is_available:
+            raise RuntimeError("Agent client is not available")
+        return skills_agent.is_available
+
+    async def _warm(self) -> None:
+        if db.is_connected:
+            await self._step("pool", db.fill_pool())
+            # Runs after the pool is full so the first queries skip connection setup
+            await self._step("tools", self._run_tools())
+        await self._step("agent", self._check_agent())
+
+    async def run(self, timeout: Optional[float] = None) -> None:
+        """Run all warm-up steps, giving up after timeout seconds."""
+        timeout = config.warmup_timeout if timeout is None else timeout
+        self.state = "running"
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._warm(), timeout=timeout)
+            self.state = "complete"
+        except asyncio.TimeoutError:
+            logger.warning(f"Warm-up did not finish within {timeout}s; continuing cold")
+            self.state = "timed_out"
+        self.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"Warm-up {self.state} in {self.duration_ms} ms: {self.steps}")
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("complete", "timed_out")
+
+    def checks(self) -> dict[str, bool]:
+        """Current readiness checks; each must be true to serve traffic."""
+        return {
+            "warmup_finished": self.finished,
+            "database": db.is_connected or not config.database_url,
+            "agent": skills_agent.is_available or not config.azure_openai_endpoint,
+        }
+
+    @property
+    def is_ready(self) -> bool:
+        return all(self.checks().values())
+
+
+# Global warm-up instance
+warmup = WarmUp()
@@ -123,6 +123,7 @@ router.post('/init', checkInitSecret, async (req, res) => {
       );
 
       CREATE INDEX IF NOT EXISTS idx_users_entra_oid ON users(entra_oid) WHERE entra_oid IS NOT NULL;
+      CREATE INDEX IF NOT EXISTS idx_users_team ON users (LOWER(team));
 
       CREATE TABLE IF NOT EXISTS skill_categories (
           id SERIAL PRIMARY KEY,
@@ -146,6 +147,14 @@ router.post('/init', checkInitSecret, async (req, res) => {
           user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
           skill_id INTEGER REFERENCES skills(id) ON DELETE CASCADE,
           proficiency_level VARCHAR(10) NOT NULL CHECK (proficiency_level IN ('L100', 'L200', 'L300', 'L400')),
+          level_rank SMALLINT GENERATED ALWAYS AS (
+              CASE proficiency_level
+                  WHEN 'L100' THEN 1
+                  WHEN 'L200' THEN 2
+                  WHEN 'L300' THEN 3
+                  WHEN 'L400' THEN 4
+              END
+          ) STORED,
           notes TEXT,
           last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
           UNIQUE(user_id, skill_id)
@@ -161,11 +170,64 @@ router.post('/init', checkInitSecret, async (req, res) => {
       );
 
       CREATE INDEX IF NOT EXISTS idx_user_skills_user ON user_skills(user_id);
-      CREATE INDEX IF NOT EXISTS idx_user_skills_skill ON user_skills(skill_id);
+      CREATE INDEX IF NOT EXISTS idx_user_skills_skill_rank ON user_skills(skill_id, level_rank DESC, user_id) INCLUDE (proficiency_level);
       CREATE INDEX IF NOT EXISTS idx_skills_category ON skills(category_id);
       CREATE INDEX IF NOT EXISTS idx_skill_relationships_parent ON skill_relationships(parent_skill_id);
       CREATE INDEX IF NOT EXISTS idx_skill_relationships_child ON skill_relationships(child_skill_id);
 
+      CREATE TABLE IF NOT EXISTS skill_closure (
+          ancestor_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+          descendant_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+          depth INTEGER NOT NULL,
+          PRIMARY KEY (ancestor_id, descendant_id)
+      );
+
+      CREATE INDEX IF NOT EXISTS idx_skill_closure_descendant ON skill_closure(descendant_id);
+
+      CREATE OR REPLACE FUNCTION refresh_skill_closure()
+      RETURNS VOID AS $$
+      BEGIN
+          -- Serialize concurrent rebuilds so they don't collide on the primary key
+          LOCK TABLE skill_closure IN EXCLUSIVE MODE;
+          DELETE FROM skill_closure;
+          INSERT INTO skill_closure (ancestor_id, descendant_id, depth)
+          WITH RECURSIVE walk(ancestor_id, descendant_id, depth, path) AS (
+              SELECT parent_skill_id, child_skill_id, 1, ARRAY[parent_skill_id, child_skill_id]
+              FROM skill_relationships
+              UNION ALL
+              SELECT w.ancestor_id, r.child_skill_id, w.depth + 1, w.path || r.child_skill_id
+              FROM walk w
+              JOIN skill_relationships r ON r.parent_skill_id = w.descendant_id
+              WHERE NOT r.child_skill_id = ANY(w.path)
+          )
+          SELECT ancestor_id, descendant_id, MIN(depth)
+          FROM walk
+          GROUP BY ancestor_id, descendant_id;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      CREATE OR REPLACE FUNCTION rebuild_skill_closure()
+      RETURNS TRIGGER AS $$
+      BEGIN
+          PERFORM refresh_skill_closure();
+          RETURN NULL;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      DROP TRIGGER IF EXISTS refresh_skill_closure ON skill_relationships;
+      CREATE TRIGGER refresh_skill_closure
+          AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON skill_relationships
+          FOR EACH STATEMENT
+          EXECUTE FUNCTION rebuild_skill_closure();
+
+      CREATE TABLE IF NOT EXISTS skill_aliases (
+          alias VARCHAR(100) PRIMARY KEY,
+          skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+      );
+
+      CREATE INDEX IF NOT EXISTS idx_skill_aliases_skill ON skill_aliases(skill_id);
+
       CREATE TABLE IF NOT EXISTS skill_proposals (
           id SERIAL PRIMARY KEY,
           proposed_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
@@ -245,6 +307,229 @@ router.post('/init', checkInitSecret, async (req, res) => {
           AFTER INSERT OR UPDATE ON user_skills
           FOR EACH ROW
           EXECUTE FUNCTION record_skill_history();
+
+      CREATE TABLE IF NOT EXISTS skill_trend_rollups (
+          bucket DATE NOT NULL,
+          skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+          proficiency_level VARCHAR(10) NOT NULL,
+          changes INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (bucket, skill_id, proficiency_level)
+      );
+
+      CREATE INDEX IF NOT EXISTS idx_skill_trend_rollups_skill ON skill_trend_rollups(skill_id, bucket);
+
+      CREATE TABLE IF NOT EXISTS rollup_watermarks (
+          name VARCHAR(100) PRIMARY KEY,
+          high_water_mark TIMESTAMP NOT NULL,
+          updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+      );
+
+      CREATE OR REPLACE FUNCTION refresh_skill_trend_rollups()
+      RETURNS INTEGER AS $$
+      DECLARE
+          from_mark TIMESTAMP;
+          -- Stay a minute behind now() so rows from still-open transactions
+          -- (changed_at is their start time) are not skipped
+          to_mark TIMESTAMP := LOCALTIMESTAMP - INTERVAL '1 minute';
+          folded INTEGER;
+      BEGIN
+          INSERT INTO rollup_watermarks (name, high_water_mark)
+          VALUES ('skill_trends', '-infinity')
+          ON CONFLICT (name) DO NOTHING;
+
+          SELECT high_water_mark INTO from_mark
+          FROM rollup_watermarks
+          WHERE name = 'skill_trends'
+          FOR UPDATE;
+
+          IF to_mark <= from_mark THEN
+              RETURN 0;
+          END IF;
+
+          INSERT INTO skill_trend_rollups (bucket, skill_id, proficiency_level, changes)
+          SELECT date_trunc('week', changed_at)::date, skill_id, proficiency_level, COUNT(*)
+          FROM user_skills_history
+          WHERE changed_at > from_mark AND changed_at <= to_mark AND skill_id IS NOT NULL
+          GROUP BY 1, 2, 3
+          ON CONFLICT (bucket, skill_id, proficiency_level)
+          DO UPDATE SET changes = skill_trend_rollups.changes + EXCLUDED.changes;
+          GET DIAGNOSTICS folded = ROW_COUNT;
+
+          UPDATE rollup_watermarks
+          SET high_water_mark = to_mark, updated_at = CURRENT_TIMESTAMP
+          WHERE name = 'skill_trends';
+
+          RETURN folded;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      -- Take deleted history back out of the rollups. Only rows at or below the
+      -- high-water mark were ever folded in; locking the mark keeps this in step
+      -- with a concurrent refresh.
+      CREATE OR REPLACE FUNCTION unfold_skill_history()
+      RETURNS TRIGGER AS $$
+      DECLARE
+          folded_to TIMESTAMP;
+      BEGIN
+          SELECT high_water_mark INTO folded_to
+          FROM rollup_watermarks
+          WHERE name = 'skill_trends'
+          FOR UPDATE;
+
+          IF folded_to IS NULL THEN
+              RETURN NULL;
+          END IF;
+
+          UPDATE skill_trend_rollups r
+          SET changes = r.changes - gone.changes
+          FROM (
+              SELECT date_trunc('week', changed_at)::date AS bucket, skill_id, proficiency_level, COUNT(*) AS changes
+              FROM removed_history
+              WHERE changed_at <= folded_to AND skill_id IS NOT NULL
+              GROUP BY 1, 2, 3
+          ) gone
+          WHERE r.bucket = gone.bucket
+            AND r.skill_id = gone.skill_id
+            AND r.proficiency_level = gone.proficiency_level;
+
+          DELETE FROM skill_trend_rollups WHERE changes <= 0;
+          RETURN NULL;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      DROP TRIGGER IF EXISTS unfold_skill_history ON user_skills_history;
+      CREATE TRIGGER unfold_skill_history
+          AFTER DELETE ON user_skills_history
+          REFERENCING OLD TABLE AS removed_history
+          FOR EACH STATEMENT
+          EXECUTE FUNCTION unfold_skill_history();
+
+      -- Full rebuild from user_skills_history, for repair after bulk edits
+      CREATE OR REPLACE FUNCTION rebuild_skill_trend_rollups()
+      RETURNS INTEGER AS $$
+      BEGIN
+          INSERT INTO rollup_watermarks (name, high_water_mark)
+          VALUES ('skill_trends', '-infinity')
+          ON CONFLICT (name) DO NOTHING;
+
+          PERFORM 1 FROM rollup_watermarks WHERE name = 'skill_trends' FOR UPDATE;
+
+          DELETE FROM skill_trend_rollups;
+          UPDATE rollup_watermarks
+          SET high_water_mark = '-infinity', updated_at = CURRENT_TIMESTAMP
+          WHERE name = 'skill_trends';
+
+          RETURN refresh_skill_trend_rollups();
+      END;
+      $$ LANGUAGE plpgsql;
+
+      CREATE TABLE IF NOT EXISTS team_skill_coverage (
+          team_key VARCHAR(100) NOT NULL,  -- LOWER(users.team)
+          skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+          l100 INTEGER NOT NULL DEFAULT 0,
+          l200 INTEGER NOT NULL DEFAULT 0,
+          l300 INTEGER NOT NULL DEFAULT 0,
+          l400 INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (team_key, skill_id)
+      );
+
+      CREATE OR REPLACE FUNCTION adjust_team_skill_coverage(member_team VARCHAR, skill INTEGER, rank SMALLINT, delta INTEGER)
+      RETURNS VOID AS $$
+      BEGIN
+          IF member_team IS NULL OR skill IS NULL OR rank IS NULL THEN
+              RETURN;
+          END IF;
+          INSERT INTO team_skill_coverage (team_key, skill_id, l100, l200, l300, l400)
+          VALUES (
+              LOWER(member_team), skill,
+              CASE WHEN rank = 1 THEN delta ELSE 0 END,
+              CASE WHEN rank = 2 THEN delta ELSE 0 END,
+              CASE WHEN rank = 3 THEN delta ELSE 0 END,
+              CASE WHEN rank = 4 THEN delta ELSE 0 END
+          )
+          ON CONFLICT (team_key, skill_id) DO UPDATE SET
+              l100 = team_skill_coverage.l100 + EXCLUDED.l100,
+              l200 = team_skill_coverage.l200 + EXCLUDED.l200,
+              l300 = team_skill_coverage.l300 + EXCLUDED.l300,
+              l400 = team_skill_coverage.l400 + EXCLUDED.l400;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      -- Keep coverage in step with user_skills, one row at a time
+      CREATE OR REPLACE FUNCTION track_team_skill_coverage()
+      RETURNS TRIGGER AS $$
+      BEGIN
+          IF TG_OP IN ('UPDATE', 'DELETE') THEN
+              -- Finds nothing when the user row itself is being deleted; that
+              -- case is handled by untrack_team_member below
+              PERFORM adjust_team_skill_coverage(u.team, OLD.skill_id, OLD.level_rank, -1)
+              FROM users u WHERE u.id = OLD.user_id;
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') THEN
+              PERFORM adjust_team_skill_coverage(u.team, NEW.skill_id, NEW.level_rank, 1)
+              FROM users u WHERE u.id = NEW.user_id;
+          END IF;
+          RETURN NULL;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      DROP TRIGGER IF EXISTS track_team_skill_coverage ON user_skills;
+      CREATE TRIGGER track_team_skill_coverage
+          AFTER INSERT OR DELETE OR UPDATE OF user_id, skill_id, proficiency_level ON user_skills
+          FOR EACH ROW
+          EXECUTE FUNCTION track_team_skill_coverage();
+
+      -- Move a member's skills between teams, or drop them before the user is deleted
+      CREATE OR REPLACE FUNCTION untrack_team_member()
+      RETURNS TRIGGER AS $$
+      BEGIN
+          PERFORM adjust_team_skill_coverage(OLD.team, us.skill_id, us.level_rank, -1)
+          FROM user_skills us WHERE us.user_id = OLD.id;
+          IF TG_OP = 'UPDATE' THEN
+              PERFORM adjust_team_skill_coverage(NEW.team, us.skill_id, us.level_rank, 1)
+              FROM user_skills us WHERE us.user_id = NEW.id;
+              RETURN NEW;
+          END IF;
+          RETURN OLD;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      DROP TRIGGER IF EXISTS untrack_team_member ON users;
+      CREATE TRIGGER untrack_team_member
+          BEFORE DELETE ON users
+          FOR EACH ROW
+          EXECUTE FUNCTION untrack_team_member();
+
+      DROP TRIGGER IF EXISTS move_team_member ON users;
+      CREATE TRIGGER move_team_member
+          AFTER UPDATE OF team ON users
+          FOR EACH ROW
+          WHEN (OLD.team IS DISTINCT FROM NEW.team)
+          EXECUTE FUNCTION untrack_team_member();
+
+      -- Full rebuild, for backfills and repair after bulk loads or TRUNCATE
+      CREATE OR REPLACE FUNCTION refresh_team_skill_coverage()
+      RETURNS VOID AS $$
+      BEGIN
+          LOCK TABLE team_skill_coverage IN EXCLUSIVE MODE;
+          DELETE FROM team_skill_coverage;
+          INSERT INTO team_skill_coverage (team_key, skill_id, l100, l200, l300, l400)
+          SELECT
+              LOWER(u.team),
+              us.skill_id,
+              COUNT(*) FILTER (WHERE us.level_rank = 1),
+              COUNT(*) FILTER (WHERE us.level_rank = 2),
+              COUNT(*) FILTER (WHERE us.level_rank = 3),
+              COUNT(*) FILTER (WHERE us.level_rank = 4)
+          FROM user_skills us
+          JOIN users u ON u.id = us.user_id
+          WHERE u.team IS NOT NULL
+          GROUP BY 1, 2;
+      END;
+      $$ LANGUAGE plpgsql;
+
+      -- Backfill for databases that already have user_skills rows
+      SELECT refresh_team_skill_coverage();
     `;
 
     await db.query(schemaSQL);
@@ -396,6 +681,53 @@ router.post('/init', checkInitSecret, async (req, res) => {
       ON CONFLICT DO NOTHING
     `);
 
+    // Seed skill aliases by name, so they follow whatever IDs the skills got
+    await db.query(`
+      INSERT INTO skill_aliases (alias, skill_id)
+      SELECT t.alias, s.id FROM
+      (VALUES
+        ('k8s', 'Azure Kubernetes Service (AKS)'),
+        ('aca', 'Azure Container Apps'),
+        ('aci', 'Azure Container Instances'),
+        ('aro', 'Azure Red Hat OpenShift'),
+        ('openshift', 'Azure Red Hat OpenShift'),
+        ('apim', 'Azure API Management'),
+        ('aoai', 'Azure OpenAI Service'),
+        ('gpt', 'Azure OpenAI Service'),
+        ('azure ml', 'Azure Machine Learning'),
+        ('cognitive search', 'Azure AI Search'),
+        ('form recognizer', 'Azure AI Document Intelligence'),
+        ('power virtual agents', 'Copilot Studio'),
+        ('gha', 'GitHub Actions'),
+        ('ado', 'Azure DevOps'),
+        ('c#', 'C# / .NET'),
+        ('csharp', 'C# / .NET'),
+        ('dotnet', 'C# / .NET'),
+        ('javascript', 'JavaScript / TypeScript'),
+        ('typescript', 'JavaScript / TypeScript'),
+        ('js', 'JavaScript / TypeScript'),
+        ('ts', 'JavaScript / TypeScript'),
+        ('golang', 'Go'),
+        ('postgres', 'Azure Database for PostgreSQL'),
+        ('redis', 'Azure Cache for Redis'),
+        ('adf', 'Azure Data Factory'),
+        ('adls', 'Azure Data Lake Storage'),
+        ('adx', 'Azure Data Explorer'),
+        ('kusto', 'Azure Data Explorer'),
+        ('vm', 'Azure Virtual Machines'),
+        ('vmss', 'Azure Virtual Machine Scale Sets'),
+        ('vnet', 'Azure Virtual Network'),
+        ('afd', 'Azure Front Door'),
+        ('aad', 'Microsoft Entra ID'),
+        ('azure ad', 'Microsoft Entra ID'),
+        ('active directory', 'Microsoft Entra ID'),
+        ('azure sentinel', 'Microsoft Sentinel'),
+        ('app insights', 'Application Insights')
+      ) AS t(alias, skill_name)
+      JOIN skills s ON s.name = t.skill_name
+      ON CONFLICT (alias) DO NOTHING
+    `);
+
     // -- Users are populated via /api/admin/sync-skills with real CSV data, not seeded here
 
     // Get counts
@@ -535,9 +867,12 @@ router.post('/reset-users', requireAuth, checkAdminAllowlist, checkInitSecret, a
     await db.query('DELETE FROM user_skills_history');
     await db.query('DELETE FROM user_skills');
     await db.query('DELETE FROM users');
+    // Trend rollups summarize the history that was just removed
+    await db.query('TRUNCATE skill_trend_rollups');
+    await db.query("DELETE FROM rollup_watermarks WHERE name = 'skill_trends'");
 
     res.json({
-      message: 'All users, user_skills, and user_skills_history deleted. Re-initialize with /api/admin/init or sync.',
+      message: 'All users, user_skills, user_skills_history and skill trend rollups deleted. Re-initialize with /api/admin/init or sync.',
       status: 'success'
     });
   } catch (error) {
@@ -315,7 +315,7 @@ describe('Admin API', () => {
       process.env.INIT_SECRET = 'test-secret';
       delete process.env.ADMIN_EMAILS;
 
-      // audit log INSERT + 3 DELETEs
+      // audit log INSERT, 3 DELETEs and the rollup reset
       db.query.mockResolvedValue({ rows: [] });
 
       const app = require('../server');
@@ -327,6 +327,21 @@ describe('Admin API', () => {
       expect(response.status).toBe(200);
     });
 
+    test('reset-users also clears the skill trend rollups', async () => {
+      process.env.INIT_SECRET = 'test-secret';
+      db.query.mockResolvedValue({ rows: [] });
+
+      const app = require('../server');
+      const response = await request(app)
+        .post('/api/admin/reset-users')
+        .send({ secret: 'test-secret' });
+
+      expect(response.status).toBe(200);
+      const statements = db.query.mock.calls.map(([sql]) => sql);
+      expect(statements).toContain('TRUNCATE skill_trend_rollups');
+      expect(statements).toContain("DELETE FROM rollup_watermarks WHERE name = 'skill_trends'");
+    });
+
     test('should reject when email is not in allowlist', async () => {
       process.env.ADMIN_EMAILS = 'boss@example.com';
 
@@ -0,0 +1,56 @@
+-- Migration 006: Precomputed transitive closure of skill_relationships
+-- Lets expert search expand a skill to all of its descendants with a single
+-- indexed join instead of a recursive query per request. The closure is
+-- rebuilt by a statement-level trigger whenever relationships change.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS skill_closure (
+    ancestor_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+    descendant_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_skill_closure_descendant ON skill_closure(descendant_id);
+
+CREATE OR REPLACE FUNCTION refresh_skill_closure()
+RETURNS VOID AS $$
+BEGIN
+    -- Serialize concurrent rebuilds so they don't collide on the primary key
+    LOCK TABLE skill_closure IN EXCLUSIVE MODE;
+    DELETE FROM skill_closure;
+    INSERT INTO skill_closure (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE walk(ancestor_id, descendant_id, depth, path) AS (
+        SELECT parent_skill_id, child_skill_id, 1, ARRAY[parent_skill_id, child_skill_id]
+        FROM skill_relationships
+        UNION ALL
+        SELECT w.ancestor_id, r.child_skill_id, w.depth + 1, w.path || r.child_skill_id
+        FROM walk w
+        JOIN skill_relationships r ON r.parent_skill_id = w.descendant_id
+        WHERE NOT r.child_skill_id = ANY(w.path)
+    )
+    SELECT ancestor_id, descendant_id, MIN(depth)
+    FROM walk
+    GROUP BY ancestor_id, descendant_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_skill_closure()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_skill_closure();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS refresh_skill_closure ON skill_relationships;
+CREATE TRIGGER refresh_skill_closure
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON skill_relationships
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION rebuild_skill_closure();
+
+-- Backfill from existing relationships
+SELECT refresh_skill_closure();
+
+COMMIT;
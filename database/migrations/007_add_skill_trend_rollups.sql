@@ -0,0 +1,66 @@
+-- Migration 007: Weekly rollups of user_skills_history for trend questions
+-- skill_trend_rollups holds per-week, per-skill, per-level change counts.
+-- refresh_skill_trend_rollups() folds in only history rows newer than the
+-- stored high-water mark, so trend reads never scan the full history.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS skill_trend_rollups (
+    bucket DATE NOT NULL,
+    skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+    proficiency_level VARCHAR(10) NOT NULL,
+    changes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, skill_id, proficiency_level)
+);
+
+CREATE INDEX IF NOT EXISTS idx_skill_trend_rollups_skill ON skill_trend_rollups(skill_id, bucket);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name VARCHAR(100) PRIMARY KEY,
+    high_water_mark TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION refresh_skill_trend_rollups()
+RETURNS INTEGER AS $$
+DECLARE
+    from_mark TIMESTAMP;
+    -- Stay a minute behind now() so rows from still-open transactions
+    -- (changed_at is their start time) are not skipped
+    to_mark TIMESTAMP := LOCALTIMESTAMP - INTERVAL '1 minute';
+    folded INTEGER;
+BEGIN
+    INSERT INTO rollup_watermarks (name, high_water_mark)
+    VALUES ('skill_trends', '-infinity')
+    ON CONFLICT (name) DO NOTHING;
+
+    SELECT high_water_mark INTO from_mark
+    FROM rollup_watermarks
+    WHERE name = 'skill_trends'
+    FOR UPDATE;
+
+    IF to_mark <= from_mark THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO skill_trend_rollups (bucket, skill_id, proficiency_level, changes)
+    SELECT date_trunc('week', changed_at)::date, skill_id, proficiency_level, COUNT(*)
+    FROM user_skills_history
+    WHERE changed_at > from_mark AND changed_at <= to_mark AND skill_id IS NOT NULL
+    GROUP BY 1, 2, 3
+    ON CONFLICT (bucket, skill_id, proficiency_level)
+    DO UPDATE SET changes = skill_trend_rollups.changes + EXCLUDED.changes;
+    GET DIAGNOSTICS folded = ROW_COUNT;
+
+    UPDATE rollup_watermarks
+    SET high_water_mark = to_mark, updated_at = CURRENT_TIMESTAMP
+    WHERE name = 'skill_trends';
+
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill from existing history
+SELECT refresh_skill_trend_rollups();
+
+COMMIT;
@@ -0,0 +1,59 @@
+-- Migration 008: Alternative names for skills
+-- The agent's skill resolver indexes these alongside skill names, so terms
+-- like "k8s" or "aoai" resolve to a skill without a retry round trip.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS skill_aliases (
+    alias VARCHAR(100) PRIMARY KEY,
+    skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_skill_aliases_skill ON skill_aliases(skill_id);
+
+INSERT INTO skill_aliases (alias, skill_id)
+SELECT t.alias, s.id FROM
+(VALUES
+  ('k8s', 'Azure Kubernetes Service (AKS)'),
+  ('aca', 'Azure Container Apps'),
+  ('aci', 'Azure Container Instances'),
+  ('aro', 'Azure Red Hat OpenShift'),
+  ('openshift', 'Azure Red Hat OpenShift'),
+  ('apim', 'Azure API Management'),
+  ('aoai', 'Azure OpenAI Service'),
+  ('gpt', 'Azure OpenAI Service'),
+  ('azure ml', 'Azure Machine Learning'),
+  ('cognitive search', 'Azure AI Search'),
+  ('form recognizer', 'Azure AI Document Intelligence'),
+  ('power virtual agents', 'Copilot Studio'),
+  ('gha', 'GitHub Actions'),
+  ('ado', 'Azure DevOps'),
+  ('c#', 'C# / .NET'),
+  ('csharp', 'C# / .NET'),
+  ('dotnet', 'C# / .NET'),
+  ('javascript', 'JavaScript / TypeScript'),
+  ('typescript', 'JavaScript / TypeScript'),
+  ('js', 'JavaScript / TypeScript'),
+  ('ts', 'JavaScript / TypeScript'),
+  ('golang', 'Go'),
+  ('postgres', 'Azure Database for PostgreSQL'),
+  ('redis', 'Azure Cache for Redis'),
+  ('adf', 'Azure Data Factory'),
+  ('adls', 'Azure Data Lake Storage'),
+  ('adx', 'Azure Data Explorer'),
+  ('kusto', 'Azure Data Explorer'),
+  ('vm', 'Azure Virtual Machines'),
+  ('vmss', 'Azure Virtual Machine Scale Sets'),
+  ('vnet', 'Azure Virtual Network'),
+  ('afd', 'Azure Front Door'),
+  ('aad', 'Microsoft Entra ID'),
+  ('azure ad', 'Microsoft Entra ID'),
+  ('active directory', 'Microsoft Entra ID'),
+  ('azure sentinel', 'Microsoft Sentinel'),
+  ('app insights', 'Application Insights')
+) AS t(alias, skill_name)
+JOIN skills s ON s.name = t.skill_name
+ON CONFLICT (alias) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- Migration 009: Numeric proficiency rank on user_skills
+-- Queries used to map proficiency_level to a number with CASE expressions,
+-- which no index can serve. A stored generated column plus a composite
+-- index turns "L300+ for this skill" into an index range scan that returns
+-- rows already ordered by level.
+
+BEGIN;
+
+ALTER TABLE user_skills ADD COLUMN IF NOT EXISTS level_rank SMALLINT
+    GENERATED ALWAYS AS (
+        CASE proficiency_level
+            WHEN 'L100' THEN 1
+            WHEN 'L200' THEN 2
+            WHEN 'L300' THEN 3
+            WHEN 'L400' THEN 4
+        END
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_user_skills_skill_rank ON user_skills(skill_id, level_rank DESC, user_id);
+
+-- The composite index leads with skill_id, so it serves every lookup the
+-- single-column index did
+DROP INDEX IF EXISTS idx_user_skills_skill;
+
+COMMIT;
@@ -0,0 +1,118 @@
+-- Migration 010: Team-scoped queries
+-- Indexes users by team and keeps per-team skill coverage (member counts
+-- per skill and level) up to date with row triggers, so team-scoped gap
+-- analysis reads a few rows per skill instead of aggregating user_skills
+-- across the whole company.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_users_team ON users (LOWER(team));
+
+CREATE TABLE IF NOT EXISTS team_skill_coverage (
+    team_key VARCHAR(100) NOT NULL,  -- LOWER(users.team)
+    skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+    l100 INTEGER NOT NULL DEFAULT 0,
+    l200 INTEGER NOT NULL DEFAULT 0,
+    l300 INTEGER NOT NULL DEFAULT 0,
+    l400 INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (team_key, skill_id)
+);
+
+CREATE OR REPLACE FUNCTION adjust_team_skill_coverage(member_team VARCHAR, skill INTEGER, rank SMALLINT, delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF member_team IS NULL OR skill IS NULL OR rank IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO team_skill_coverage (team_key, skill_id, l100, l200, l300, l400)
+    VALUES (
+        LOWER(member_team), skill,
+        CASE WHEN rank = 1 THEN delta ELSE 0 END,
+        CASE WHEN rank = 2 THEN delta ELSE 0 END,
+        CASE WHEN rank = 3 THEN delta ELSE 0 END,
+        CASE WHEN rank = 4 THEN delta ELSE 0 END
+    )
+    ON CONFLICT (team_key, skill_id) DO UPDATE SET
+        l100 = team_skill_coverage.l100 + EXCLUDED.l100,
+        l200 = team_skill_coverage.l200 + EXCLUDED.l200,
+        l300 = team_skill_coverage.l300 + EXCLUDED.l300,
+        l400 = team_skill_coverage.l400 + EXCLUDED.l400;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep coverage in step with user_skills, one row at a time
+CREATE OR REPLACE FUNCTION track_team_skill_coverage()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- Finds nothing when the user row itself is being deleted; that
+        -- case is handled by untrack_team_member below
+        PERFORM adjust_team_skill_coverage(u.team, OLD.skill_id, OLD.level_rank, -1)
+        FROM users u WHERE u.id = OLD.user_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM adjust_team_skill_coverage(u.team, NEW.skill_id, NEW.level_rank, 1)
+        FROM users u WHERE u.id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS track_team_skill_coverage ON user_skills;
+CREATE TRIGGER track_team_skill_coverage
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, skill_id, proficiency_level ON user_skills
+    FOR EACH ROW
+    EXECUTE FUNCTION track_team_skill_coverage();
+
+-- Move a member's skills between teams, or drop them before the user is deleted
+CREATE OR REPLACE FUNCTION untrack_team_member()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM adjust_team_skill_coverage(OLD.team, us.skill_id, us.level_rank, -1)
+    FROM user_skills us WHERE us.user_id = OLD.id;
+    IF TG_OP = 'UPDATE' THEN
+        PERFORM adjust_team_skill_coverage(NEW.team, us.skill_id, us.level_rank, 1)
+        FROM user_skills us WHERE us.user_id = NEW.id;
+        RETURN NEW;
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS untrack_team_member ON users;
+CREATE TRIGGER untrack_team_member
+    BEFORE DELETE ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION untrack_team_member();
+
+DROP TRIGGER IF EXISTS move_team_member ON users;
+CREATE TRIGGER move_team_member
+    AFTER UPDATE OF team ON users
+    FOR EACH ROW
+    WHEN (OLD.team IS DISTINCT FROM NEW.team)
+    EXECUTE FUNCTION untrack_team_member();
+
+-- Full rebuild, for backfills and repair after bulk loads or TRUNCATE
+CREATE OR REPLACE FUNCTION refresh_team_skill_coverage()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE team_skill_coverage IN EXCLUSIVE MODE;
+    DELETE FROM team_skill_coverage;
+    INSERT INTO team_skill_coverage (team_key, skill_id, l100, l200, l300, l400)
+    SELECT
+        LOWER(u.team),
+        us.skill_id,
+        COUNT(*) FILTER (WHERE us.level_rank = 1),
+        COUNT(*) FILTER (WHERE us.level_rank = 2),
+        COUNT(*) FILTER (WHERE us.level_rank = 3),
+        COUNT(*) FILTER (WHERE us.level_rank = 4)
+    FROM user_skills us
+    JOIN users u ON u.id = us.user_id
+    WHERE u.team IS NOT NULL
+    GROUP BY 1, 2;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT refresh_team_skill_coverage();
+
+COMMIT;
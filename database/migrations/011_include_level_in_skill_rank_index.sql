@@ -0,0 +1,12 @@
+-- Migration 011: Cover proficiency_level in idx_user_skills_skill_rank
+-- Expert search reads user_id, level_rank and proficiency_level for each
+-- matching (skill_id, level_rank) range. With proficiency_level carried in
+-- the index as a non-key column, that lookup can be an index-only scan
+-- instead of visiting the heap for every row.
+
+BEGIN;
+
+DROP INDEX IF EXISTS idx_user_skills_skill_rank;
+CREATE INDEX idx_user_skills_skill_rank ON user_skills(skill_id, level_rank DESC, user_id) INCLUDE (proficiency_level);
+
+COMMIT;
@@ -0,0 +1,71 @@
+-- Migration 012: Keep skill trend rollups in step with deleted history
+-- refresh_skill_trend_rollups() only adds. History rows removed by an admin
+-- reset or by ON DELETE CASCADE from users and skills stayed counted, so
+-- trend answers drifted from the history they summarize.
+
+BEGIN;
+
+-- Take deleted history back out of the rollups. Only rows at or below the
+-- high-water mark were ever folded in; locking the mark keeps this in step
+-- with a concurrent refresh.
+CREATE OR REPLACE FUNCTION unfold_skill_history()
+RETURNS TRIGGER AS $$
+DECLARE
+    folded_to TIMESTAMP;
+BEGIN
+    SELECT high_water_mark INTO folded_to
+    FROM rollup_watermarks
+    WHERE name = 'skill_trends'
+    FOR UPDATE;
+
+    IF folded_to IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE skill_trend_rollups r
+    SET changes = r.changes - gone.changes
+    FROM (
+        SELECT date_trunc('week', changed_at)::date AS bucket, skill_id, proficiency_level, COUNT(*) AS changes
+        FROM removed_history
+        WHERE changed_at <= folded_to AND skill_id IS NOT NULL
+        GROUP BY 1, 2, 3
+    ) gone
+    WHERE r.bucket = gone.bucket
+      AND r.skill_id = gone.skill_id
+      AND r.proficiency_level = gone.proficiency_level;
+
+    DELETE FROM skill_trend_rollups WHERE changes <= 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS unfold_skill_history ON user_skills_history;
+CREATE TRIGGER unfold_skill_history
+    AFTER DELETE ON user_skills_history
+    REFERENCING OLD TABLE AS removed_history
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION unfold_skill_history();
+
+-- Full rebuild from user_skills_history, for repair after bulk edits
+CREATE OR REPLACE FUNCTION rebuild_skill_trend_rollups()
+RETURNS INTEGER AS $$
+BEGIN
+    INSERT INTO rollup_watermarks (name, high_water_mark)
+    VALUES ('skill_trends', '-infinity')
+    ON CONFLICT (name) DO NOTHING;
+
+    PERFORM 1 FROM rollup_watermarks WHERE name = 'skill_trends' FOR UPDATE;
+
+    DELETE FROM skill_trend_rollups;
+    UPDATE rollup_watermarks
+    SET high_water_mark = '-infinity', updated_at = CURRENT_TIMESTAMP
+    WHERE name = 'skill_trends';
+
+    RETURN refresh_skill_trend_rollups();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop counts for history that is already gone
+SELECT rebuild_skill_trend_rollups();
+
+COMMIT;
@@ -76,6 +76,19 @@ function ChatPanel({ isOpen, onToggle }) {
                     prev ? { ...prev, result: data.result } : null
                   );
                   break;
+                case 'tool_start':
+                  setCurrentToolCall({ name: data.name });
+                  toolCalls.push({ name: data.name, callId: data.call_id });
+                  break;
+                case 'tool_end': {
+                  const call = toolCalls.find(c => c.callId === data.call_id);
+                  if (call) {
+                    call.durationMs = data.duration_ms;
+                    call.rows = data.rows;
+                  }
+                  setCurrentToolCall(null);
+                  break;
+                }
                 case 'content':
                   assistantContent += data.content;
                   setCurrentThinking(null);
@@ -192,6 +205,7 @@ function ChatPanel({ isOpen, onToggle }) {
                 {msg.toolCalls.map((tool, tidx) => (
                   <div key={tidx} className="tool-call-badge">
                     🔧 Used: {tool.name}
+                    {tool.durationMs != null && ` (${Math.round(tool.durationMs)} ms)`}
                   </div>
                 ))}
               </div>